@@ -2,29 +2,66 @@
 
 import random
 import itertools
+import time
 from collections import Counter
 
+import poker_equity
+import poker_evaluator
+import poker_flops
+import poker_metrics
+import poker_outs
+import poker_preflop
+
 class Card:
-    """Represents a playing card with rank and suit."""
+    """Represents a playing card with rank and suit.
+
+    There is exactly one Card object per card: Card('Ah') always returns the
+    same interned instance, which carries its integer id and 64-bit mask.
+    """
     RANKS = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
     SUITS = {'h': 'hearts', 'd': 'diamonds', 'c': 'clubs', 's': 'spades'}
+    __slots__ = ('rank', 'rank_value', 'suit', 'suit_name', 'id', 'mask')
     
-    def __init__(self, card_str):
-        """Initialize a card from a 2-character string like 'Ah' for Ace of hearts."""
+    _interned = {}  # card string -> Card, including other spellings seen like 'ah'
+    _by_id = []  # card id -> Card
+    
+    def __new__(cls, card_str):
+        """Return the card for a 2-character string like 'Ah' for Ace of hearts."""
+        card = cls._interned.get(card_str)
+        if card is not None:
+            return card
         if len(card_str) != 2:
             raise ValueError(f"Invalid card format: {card_str}. Use format like 'Ah' for Ace of hearts.")
         
         rank, suit = card_str[0].upper(), card_str[1].lower()
         
-        if rank not in self.RANKS:
-            raise ValueError(f"Invalid rank: {rank}. Valid ranks are: {', '.join(self.RANKS.keys())}")
-        if suit not in self.SUITS:
-            raise ValueError(f"Invalid suit: {suit}. Valid suits are: {', '.join(self.SUITS.keys())}")
-            
-        self.rank = rank
-        self.rank_value = self.RANKS[rank]
-        self.suit = suit
-        self.suit_name = self.SUITS[suit]
+        if rank not in cls.RANKS:
+            raise ValueError(f"Invalid rank: {rank}. Valid ranks are: {', '.join(cls.RANKS.keys())}")
+        if suit not in cls.SUITS:
+            raise ValueError(f"Invalid suit: {suit}. Valid suits are: {', '.join(cls.SUITS.keys())}")
+        
+        card = cls._interned[rank + suit]
+        cls._interned[card_str] = card
+        return card
+    
+    @classmethod
+    def _create(cls, cid):
+        card = object.__new__(cls)
+        card.rank = poker_evaluator.RANK_CHARS[cid >> 2]
+        card.rank_value = cls.RANKS[card.rank]
+        card.suit = poker_evaluator.SUIT_CHARS[cid & 3]
+        card.suit_name = cls.SUITS[card.suit]
+        card.id = cid
+        card.mask = 1 << cid
+        return card
+    
+    @classmethod
+    def from_id(cls, cid):
+        """Return the card with an integer id from poker_evaluator."""
+        return cls._by_id[cid]
+    
+    def __reduce__(self):
+        return (Card, (str(self),))
     
     def __str__(self):
         return f"{self.rank}{self.suit}"
@@ -33,48 +70,95 @@ class Card:
         return self.__str__()
     
     def __eq__(self, other):
-        return self.rank == other.rank and self.suit == other.suit
+        return self is other or (isinstance(other, Card) and self.id == other.id)
     
     def __hash__(self):
-        return hash((self.rank, self.suit))
+        return self.id
+
+Card._by_id = [Card._create(cid) for cid in range(52)]
+Card._interned.update((str(card), card) for card in Card._by_id)
 
 class Deck:
-    """Represents a deck of 52 playing cards."""
-    def __init__(self):
+    """Represents a deck of 52 playing cards.
+    
+    The remaining cards are kept as a 52-bit mask plus a list of card ids with
+    each id's position in it, so removing a card is O(1) and dealing n cards
+    is a partial Fisher-Yates draw of n random cards.
+    """
+    FULL_MASK = (1 << 52) - 1
+    
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
         self.reset()
     
     def reset(self):
         """Reset the deck to a full 52-card deck."""
-        self.cards = [Card(r + s) for r in Card.RANKS.keys() for s in Card.SUITS.keys()]
+        self.mask = self.FULL_MASK
+        self.ids = list(range(52))
+        self._slots = list(range(52))
         self.dealt_cards = []
     
+    @property
+    def cards(self):
+        """The cards left in the deck."""
+        by_id = Card._by_id
+        return [by_id[cid] for cid in self.ids]
+    
+    def __len__(self):
+        return len(self.ids)
+    
     def shuffle(self):
         """Shuffle the remaining cards in the deck."""
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.ids)
+        for slot, cid in enumerate(self.ids):
+            self._slots[cid] = slot
+    
+    def _take(self, slot):
+        """Remove the card at a slot of self.ids by moving the last card into it."""
+        ids = self.ids
+        cid = ids[slot]
+        last = ids.pop()
+        if last != cid:
+            ids[slot] = last
+            self._slots[last] = slot
+        self.mask &= ~(1 << cid)
+        card = Card._by_id[cid]
+        self.dealt_cards.append(card)
+        return card
     
+    @poker_metrics.timed('deck', op='deal')
     def deal(self, n=1):
-        """Deal n cards from the deck."""
-        if n > len(self.cards):
-            raise ValueError(f"Cannot deal {n} cards. Only {len(self.cards)} cards left in deck.")
-        
-        dealt = []
-        for _ in range(n):
-            card = self.cards.pop()
-            self.dealt_cards.append(card)
-            dealt.append(card)
+        """Deal n random cards from the deck."""
+        if n > len(self.ids):
+            raise ValueError(f"Cannot deal {n} cards. Only {len(self.ids)} cards left in deck.")
         
+        rand = self.rng.random
+        dealt = [self._take(int(rand() * len(self.ids))) for _ in range(n)]
         return dealt if n > 1 else dealt[0]
     
+    @poker_metrics.timed('deck', op='remove')
     def remove_cards(self, cards):
         """Remove specific cards from the deck."""
         for card in cards:
             if isinstance(card, str):
                 card = Card(card)
-            if card in self.cards:
-                self.cards.remove(card)
-                self.dealt_cards.append(card)
+            if self.mask >> card.id & 1:
+                self._take(self._slots[card.id])
             else:
                 raise ValueError(f"Card {card} is not in the deck.")
+    
+    @poker_metrics.timed('deck', op='restore')
+    def restore_cards(self, cards):
+        """Put previously removed or dealt cards back into the deck."""
+        for card in cards:
+            if isinstance(card, str):
+                card = Card(card)
+            if self.mask >> card.id & 1:
+                raise ValueError(f"Card {card} is already in the deck.")
+            self._slots[card.id] = len(self.ids)
+            self.ids.append(card.id)
+            self.mask |= card.mask
+            self.dealt_cards.remove(card)
 
 class HandEvaluator:
     """Evaluates poker hands and calculates hand strength."""
@@ -92,6 +176,38 @@ class HandEvaluator:
     }
     
     @staticmethod
+    @poker_metrics.timed('evaluate', method='evaluate_strength')
+    def evaluate_strength(cards):
+        """Return a comparable integer strength (higher is better) for 5-7 cards.
+
+        Cards may be Card objects, strings like 'Ah' or integer card ids. This is
+        the fast path; use evaluate_hand when the hand type and cards are needed.
+        """
+        return poker_evaluator.evaluate(poker_evaluator.card_ids(cards))
+    
+    @staticmethod
+    @poker_metrics.timed('evaluate', method='evaluate_batch')
+    def evaluate_batch(cards, chunk=None):
+        """Evaluate an (N, 5|6|7) NumPy array of card ids in one vectorized pass.
+        
+        Returns (strengths, categories): an int32 array of strengths as from
+        evaluate_strength and an int8 array of categories, 0 = high card ...
+        8 = straight flush (see HAND_RANKINGS). Rows are processed in chunks
+        to bound memory use.
+        """
+        import poker_vectorized  # needs numpy
+        
+        if chunk is None:
+            chunk = poker_vectorized.EVALUATE_CHUNK
+        return poker_vectorized.evaluate_cards(cards, chunk)
+    
+    @staticmethod
+    def hand_type(strength):
+        """Return the hand type name for a strength from evaluate_strength."""
+        return poker_evaluator.strength_type(strength)
+    
+    @staticmethod
+    @poker_metrics.timed('evaluate', method='evaluate_hand')
     def evaluate_hand(cards):
         """Evaluate a poker hand (5-7 cards) and return the hand type and relevant cards."""
         if len(cards) < 5:
@@ -100,7 +216,11 @@ class HandEvaluator:
         # Find the best 5-card hand if more than 5 cards are provided
         if len(cards) > 5:
             return HandEvaluator._find_best_hand(cards)
-        
+        return HandEvaluator._evaluate_five(cards)
+    
+    @staticmethod
+    def _evaluate_five(cards):
+        """Evaluate exactly 5 cards and return the hand type and relevant cards."""
         # Sort cards by rank value (high to low)
         sorted_cards = sorted(cards, key=lambda card: card.rank_value, reverse=True)
         
@@ -157,31 +277,12 @@ class HandEvaluator:
     @staticmethod
     def _find_best_hand(cards):
         """Find the best 5-card hand from a set of 6 or 7 cards."""
-        best_hand = None
-        best_score = -1
-        
-        for hand_combo in itertools.combinations(cards, 5):
-            hand_result = HandEvaluator.evaluate_hand(list(hand_combo))
-            hand_score = hand_result['rank']
-            
-            # If this hand is better than our current best, update
-            if hand_score > best_score:
-                best_hand = hand_result
-                best_score = hand_score
-            elif hand_score == best_score:
-                # If same hand type, compare the cards
-                current_cards = hand_result['cards']
-                best_cards = best_hand['cards']
-                
-                # Compare cards by rank value
-                for i in range(len(current_cards)):
-                    if current_cards[i].rank_value > best_cards[i].rank_value:
-                        best_hand = hand_result
-                        break
-                    elif current_cards[i].rank_value < best_cards[i].rank_value:
-                        break
-        
-        return best_hand
+        # Rank every 5-card subset with the integer evaluator and only build
+        # the detailed result for the winning one
+        keys = [poker_evaluator.CARD_KEYS[poker_evaluator.card_id(card)] for card in cards]
+        best_combo = max(itertools.combinations(range(len(cards)), 5),
+                         key=lambda combo: poker_evaluator.strength_from_key(sum(keys[i] for i in combo)))
+        return HandEvaluator._evaluate_five([cards[i] for i in best_combo])
     
     @staticmethod
     def _check_flush(cards):
@@ -257,7 +358,14 @@ class HandEvaluator:
         return pairs
 
 class PokerSimulator:
-    """Simulates Texas Hold'em poker hands and calculates win probabilities."""
+    """Simulates Texas Hold'em poker hands and calculates win probabilities.
+    
+    Moving from one street to the next only processes the new board cards: the
+    additive key of the hole and community cards is updated in place, and
+    equity results are cached per board and deck so the results already
+    computed for a street (including next-card equities precomputed with
+    precompute_next_street) are reused.
+    """
     def __init__(self):
         self.deck = Deck()
         self.evaluator = HandEvaluator()
@@ -269,6 +377,11 @@ class PokerSimulator:
         self.opponent_bets = []
         self.position = 'early'  # early, middle, late, or button
         self.stage = 'preflop'  # preflop, flop, turn, river
+        self.exact_threshold = poker_equity.EXACT_THRESHOLD  # enumerate spots with fewer runouts
+        self._hand_key = 0  # additive evaluator key of hole + community cards
+        self._equity_cache = {}
+        self.opponent_ranges = []  # poker_opponents.OpponentRange per opponent that acted
+        self.disk_cache = None  # optional poker_cache.DiskCache shared across runs
     
     def reset_game(self):
         """Reset the game state."""
@@ -277,25 +390,65 @@ class PokerSimulator:
         self.community_cards = []
         self.hole_cards = []
         self.opponent_bets = []
+        self.opponent_ranges = []
         self.stage = 'preflop'
+        self._hand_key = 0
+        self._equity_cache = {}
+    
+    def _check_new_cards(self, cards, replaced=()):
+        """Raise ValueError unless the cards are distinct and each is in the deck or among the replaced cards."""
+        available = self.deck.mask
+        for card in replaced:
+            available |= card.mask
+        if len(set(cards)) != len(cards):
+            raise ValueError("Cards must not repeat.")
+        for card in cards:
+            if not available >> card.id & 1:
+                raise ValueError(f"Card {card} is not in the deck.")
     
     def set_hole_cards(self, cards):
         """Set the player's hole cards."""
-        if isinstance(cards[0], str):
-            self.hole_cards = [Card(c) for c in cards]
-        else:
-            self.hole_cards = cards
+        cards = [Card(c) if isinstance(c, str) else c for c in cards]
+        # Check before touching the deck, so a bad card leaves the state as it was
+        self._check_new_cards(cards, self.hole_cards)
+        if self.hole_cards:
+            self.deck.restore_cards(self.hole_cards)
         # Remove these cards from the deck
-        self.deck.remove_cards(self.hole_cards)
+        self.deck.remove_cards(cards)
+        self.hole_cards = cards
+        self._hand_key = poker_evaluator.hand_key([c.id for c in cards + self.community_cards])
+        self._equity_cache = {}
     
     def set_community_cards(self, cards):
-        """Set the community cards."""
-        if isinstance(cards[0], str):
-            self.community_cards = [Card(c) for c in cards]
-        else:
-            self.community_cards = cards
+        """Set the community cards.
+        
+        When the new board extends the current one (flop -> turn -> river) only
+        the new cards are processed; otherwise the old board is put back into
+        the deck first.
+        """
+        cards = [Card(c) if isinstance(c, str) else c for c in cards]
+        current = self.community_cards
+        if cards[:len(current)] == current:
+            self.add_community_cards(cards[len(current):])
+            return
+        if len(cards) > 5:
+            raise ValueError("There can be at most 5 community cards.")
+        self._check_new_cards(cards, current)
+        self.deck.restore_cards(current)
+        self._hand_key -= poker_evaluator.hand_key([c.id for c in current])
+        self.community_cards = []
+        self.add_community_cards(cards)
+    
+    def add_community_cards(self, cards):
+        """Add the next street's card(s) to the board."""
+        cards = [Card(c) if isinstance(c, str) else c for c in cards]
+        if len(self.community_cards) + len(cards) > 5:
+            raise ValueError("There can be at most 5 community cards.")
+        self._check_new_cards(cards)
         # Remove these cards from the deck
-        self.deck.remove_cards(self.community_cards)
+        self.deck.remove_cards(cards)
+        self.community_cards = self.community_cards + cards
+        self._hand_key += poker_evaluator.hand_key([c.id for c in cards])
         
         # Update the game stage based on the number of community cards
         if len(self.community_cards) == 3:
@@ -304,9 +457,257 @@ class PokerSimulator:
             self.stage = 'turn'
         elif len(self.community_cards) == 5:
             self.stage = 'river'
+        else:
+            self.stage = 'preflop'
+    
+    def current_strength(self):
+        """Return the evaluator strength of the hole and community cards (at least 5 cards)."""
+        if len(self.hole_cards) + len(self.community_cards) < 5:
+            raise ValueError("Need at least 5 cards to evaluate a poker hand.")
+        return poker_evaluator.strength_from_key(self._hand_key)
+    
+    def current_hand_type(self):
+        """Return the hand type name of the hole and community cards."""
+        return poker_evaluator.strength_type(self.current_strength())
+    
+    def _equity_key(self, board_ids, deck_mask, iterations, seed, exact_threshold, workers):
+        # Exact results don't depend on the sampling parameters
+        deck_size = bin(deck_mask).count('1')
+        if poker_equity.runout_count(board_ids, range(deck_size), self.num_opponents) <= exact_threshold:
+            return (frozenset(board_ids), deck_mask, self.num_opponents)
+        return (frozenset(board_ids), deck_mask, self.num_opponents, iterations, seed, workers is not None)
+    
+    def _disk_key(self, board_ids, iterations, exact_threshold):
+        # Suit-canonical situations only describe the spot when no other cards are dead
+        if self.disk_cache is None or len(self.deck) != 50 - len(board_ids):
+            return None
+        hole, board = poker_equity.canonical_situation([c.id for c in self.hole_cards], board_ids)
+        exact = poker_equity.runout_count(board_ids, range(len(self.deck)), self.num_opponents) <= exact_threshold
+        return ('equity', hole, board, self.num_opponents, 'exact' if exact else iterations)
+    
+    def calculate_equity(self, iterations=10000, seed=None, exact_threshold=None, workers=None):
+        """Calculate win/tie/loss probabilities against random opponent hands.
+        
+        Spots with at most exact_threshold possible runouts (default
+        self.exact_threshold) are enumerated exactly, others are sampled from
+        the cards left in the deck. Returns a dict with 'win', 'tie', 'loss',
+        'equity' (ties split evenly), 'std_error' of the equity estimate, the
+        number of 'trials' and whether the result is 'exact'.
+        
+        Pass workers to shard sampling over a shared process pool; results for
+        a given seed do not depend on the number of workers. With a
+        disk_cache, spots without dead cards are also looked up in and
+        stored to it.
+        """
+        if len(self.hole_cards) != 2:
+            raise ValueError("Set the hole cards before calculating equity.")
+        if exact_threshold is None:
+            exact_threshold = self.exact_threshold
+        start = time.perf_counter() if poker_metrics.enabled else None
+        board = [c.id for c in self.community_cards]
+        key = self._equity_key(board, self.deck.mask, iterations, seed, exact_threshold, workers)
+        result = self._equity_cache.get(key)
+        if start is not None:
+            poker_metrics.cache_lookup('equity', result is not None)
+        if result is None:
+            disk_key = self._disk_key(board, iterations, exact_threshold)
+            if disk_key is not None:
+                result = self.disk_cache.get(disk_key)
+                if start is not None:
+                    poker_metrics.cache_lookup('equity_disk', result is not None)
+            if result is None and len(board) == 3 and self.num_opponents == 1 and len(self.deck) == 47:
+                # Heads-up flops without dead cards are in the flop atlas once it is built
+                result = poker_flops.flop_result(self.hole_cards, board)
+                if start is not None:
+                    poker_metrics.cache_lookup('flop_atlas', result is not None)
+            if result is None:
+                result = poker_equity.equity(
+                    [c.id for c in self.hole_cards], board, self.deck.ids,
+                    self.num_opponents, iterations, seed, exact_threshold, workers)
+                if start is not None:
+                    poker_metrics.count('equity_runouts', result['trials'], exact=result['exact'])
+                if disk_key is not None:
+                    self.disk_cache.put(disk_key, result)
+            self._equity_cache[key] = result
+        if start is not None:
+            poker_metrics.observe('equity', time.perf_counter() - start, stage=self.stage)
+        return dict(result)
     
+    def calculate_equity_within(self, deadline_ms=None, target_width=None, confidence=0.95, seed=None):
+        """Calculate equity within a time budget and/or to a target confidence interval width.
+        
+        Cached and flop atlas results are returned at once; otherwise see
+        poker_equity.anytime_equity for the sampling and the returned dict.
+        Only exact results are cached.
+        """
+        if len(self.hole_cards) != 2:
+            raise ValueError("Set the hole cards before calculating equity.")
+        start = time.perf_counter() if poker_metrics.enabled else None
+        board = [c.id for c in self.community_cards]
+        key = self._equity_key(board, self.deck.mask, None, seed, self.exact_threshold, None)
+        result = self._equity_cache.get(key)
+        if result is None and len(board) == 3 and self.num_opponents == 1 and len(self.deck) == 47:
+            result = poker_flops.flop_result(self.hole_cards, board)
+        if result is not None and result['exact']:
+            result = dict(result, ci_low=result['equity'], ci_high=result['equity'],
+                          confidence=confidence, elapsed_ms=0.0, stop_reason='exact')
+        else:
+            result = poker_equity.anytime_equity(
+                [c.id for c in self.hole_cards], board, self.deck.ids, self.num_opponents,
+                deadline_ms, target_width, confidence, seed, self.exact_threshold)
+            if result['exact']:
+                self._equity_cache[key] = result
+            if start is not None:
+                poker_metrics.count('equity_runouts', result['trials'], exact=result['exact'])
+        if start is not None:
+            poker_metrics.observe('equity', time.perf_counter() - start, stage=self.stage)
+        return dict(result)
+    
+    @poker_metrics.timed('precompute_next_street')
+    def precompute_next_street(self, iterations=10000, seed=None, exact_threshold=None, workers=None):
+        """Calculate the equity for every possible next turn or river card ahead of time.
+        
+        The results are cached, so calculate_equity with the same arguments
+        returns at once after that card is added. Returns {Card: result}.
+        """
+        if len(self.hole_cards) != 2:
+            raise ValueError("Set the hole cards before calculating equity.")
+        if exact_threshold is None:
+            exact_threshold = self.exact_threshold
+        board = [c.id for c in self.community_cards]
+        results = poker_equity.next_card_equities(
+            [c.id for c in self.hole_cards], board, self.deck.ids,
+            self.num_opponents, iterations, seed, exact_threshold, workers)
+        mask = self.deck.mask
+        for cid, result in results.items():
+            key = self._equity_key(board + [cid], mask & ~(1 << cid), iterations, seed,
+                                   exact_threshold, workers)
+            self._equity_cache[key] = result
+        return {Card.from_id(cid): result for cid, result in results.items()}
+    
+    @poker_metrics.timed('range_equity')
+    def calculate_range_equity(self, villain_range, hero_range=None, samples=None, seed=None):
+        """Calculate equity against an opponent range like 'QQ+, AKs, KQo, 76s-54s'.
+        
+        Uses the hole cards unless hero_range is given. Flop, turn and river
+        spots are exact; preflop spots sample boards. See
+        poker_ranges.range_equity for the returned dict.
+        """
+        import poker_ranges  # needs numpy
+        
+        hero = self.hole_cards if hero_range is None else hero_range
+        if samples is None:
+            samples = poker_ranges.PREFLOP_BOARDS
+        return poker_ranges.range_equity(hero, villain_range, self.community_cards,
+                                         samples=samples, seed=seed)
+    
+    def _preflop_opponents(self):
+        """Clamp the opponent count to the range covered by the preflop table."""
+        return min(max(self.num_opponents, 1), poker_preflop.MAX_OPPONENTS)
+    
+    def narrowed_villain_range(self):
+        """Pool the opponents' ranges narrowed by their recorded bets into one range.
+        
+        Folded opponents are left out and opponents without recorded bets
+        hold random hands. Returns (weights, opponents still in), or (None,
+        num_opponents) before any bet is recorded or once every narrowed
+        opponent has folded.
+        """
+        import poker_opponents  # needs numpy
+        
+        ranges = [r.weights for r in self.opponent_ranges if not r.folded]
+        if not ranges:
+            return None, max(self.num_opponents, 1)
+        ranges += [None] * max(self.num_opponents - len(self.opponent_ranges), 0)
+        known = [c.id for c in self.hole_cards + self.community_cards]
+        return poker_opponents.pooled_range(ranges, known), len(ranges)
+    
+    @poker_metrics.timed('hand_potential')
+    def calculate_hand_potential(self, villain_range=None):
+        """Calculate hand strength, positive and negative potential and EHS on the flop or turn.
+        
+        Without a villain_range the potential is worked out against the
+        opponents' ranges narrowed by their recorded bets (see
+        narrowed_villain_range), which are random hands until a bet is
+        recorded. See poker_potential.hand_potential for the returned dict.
+        """
+        import poker_potential  # needs numpy
+        
+        num_opponents = max(self.num_opponents, 1)
+        if villain_range is None:
+            villain_range, num_opponents = self.narrowed_villain_range()
+        return poker_potential.hand_potential(self.hole_cards, self.community_cards,
+                                              num_opponents, villain_range)
+    
+    @poker_metrics.timed('outs')
+    def calculate_outs(self):
+        """List the outs and draws of the hole cards on the flop or turn.
+        
+        Cards still in the deck are the unseen cards. See poker_outs.outs for
+        the returned dict.
+        """
+        return poker_outs.outs(self.hole_cards, self.community_cards, self.deck.ids)
+    
+    @poker_metrics.timed('opponent_range')
+    def record_opponent_bet(self, bet, position=None, opponent=None):
+        """Record an opponent's bet (0 for check/fold) and narrow their range with it.
+        
+        ``opponent`` indexes the opponents in the order they first acted; by
+        default the bet comes from a new opponent. The pot before the bet is
+        pot_size plus the bets recorded so far. Returns the opponent's
+        poker_opponents.OpponentRange.
+        """
+        import poker_opponents  # needs numpy
+        
+        current_bet = max(self.opponent_bets, default=0)
+        pot = self.pot_size + sum(self.opponent_bets)
+        if opponent is None:
+            opponent = len(self.opponent_ranges)
+        if opponent == len(self.opponent_ranges):
+            known = [c.id for c in self.hole_cards + self.community_cards]
+            self.opponent_ranges.append(
+                poker_opponents.OpponentRange(position, max(self.num_opponents, 1), known))
+        opponent_range = self.opponent_ranges[opponent]
+        action = poker_opponents.action_from_bet(bet, current_bet)
+        to_call = bet if action in ('bet', 'raise') else current_bet
+        opponent_range.observe(action, to_call, pot, [c.id for c in self.community_cards])
+        self.opponent_bets.append(bet)
+        return opponent_range
+    
+    @poker_metrics.timed('range_narrowed_equity')
+    def calculate_equity_vs_ranges(self, samples=None, seed=None):
+        """Estimate equity against the opponents' narrowed ranges instead of random hands.
+        
+        Opponents who folded are left out; opponents without recorded bets
+        hold random hands. See poker_opponents.range_equity for the result.
+        """
+        import poker_opponents  # needs numpy
+        
+        if len(self.hole_cards) != 2:
+            raise ValueError("Set the hole cards before calculating equity.")
+        ranges = [r.weights for r in self.opponent_ranges if not r.folded]
+        unseen = max(self.num_opponents - len(self.opponent_ranges), 0)
+        ranges += [None] * unseen
+        if not ranges:
+            raise ValueError("Every opponent has folded.")
+        return poker_opponents.range_equity(
+            self.hole_cards, ranges, self.community_cards,
+            samples=samples or poker_opponents.RANGE_SAMPLES, seed=seed)
+    
+    @poker_metrics.timed('preflop_equity')
+    def calculate_preflop_equity(self, hole_cards=None):
+        """Look up the all-in equity of hole cards against num_opponents random hands."""
+        if hole_cards is None:
+            hole_cards = self.hole_cards
+        return poker_preflop.preflop_equity(hole_cards[0], hole_cards[1], self._preflop_opponents())
+    
+    @poker_metrics.timed('preflop_strength')
     def calculate_preflop_strength(self, hole_cards=None):
-        """Calculate the strength of hole cards before the flop."""
+        """Calculate the strength of hole cards before the flop.
+        
+        Returns the hand type and the share of all starting hands this hand
+        out-performs in all-in equity against num_opponents random hands.
+        """
         if hole_cards is None:
             hole_cards = self.hole_cards
         
@@ -314,16 +715,19 @@ class PokerSimulator:
         if isinstance(hole_cards[0], str):
             hole_cards = [Card(c) for c in hole_cards]
         
+        strength = poker_preflop.class_percentile(
+            poker_preflop.hand_class(hole_cards[0], hole_cards[1]), self._preflop_opponents())
+        
         # Basic hand strength categories
         # Pairs
         if hole_cards[0].rank == hole_cards[1].rank:
             rank_value = hole_cards[0].rank_value
             if rank_value >= 10:  # JJ, QQ, KK, AA
-                return 'premium_pair', 0.85
+                return 'premium_pair', strength
             elif rank_value >= 7:  # 77, 88, 99, TT
-                return 'medium_pair', 0.7
+                return 'medium_pair', strength
             else:  # 22, 33, 44, 55, 66
-                return 'small_pair', 0.55
+                return 'small_pair', strength
         
         # Suited cards
         suited = hole_cards[0].suit == hole_cards[1].suit
@@ -341,22 +745,22 @@ class PokerSimulator:
         
         # Categorize hand
         if broadway and suited:
-            return 'suited_broadway', 0.8
+            return 'suited_broadway', strength
         elif broadway:
-            return 'broadway', 0.7
+            return 'broadway', strength
         elif suited and connected:
-            return 'suited_connector', 0.65
+            return 'suited_connector', strength
         elif connected and high_card.rank_value >= 10:
-            return 'high_connector', 0.6
+            return 'high_connector', strength
         elif suited and high_card.rank == 'A':
-            return 'ace_suited', 0.65
+            return 'ace_suited', strength
         elif suited and one_gap:
-            return 'suited_one_gapper', 0.55
+            return 'suited_one_gapper', strength
         elif connected:
-            return 'connector', 0.5
+            return 'connector', strength
         elif suited:
-            return 'suited', 0.45
+            return 'suited', strength
         elif high_card.rank == 'A':
-            return 'ace_high', 0.4
+            return 'ace_high', strength
         else:
-            return 'unconnected', 0.3
\ No newline at end of file
+            return 'unconnected', strength
\ No newline at end of file
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Benchmarks and an exhaustive correctness check for the evaluators and equity code.
+
+    python poker_bench.py --output bench.json
+    python poker_bench.py --compare bench.json      # ratios against an earlier run
+    python poker_bench.py --check                   # check only
+
+The benchmarks report hands/sec for every evaluator and trials/sec for the
+equity paths, and write them as JSON so runs on different commits can be
+compared. The check evaluates all 2,598,960 five-card hands and compares the
+number of hands per category with the known counts; it exits non-zero when
+anything is off.
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import poker_equity
+import poker_evaluator
+from poker_assistant import Card, HandEvaluator, PokerSimulator
+from poker_evaluator import CARD_KEYS, HAND_TYPES, NUM_STRENGTHS, strength_category, strength_from_key
+
+# Number of five-card hands in each category, high card first
+CATEGORY_COUNTS = [1302540, 1098240, 123552, 54912, 10200, 5108, 3744, 624, 40]
+
+# Seconds each benchmark runs for by default
+BENCH_SECONDS = 1.0
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _random_hands(size, count, seed=0):
+    rng = random.Random(seed)
+    return [rng.sample(range(52), size) for _ in range(count)]
+
+
+def measure(func, items, seconds=BENCH_SECONDS):
+    """Call func on items, cycling through them, for about seconds; return (calls, elapsed)."""
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        for item in items:
+            func(item)
+        calls += len(items)
+        elapsed = time.perf_counter() - start
+    return calls, elapsed
+
+
+def _result(name, unit, count, elapsed, **params):
+    result = {'name': name, 'unit': unit, 'count': count, 'seconds': elapsed,
+              'rate': count / elapsed}
+    result.update(params)
+    return result
+
+
+def bench_evaluators(seconds=BENCH_SECONDS):
+    """Return hands/sec results for each evaluator on 5, 6 and 7 card hands."""
+    results = []
+    for size in (5, 6, 7):
+        ids = _random_hands(size, 2000, seed=size)
+        cards = [[Card.from_id(c) for c in hand] for hand in ids]
+        evaluators = [
+            ('evaluate_hand', HandEvaluator.evaluate_hand, cards),
+            ('evaluate_strength', HandEvaluator.evaluate_strength, cards),
+            ('evaluator.evaluate', poker_evaluator.evaluate, ids),
+        ]
+        if size > 5:
+            evaluators.insert(1, ('_find_best_hand', HandEvaluator._find_best_hand, cards))
+        for name, func, items in evaluators:
+            count, elapsed = measure(func, items, seconds)
+            results.append(_result(name, 'hands/s', count, elapsed, cards=size))
+
+        try:
+            import numpy as np
+            import poker_vectorized
+        except ImportError:
+            continue
+        low = [poker_vectorized.hand_low(hand) for hand in ids]
+        masks = [poker_vectorized.hand_masks(hand) for hand in ids]
+        count, elapsed = measure(lambda _: poker_vectorized.strengths(low, masks), [None], seconds)
+        results.append(_result('vectorized.strengths', 'hands/s', count * len(ids), elapsed, cards=size))
+        batch = np.array(ids, dtype=np.uint8)
+        count, elapsed = measure(lambda _: HandEvaluator.evaluate_batch(batch), [None], seconds)
+        results.append(_result('evaluate_batch', 'hands/s', count * len(ids), elapsed, cards=size))
+    return results
+
+
+def bench_equity(seconds=BENCH_SECONDS, iterations=20000):
+    """Return trials/sec results for Monte Carlo, exact and simulator equity paths."""
+    results = []
+    hole = poker_evaluator.card_ids(['Ah', 'Kd'])
+    flop = poker_evaluator.card_ids(['7c', '8c', 'Ts'])
+    for board in ([], flop):
+        deck = [c for c in range(52) if c not in hole + board]
+        for opponents in (1, 2, 4, 8):
+            start = time.perf_counter()
+            runs = 0
+            while True:
+                poker_equity.monte_carlo_equity(hole, board, deck, opponents, iterations, seed=runs)
+                runs += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= seconds:
+                    break
+            results.append(_result('monte_carlo_equity', 'trials/s', runs * iterations, elapsed,
+                                   board=len(board), opponents=opponents))
+
+    for board in (flop, flop + [poker_evaluator.card_id('2d')]):
+        deck = [c for c in range(52) if c not in hole + board]
+        start = time.perf_counter()
+        result = poker_equity.exact_equity(hole, board, deck, 1)
+        elapsed = time.perf_counter() - start
+        results.append(_result('exact_equity', 'runouts/s', result['trials'], elapsed,
+                               board=len(board), opponents=1))
+
+    simulator = PokerSimulator()
+    simulator.num_opponents = 3
+    simulator.set_hole_cards(['Ah', 'Kd'])
+    simulator.set_community_cards(['7c', '8c', 'Ts'])
+    start = time.perf_counter()
+    simulator.calculate_equity(iterations, seed=0)
+    elapsed = time.perf_counter() - start
+    results.append(_result('PokerSimulator.calculate_equity', 'trials/s', iterations, elapsed,
+                           board=3, opponents=3))
+    return results
+
+
+def category_counts():
+    """Evaluate every five-card hand and return (hands per category, distinct strengths)."""
+    counts = [0] * len(HAND_TYPES)
+    per_strength = [0] * (NUM_STRENGTHS + 1)
+    keys = CARD_KEYS
+    for a in range(52):
+        ka = keys[a]
+        for b in range(a + 1, 52):
+            kb = ka + keys[b]
+            for c in range(b + 1, 52):
+                kc = kb + keys[c]
+                for d in range(c + 1, 52):
+                    kd = kc + keys[d]
+                    for e in range(d + 1, 52):
+                        per_strength[strength_from_key(kd + keys[e])] += 1
+    for strength, hands in enumerate(per_strength):
+        if hands:
+            counts[strength_category(strength)] += hands
+    return counts, sum(1 for hands in per_strength if hands)
+
+
+def check_slow_evaluator(samples=20000, seed=0):
+    """Compare the hand types of evaluate_hand and the table evaluator on random hands.
+
+    Returns the number of mismatches.
+    """
+    mismatches = 0
+    rng = random.Random(seed)
+    for _ in range(samples):
+        ids = rng.sample(range(52), rng.choice((5, 6, 7)))
+        expected = HandEvaluator.evaluate_hand([Card.from_id(c) for c in ids])['type']
+        if expected != poker_evaluator.strength_type(poker_evaluator.evaluate(ids)):
+            mismatches += 1
+    return mismatches
+
+
+def run_check(samples=20000):
+    """Run the correctness checks and return a dict with 'ok' and the details."""
+    start = time.perf_counter()
+    counts, distinct = category_counts()
+    mismatches = check_slow_evaluator(samples)
+    return {
+        'ok': counts == CATEGORY_COUNTS and distinct == NUM_STRENGTHS and mismatches == 0,
+        'hands': sum(counts),
+        'categories': dict(zip(HAND_TYPES, counts)),
+        'expected': dict(zip(HAND_TYPES, CATEGORY_COUNTS)),
+        'distinct_strengths': distinct,
+        'slow_evaluator_samples': samples,
+        'slow_evaluator_mismatches': mismatches,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _bench_id(result):
+    params = sorted((k, v) for k, v in result.items() if k not in ('name', 'unit', 'count', 'seconds', 'rate'))
+    return result['name'] + ''.join(f" {k}={v}" for k, v in params)
+
+
+def compare(results, baseline):
+    """Return {benchmark: rate / baseline rate} for benchmarks present in both runs."""
+    base = {_bench_id(r): r['rate'] for r in baseline.get('results', [])}
+    return {_bench_id(r): r['rate'] / base[_bench_id(r)] for r in results if _bench_id(r) in base}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark and check the poker evaluators.")
+    parser.add_argument('--seconds', type=float, default=BENCH_SECONDS, help="time per benchmark")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="JSON file of an earlier run to compare against")
+    parser.add_argument('--check', action='store_true', help="only run the correctness check")
+    parser.add_argument('--no-check', action='store_true', help="skip the correctness check")
+    args = parser.parse_args(argv)
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    if not args.check:
+        report['results'] = bench_evaluators(args.seconds) + bench_equity(args.seconds)
+        for result in report['results']:
+            print(f"{_bench_id(result):45} {result['rate']:>14,.0f} {result['unit']}")
+    if not args.no_check:
+        report['check'] = run_check()
+        check = report['check']
+        print(f"Checked {check['hands']:,} five-card hands in {check['seconds']:.1f}s: "
+              f"{'OK' if check['ok'] else 'FAILED'}")
+        if not check['ok']:
+            print(json.dumps(check, indent=2))
+
+    if args.compare and 'results' in report:
+        with open(args.compare) as f:
+            ratios = compare(report['results'], json.load(f))
+        report['compare'] = ratios
+        for name, ratio in ratios.items():
+            print(f"{name:45} {ratio:>8.2f}x")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if 'check' in report and not report['check']['ok']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
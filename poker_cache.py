@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Persistent cache of equity and analysis results in a sqlite file.
+
+Results survive restarts and are shared by every process using the same
+file: sqlite runs in WAL mode, so readers don't block each other or the
+writer, and writers wait for each other up to a timeout. Keys are
+JSON-encoded tuples, normally built on poker_equity.canonical_situation so
+that spots differing only by suits share an entry; values are anything
+JSON can hold.
+
+The file holds at most ``max_entries`` results. Every entry records when
+it was last used and the least recently used ones are evicted once the
+limit is passed (checked every EVICT_EVERY writes). To keep lookups
+cheap, the last-use time is only refreshed once it is older than
+TOUCH_SECONDS.
+
+A cache can be exported to and pre-warmed from JSON lines files:
+
+    python poker_cache.py --export warm.jsonl
+    python poker_cache.py --cache /tmp/new.sqlite --prewarm warm.jsonl
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'poker_cache.sqlite')
+DISK_CACHE_SIZE = 1000000
+
+# Writes between checks of the size limit
+EVICT_EVERY = 100
+# Age of the last-use time before a hit refreshes it
+TOUCH_SECONDS = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+
+def encode_key(key):
+    """Return the text form of a key made of tuples, lists, strings and numbers."""
+    return json.dumps(key, separators=(',', ':'))
+
+
+class DiskCache:
+    """A size-bounded LRU cache of JSON values in a sqlite file, safe to share between processes."""
+    def __init__(self, path=CACHE_FILE, max_entries=DISK_CACHE_SIZE, timeout=30.0):
+        if max_entries < 1:
+            raise ValueError("The cache needs room for at least 1 entry.")
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    def _connect(self):
+        # One connection per thread and process; connections don't survive a fork
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.timeout)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        text = encode_key(key)
+        db = self._connect()
+        row = db.execute('SELECT value, used FROM entries WHERE key = ?', (text,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - row[1] > TOUCH_SECONDS:
+            with db:
+                db.execute('UPDATE entries SET used = ? WHERE key = ?', (now, text))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries when over the size limit."""
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        """Store (key, value) pairs in one transaction."""
+        now = time.time()
+        rows = [(encode_key(key), json.dumps(value), now) for key, value in items]
+        db = self._connect()
+        with db:
+            db.executemany('INSERT OR REPLACE INTO entries (key, value, used) VALUES (?, ?, ?)', rows)
+        self._writes += len(rows)
+        if self._writes >= EVICT_EVERY:
+            self._writes = 0
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used entries beyond max_entries; return how many were dropped."""
+        db = self._connect()
+        with db:
+            count, = db.execute('SELECT COUNT(*) FROM entries').fetchone()
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            db.execute('DELETE FROM entries WHERE key IN '
+                       '(SELECT key FROM entries ORDER BY used LIMIT ?)', (excess,))
+        return excess
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        db = self._connect()
+        with db:
+            db.execute('DELETE FROM entries')
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Return size and hit statistics as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'size': len(self),
+            'maxsize': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def export(self, path):
+        """Write every entry, most recently used last, as {"key": ..., "value": ...} JSON lines."""
+        rows = self._connect().execute('SELECT key, value FROM entries ORDER BY used')
+        count = 0
+        with open(path, 'w') as f:
+            for key, value in rows:
+                f.write(f'{{"key": {key}, "value": {value}}}\n')
+                count += 1
+        return count
+
+    def prewarm(self, path, batch=1000):
+        """Load entries from a JSON lines file written by export; return how many were loaded."""
+        count = 0
+        items = []
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                items.append((entry['key'], entry['value']))
+                if len(items) >= batch:
+                    self.put_many(items)
+                    count += len(items)
+                    items = []
+        if items:
+            self.put_many(items)
+            count += len(items)
+        self.evict()
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, export or pre-warm the persistent result cache.")
+    parser.add_argument('--cache', default=CACHE_FILE, help="sqlite cache file")
+    parser.add_argument('--max-entries', type=int, default=DISK_CACHE_SIZE)
+    parser.add_argument('--export', metavar='FILE', help="write the entries as JSON lines")
+    parser.add_argument('--prewarm', metavar='FILE', action='append', default=[],
+                        help="load entries from a JSON lines file")
+    parser.add_argument('--clear', action='store_true', help="drop every entry first")
+    args = parser.parse_args(argv)
+
+    cache = DiskCache(args.cache, args.max_entries)
+    if args.clear:
+        cache.clear()
+    for path in args.prewarm:
+        print(f"Loaded {cache.prewarm(path)} entries from {path}", file=sys.stderr)
+    if args.export:
+        print(f"Exported {cache.export(args.export)} entries to {args.export}", file=sys.stderr)
+    json.dump(cache.info(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""Equity calculation on integer card ids.
+
+All functions take card ids (see poker_evaluator) and work on the additive
+card keys directly, so no Card or Deck objects are created while sampling.
+"""
+
+import atexit
+import hashlib
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from poker_evaluator import CARD_KEYS, FLUSH_TABLE, RANK_TABLE, hand_key, strength_from_key
+
+_RANK_MASK = (1 << 32) - 1
+
+# Trials per shard in sharded Monte Carlo runs. Shard boundaries and seeds only
+# depend on the iteration count and seed, never on the number of workers.
+SHARD_TRIALS = 25000
+
+# Spots with at most this many runouts are enumerated exactly by default.
+# Large enough to cover a heads-up flop (1,070,190 runouts).
+EXACT_THRESHOLD = 1100000
+
+# Anytime equity: the first batch of trials, the time a later batch aims to
+# take, the trials needed before the error bar is trusted, and the cost of one
+# exactly enumerated runout relative to one sampled trial (an overestimate)
+ANYTIME_FIRST_BATCH = 200
+ANYTIME_BATCH_SECONDS = 0.01
+ANYTIME_MIN_TRIALS = 1000
+EXACT_COST_RATIO = 0.5
+
+
+def _validate(hole, board, deck, num_opponents):
+    if len(hole) != 2:
+        raise ValueError("Need exactly 2 hole cards to calculate equity.")
+    if len(board) > 5:
+        raise ValueError("There can be at most 5 community cards.")
+    if num_opponents < 1:
+        raise ValueError("Need at least 1 opponent to calculate equity.")
+    needed = 5 - len(board) + 2 * num_opponents
+    if needed > len(deck):
+        raise ValueError(f"Cannot deal {needed} cards. Only {len(deck)} cards left in deck.")
+
+
+def _summarize(wins, ties, share_sum, share_sq_sum, trials, exact=False):
+    """Turn accumulated trial counts into the equity result dict."""
+    equity = share_sum / trials
+    variance = max(share_sq_sum / trials - equity * equity, 0.0)
+    return {
+        'win': wins / trials,
+        'tie': ties / trials,
+        'loss': (trials - wins - ties) / trials,
+        'equity': equity,
+        'std_error': math.sqrt(variance / trials),
+        'trials': trials,
+        'exact': exact,
+    }
+
+
+def monte_carlo_counts(hole, board, deck, num_opponents, iterations, seed=None):
+    """Sample random runouts and return (wins, ties, share_sum, share_sq_sum).
+
+    A trial deals the missing board cards and two cards to every opponent from
+    ``deck``. The hero's share of a trial is 1 for a win, 1/k for a k-way tie
+    and 0 for a loss.
+    """
+    rng = random.Random(seed)
+    rand = rng.random
+    rank_table = RANK_TABLE
+    flush_table = FLUSH_TABLE
+    rank_mask = _RANK_MASK
+
+    deck_keys = [CARD_KEYS[c] for c in sorted(deck)]
+    size = len(deck_keys)
+    board_key = hand_key(board)
+    hero_key = hand_key(hole)
+    missing = 5 - len(board)
+    needed = missing + 2 * num_opponents
+    # A partial Fisher-Yates shuffle moves the drawn cards to the tail of
+    # deck_keys: the board cards first, then two per opponent
+    draw_slots = range(size - 1, size - 1 - needed, -1)
+    board_slots = range(size - missing, size)
+    opponent_slots = range(size - missing - 2, size - needed - 1, -2)
+
+    wins = ties = 0
+    share_sum = share_sq_sum = 0.0
+    for _ in range(iterations):
+        for last in draw_slots:
+            j = int(rand() * (last + 1))
+            deck_keys[j], deck_keys[last] = deck_keys[last], deck_keys[j]
+        runout = board_key
+        for i in board_slots:
+            runout += deck_keys[i]
+
+        key = runout + hero_key
+        flush = ((key >> 32) + 0x3333) & 0x8888
+        if flush:
+            hero = flush_table[(key >> (48 + 16 * (flush.bit_length() // 4 - 1))) & 0x1FFF]
+        else:
+            hero = rank_table[key & rank_mask]
+
+        tied = 1
+        for i in opponent_slots:
+            key = runout + deck_keys[i] + deck_keys[i + 1]
+            flush = ((key >> 32) + 0x3333) & 0x8888
+            if flush:
+                villain = flush_table[(key >> (48 + 16 * (flush.bit_length() // 4 - 1))) & 0x1FFF]
+            else:
+                villain = rank_table[key & rank_mask]
+            if villain > hero:
+                tied = 0
+                break
+            if villain == hero:
+                tied += 1
+
+        if tied == 1:
+            wins += 1
+            share_sum += 1.0
+            share_sq_sum += 1.0
+        elif tied:
+            ties += 1
+            share = 1.0 / tied
+            share_sum += share
+            share_sq_sum += share * share
+
+    return wins, ties, share_sum, share_sq_sum
+
+
+def monte_carlo_equity(hole, board, deck, num_opponents, iterations=10000, seed=None):
+    """Estimate equity against random opponent hands by Monte Carlo sampling."""
+    _validate(hole, board, deck, num_opponents)
+    if iterations < 1:
+        raise ValueError("Need at least 1 iteration to calculate equity.")
+    counts = monte_carlo_counts(hole, board, deck, num_opponents, iterations, seed)
+    return _summarize(*counts, iterations)
+
+
+_pool = None
+_pool_workers = 0
+
+
+def get_pool(workers=None):
+    """Return the shared process pool, starting it on first use.
+
+    The pool is reused across calls and only restarted when a different
+    number of workers is requested.
+    """
+    global _pool, _pool_workers
+    workers = workers or os.cpu_count() or 1
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the shared process pool if it is running."""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
+
+
+atexit.register(shutdown_pool)
+
+
+def shard_seed(seed, index):
+    """Derive an independent, deterministic seed for one shard."""
+    digest = hashlib.sha256(f"{seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def _run_shard(args):
+    return monte_carlo_counts(*args)
+
+
+def sharded_monte_carlo_equity(hole, board, deck, num_opponents, iterations=10000, seed=None,
+                               workers=None):
+    """Estimate equity by Monte Carlo sampling split into shards over a process pool.
+
+    Trials are cut into shards of SHARD_TRIALS, each with its own seed derived
+    from ``seed``, and the shard counts are merged in shard order. The result
+    for a given seed is therefore identical for any number of workers.
+    ``workers=1`` runs the shards in this process.
+    """
+    _validate(hole, board, deck, num_opponents)
+    if iterations < 1:
+        raise ValueError("Need at least 1 iteration to calculate equity.")
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+
+    hole, board, deck = list(hole), list(board), sorted(deck)
+    shards = []
+    for index, start in enumerate(range(0, iterations, SHARD_TRIALS)):
+        trials = min(SHARD_TRIALS, iterations - start)
+        shards.append((hole, board, deck, num_opponents, trials, shard_seed(seed, index)))
+
+    if workers == 1 or len(shards) == 1:
+        results = map(_run_shard, shards)
+    else:
+        results = get_pool(workers).map(_run_shard, shards)
+
+    wins = ties = 0
+    share_sum = share_sq_sum = 0.0
+    for w, t, share, share_sq in results:
+        wins += w
+        ties += t
+        share_sum += share
+        share_sq_sum += share_sq
+    return _summarize(wins, ties, share_sum, share_sq_sum, iterations)
+
+
+def runout_count(board, deck, num_opponents):
+    """Return the number of distinct (board, opponent hands) runouts of a spot."""
+    remaining = len(deck)
+    missing = 5 - len(board)
+    count = math.comb(remaining, missing)
+    remaining -= missing
+    for _ in range(num_opponents):
+        count *= math.comb(remaining, 2)
+        remaining -= 2
+    return count
+
+
+def _permute(cid, perm):
+    return (cid & ~3) | perm[cid & 3]
+
+
+def canonical_situation(hole, board):
+    """Return a suit-independent form of (hole, board) card ids.
+
+    Situations that only differ by a relabelling of suits map to the same
+    pair of sorted tuples, so it can be used as a cache key.
+    """
+    best = None
+    for perm in itertools.permutations(range(4)):
+        key = (tuple(sorted(_permute(c, perm) for c in hole)),
+               tuple(sorted(_permute(c, perm) for c in board)))
+        if best is None or key < best:
+            best = key
+    return best
+
+
+def _suit_stabilizer(card_sets):
+    """Return the suit permutations that map each of the given card sets onto itself."""
+    group = []
+    for perm in itertools.permutations(range(4)):
+        if all({_permute(c, perm) for c in cards} == cards for cards in card_sets):
+            group.append(perm)
+    return group
+
+
+def _orbit(cards, group):
+    """Classify a sorted tuple of cards under a suit permutation group.
+
+    Returns (is_canonical, orbit_size, stabilizer), where the canonical member
+    of an orbit is its smallest sorted tuple.
+    """
+    if len(group) == 1:
+        return True, 1, group
+    images = {}
+    for perm in group:
+        image = tuple(sorted(_permute(c, perm) for c in cards))
+        images.setdefault(image, []).append(perm)
+    return cards == min(images), len(images), images[cards]
+
+
+def _reduce_pairs(pairs, group, cache):
+    """Return the canonical pairs under a group as (mask, key, weight, stabilizer) tuples."""
+    token = tuple(group)
+    reduced = cache.get(token)
+    if reduced is None:
+        reduced = []
+        for cards, mask, key in pairs:
+            canonical, weight, stabilizer = _orbit(cards, group)
+            if canonical:
+                reduced.append((mask, key, weight, stabilizer))
+        cache[token] = reduced
+    return reduced
+
+
+def _count_opponents(hero, runout_key, pairs, used, group, opponents_left, tied, cache):
+    """Return weighted (wins, ties, share_sum) over all opponent holdings that don't beat the hero.
+
+    The group only contains permutations that fix every card dealt so far, so a
+    pair conflicts with ``used`` exactly when its whole orbit does.
+    """
+    wins = ties = 0
+    share_sum = 0.0
+    for mask, key, weight, sub_group in _reduce_pairs(pairs, group, cache):
+        if mask & used:
+            continue
+        villain = strength_from_key(runout_key + key)
+        if villain > hero:
+            continue
+        now_tied = tied + 1 if villain == hero else tied
+        if opponents_left > 1:
+            w, t, share = _count_opponents(hero, runout_key, pairs, used | mask, sub_group,
+                                           opponents_left - 1, now_tied, cache)
+            wins += weight * w
+            ties += weight * t
+            share_sum += weight * share
+        elif now_tied == 1:
+            wins += weight
+            share_sum += weight
+        else:
+            ties += weight
+            share_sum += weight / now_tied
+    return wins, ties, share_sum
+
+
+def exact_counts(hole, board, deck, num_opponents):
+    """Enumerate every runout and return weighted (wins, ties, share_sum).
+
+    Runouts that are identical up to a permutation of suits (one that leaves
+    the hole cards, the board and the deck unchanged) are evaluated once and
+    counted by the size of their orbit.
+    """
+    deck = sorted(deck)
+    group = _suit_stabilizer([set(hole), set(board), set(deck)])
+    board_key = hand_key(board)
+    hero_key = hand_key(hole)
+    pairs = [((a, b), 1 << a | 1 << b, CARD_KEYS[a] + CARD_KEYS[b])
+             for a, b in itertools.combinations(deck, 2)]
+
+    cache = {}
+    wins = ties = 0
+    share_sum = 0.0
+    for completion in itertools.combinations(deck, 5 - len(board)):
+        canonical, weight, sub_group = _orbit(completion, group)
+        if not canonical:
+            continue
+        runout_key = board_key + hand_key(completion)
+        hero = strength_from_key(runout_key + hero_key)
+        used = 0
+        for c in completion:
+            used |= 1 << c
+        w, t, share = _count_opponents(hero, runout_key, pairs, used, sub_group, num_opponents, 1, cache)
+        wins += weight * w
+        ties += weight * t
+        share_sum += weight * share
+    return wins, ties, share_sum
+
+
+def exact_equity(hole, board, deck, num_opponents):
+    """Calculate exact equity against random opponent hands by full enumeration."""
+    _validate(hole, board, deck, num_opponents)
+    wins, ties, share_sum = exact_counts(hole, board, deck, num_opponents)
+    total = runout_count(board, deck, num_opponents)
+    result = _summarize(wins, ties, share_sum, 0.0, total, exact=True)
+    result['std_error'] = 0.0
+    return result
+
+
+def equity(hole, board, deck, num_opponents, iterations=10000, seed=None,
+           exact_threshold=EXACT_THRESHOLD, workers=None):
+    """Calculate equity exactly when the spot has at most exact_threshold runouts, else sample it.
+
+    Sampling runs in this process unless ``workers`` is given, in which case it
+    is sharded over the shared process pool.
+    """
+    _validate(hole, board, deck, num_opponents)
+    if runout_count(board, deck, num_opponents) <= exact_threshold:
+        return exact_equity(hole, board, deck, num_opponents)
+    if workers is not None:
+        return sharded_monte_carlo_equity(hole, board, deck, num_opponents, iterations, seed, workers)
+    return monte_carlo_equity(hole, board, deck, num_opponents, iterations, seed)
+
+
+def _with_interval(result, z, confidence, start, stop_reason):
+    half_width = z * result['std_error']
+    result.update({
+        'ci_low': max(result['equity'] - half_width, 0.0),
+        'ci_high': min(result['equity'] + half_width, 1.0),
+        'confidence': confidence,
+        'elapsed_ms': (time.perf_counter() - start) * 1000,
+        'stop_reason': stop_reason,
+    })
+    return result
+
+
+def anytime_equity(hole, board, deck, num_opponents, deadline_ms=None, target_width=None,
+                   confidence=0.95, seed=None, exact_threshold=EXACT_THRESHOLD, max_iterations=None):
+    """Estimate equity within a time budget, stopping early once it is precise enough.
+
+    Trials are sampled in batches until the confidence interval of the equity
+    is at most ``target_width`` wide, ``deadline_ms`` has passed or
+    ``max_iterations`` trials are done; at least one of the three is needed.
+    Batches are sized from the time the previous ones took, so a busy machine
+    gets smaller batches and the deadline still holds, give or take one small
+    batch. Spots with at most exact_threshold runouts are enumerated exactly
+    instead when that fits in the time left and is expected to be quicker
+    than sampling to the target.
+
+    Returns the equity result dict with the interval ('ci_low', 'ci_high'),
+    its 'confidence', the 'elapsed_ms' and the 'stop_reason': 'exact',
+    'converged', 'deadline' or 'iterations'.
+    """
+    start = time.perf_counter()
+    _validate(hole, board, deck, num_opponents)
+    if deadline_ms is None and target_width is None and max_iterations is None:
+        raise ValueError("Need a deadline, a target interval width or an iteration limit.")
+    if deadline_ms is not None and deadline_ms <= 0:
+        raise ValueError("The deadline must be positive.")
+    if target_width is not None and target_width <= 0:
+        raise ValueError("The target interval width must be positive.")
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1.")
+    if max_iterations is not None and max_iterations < 1:
+        raise ValueError("Need at least 1 iteration to calculate equity.")
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    end = None if deadline_ms is None else start + deadline_ms / 1000
+    runouts = runout_count(board, deck, num_opponents)
+
+    hole, board, deck = list(hole), list(board), sorted(deck)
+    wins = ties = trials = 0
+    share_sum = share_sq_sum = 0.0
+    seconds_per_trial = 0.0
+    batch = ANYTIME_FIRST_BATCH
+    index = 0
+    while True:
+        if max_iterations is not None:
+            batch = min(batch, max_iterations - trials)
+        if end is not None and trials:
+            # Never start a batch that is expected to run past the deadline
+            batch = min(batch, int((end - time.perf_counter()) / seconds_per_trial))
+            if batch < 1:
+                stop_reason = 'deadline'
+                break
+
+        batch_start = time.perf_counter()
+        w, t, share, share_sq = monte_carlo_counts(hole, board, deck, num_opponents, batch,
+                                                   shard_seed(seed, index))
+        elapsed = time.perf_counter() - batch_start
+        index += 1
+        wins += w
+        ties += t
+        share_sum += share
+        share_sq_sum += share_sq
+        trials += batch
+        # The slower of the last batch and the average so far reacts quickly to load
+        seconds_per_trial = max(elapsed / batch, (time.perf_counter() - start) / trials)
+
+        result = _summarize(wins, ties, share_sum, share_sq_sum, trials)
+        if index == 1 and runouts <= exact_threshold:
+            # Enumerate instead when that fits in the time left and is cheaper than sampling on
+            exact_cost = runouts * seconds_per_trial * EXACT_COST_RATIO
+            sampling_cost = math.inf
+            if target_width is not None:
+                deviation = result['std_error'] * math.sqrt(trials)
+                sampling_cost = (2 * z * deviation / target_width) ** 2 * seconds_per_trial
+            if max_iterations is not None:
+                sampling_cost = min(sampling_cost, max_iterations * seconds_per_trial)
+            if exact_cost <= sampling_cost and (end is None or time.perf_counter() + exact_cost < end):
+                result = exact_equity(hole, board, deck, num_opponents)
+                return _with_interval(result, z, confidence, start, 'exact')
+
+        if target_width is not None and trials >= ANYTIME_MIN_TRIALS and \
+                2 * z * result['std_error'] <= target_width:
+            stop_reason = 'converged'
+            break
+        if max_iterations is not None and trials >= max_iterations:
+            stop_reason = 'iterations'
+            break
+        if end is not None and time.perf_counter() >= end:
+            stop_reason = 'deadline'
+            break
+
+        batch = max(int(ANYTIME_BATCH_SECONDS / seconds_per_trial), ANYTIME_FIRST_BATCH)
+        if target_width is not None and trials >= ANYTIME_MIN_TRIALS:
+            # Trials the interval needs at the current spread, plus a little
+            deviation = result['std_error'] * math.sqrt(trials)
+            needed = (2 * z * deviation / target_width) ** 2
+            batch = min(batch, max(int(needed * 1.1) - trials, ANYTIME_FIRST_BATCH))
+
+    return _with_interval(_summarize(wins, ties, share_sum, share_sq_sum, trials), z, confidence,
+                          start, stop_reason)
+
+
+def next_card_equities(hole, board, deck, num_opponents, iterations=10000, seed=None,
+                       exact_threshold=EXACT_THRESHOLD, workers=None):
+    """Return {card id: equity result} for every turn or river card that can come next.
+
+    Cards that map onto each other under a suit permutation fixing the hole
+    cards, board and deck have the same equity and are only calculated once.
+    """
+    if len(board) not in (3, 4):
+        raise ValueError("Next-card equities need a flop or a turn on the board.")
+    _validate(hole, board, deck, num_opponents)
+    deck = sorted(deck)
+    group = _suit_stabilizer([set(hole), set(board), set(deck)])
+    results = {}
+    for card in deck:
+        if card in results:
+            continue
+        rest = [c for c in deck if c != card]
+        result = equity(hole, board + [card], rest, num_opponents, iterations, seed,
+                        exact_threshold, workers)
+        for perm in group:
+            results[_permute(card, perm)] = dict(result)
+    return results
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Table-driven hand evaluator working on integer card ids.
+
+Cards are numbered 0-51 as ``rank_index * 4 + suit_index`` where ranks run
+'2'..'A' and suits follow ``Card.SUITS`` order (h, d, c, s). Every card maps
+to an additive key, so the key of a hand is simply the sum of its card keys:
+
+    bits  0-31   sum of 5**rank  (unique for any rank multiset of <= 7 cards)
+    bits 32-47   one 4-bit card counter per suit
+    bits 48-111  one 13-bit rank mask per suit
+
+The rank part indexes a precomputed table of non-flush hands and, when one
+suit counter reaches five, the rank mask of that suit indexes the flush table.
+The result is a strength in 1..7462 where a higher number is a better hand.
+"""
+
+import itertools
+
+RANK_CHARS = '23456789TJQKA'
+SUIT_CHARS = 'hdcs'
+
+HAND_TYPES = ['high_card', 'pair', 'two_pair', 'three_of_a_kind', 'straight',
+              'flush', 'full_house', 'four_of_a_kind', 'straight_flush']
+
+NUM_STRENGTHS = 7462
+
+_RANK_MASK = (1 << 32) - 1
+_SUIT_SHIFT = 32
+_FLUSH_SHIFT = 48
+_FLUSH_BIAS = 0x3333
+_FLUSH_BITS = 0x8888
+
+# Straights from ace-high down to the wheel, as (rank mask, top rank index)
+_STRAIGHTS = [(0x1F << low, low + 4) for low in range(8, -1, -1)] + [(0x100F, 3)]
+
+
+def card_id(card):
+    """Return the integer id of a card given as a Card, a string like 'Ah' or an id."""
+    if isinstance(card, int):
+        if not 0 <= card < 52:
+            raise ValueError(f"Invalid card id: {card}. Card ids run from 0 to 51.")
+        return card
+    cid = getattr(card, 'id', None)  # poker_assistant.Card
+    if cid is not None:
+        return cid
+    if isinstance(card, str):
+        if len(card) != 2:
+            raise ValueError(f"Invalid card format: {card}. Use format like 'Ah' for Ace of hearts.")
+        rank, suit = card[0].upper(), card[1].lower()
+    else:
+        rank, suit = card.rank, card.suit
+    if rank not in RANK_CHARS:
+        raise ValueError(f"Invalid rank: {rank}. Valid ranks are: {', '.join(RANK_CHARS)}")
+    if suit not in SUIT_CHARS:
+        raise ValueError(f"Invalid suit: {suit}. Valid suits are: {', '.join(SUIT_CHARS)}")
+    return RANK_CHARS.index(rank) * 4 + SUIT_CHARS.index(suit)
+
+
+def card_ids(cards):
+    """Convert a list of cards to a list of integer ids."""
+    return [card_id(card) for card in cards]
+
+
+def card_str(cid):
+    """Return the 'Ah' style string for a card id."""
+    return RANK_CHARS[cid >> 2] + SUIT_CHARS[cid & 3]
+
+
+def _card_key(cid):
+    rank, suit = cid >> 2, cid & 3
+    return (5 ** rank
+            | 1 << (_SUIT_SHIFT + 4 * suit)
+            | 1 << (_FLUSH_SHIFT + 16 * suit + rank))
+
+
+CARD_KEYS = [_card_key(cid) for cid in range(52)]
+
+
+def _straight_top(mask):
+    """Return the top rank index of the best straight in a rank mask, or -1."""
+    for straight, top in _STRAIGHTS:
+        if mask & straight == straight:
+            return top
+    return -1
+
+
+def _best_flush_value(mask):
+    """Return the value tuple of the best hand among suited cards with this rank mask."""
+    top = _straight_top(mask)
+    if top >= 0:
+        return (8, top)
+    ranks = [r for r in range(12, -1, -1) if mask >> r & 1]
+    return (5,) + tuple(ranks[:5])
+
+
+def _best_value(counts):
+    """Return the value tuple of the best non-flush hand for a list of 13 rank counts."""
+    present = [r for r in range(12, -1, -1) if counts[r]]
+    quads = [r for r in present if counts[r] == 4]
+    trips = [r for r in present if counts[r] == 3]
+    pairs = [r for r in present if counts[r] == 2]
+
+    if quads:
+        kicker = next(r for r in present if r != quads[0])
+        return (7, quads[0], kicker)
+    if trips and (len(trips) > 1 or pairs):
+        return (6, trips[0], max(trips[1:] + pairs))
+
+    mask = 0
+    for r in present:
+        mask |= 1 << r
+    top = _straight_top(mask)
+    if top >= 0:
+        return (4, top)
+
+    if trips:
+        kickers = [r for r in present if r != trips[0]][:2]
+        return (3, trips[0]) + tuple(kickers)
+    if len(pairs) >= 2:
+        kicker = next(r for r in present if r not in pairs[:2])
+        return (2, pairs[0], pairs[1], kicker)
+    if pairs:
+        kickers = [r for r in present if r != pairs[0]][:3]
+        return (1, pairs[0]) + tuple(kickers)
+    return (0,) + tuple(present[:5])
+
+
+def _build_tables():
+    """Build the non-flush rank table, the flush table and the category boundaries."""
+    multisets = []
+    for n in (5, 6, 7):
+        for combo in itertools.combinations_with_replacement(range(13), n):
+            counts = [0] * 13
+            for r in combo:
+                counts[r] += 1
+            if max(counts) <= 4:
+                multisets.append(counts)
+
+    flush_masks = [mask for mask in range(1 << 13) if 5 <= bin(mask).count('1') <= 7]
+
+    # Every distinct 5-card value, ordered weakest to strongest
+    values = set()
+    for counts in multisets:
+        if sum(counts) == 5:
+            values.add(_best_value(counts))
+    for mask in flush_masks:
+        if bin(mask).count('1') == 5:
+            values.add(_best_flush_value(mask))
+    ordered = sorted(values)
+    strength_of = {value: i + 1 for i, value in enumerate(ordered)}
+
+    rank_table = {}
+    for counts in multisets:
+        key = sum(c * 5 ** r for r, c in enumerate(counts))
+        rank_table[key] = strength_of[_best_value(counts)]
+
+    flush_table = [0] * (1 << 13)
+    for mask in flush_masks:
+        flush_table[mask] = strength_of[_best_flush_value(mask)]
+
+    # Lowest strength of each category, indexed by category
+    category_floor = [0] * len(HAND_TYPES)
+    for value in reversed(ordered):
+        category_floor[value[0]] = strength_of[value]
+
+    return rank_table, flush_table, category_floor
+
+
+RANK_TABLE, FLUSH_TABLE, CATEGORY_FLOOR = _build_tables()
+
+
+def strength_from_key(key):
+    """Return the strength of a hand from the sum of its card keys."""
+    flush = ((key >> _SUIT_SHIFT) + _FLUSH_BIAS) & _FLUSH_BITS
+    if flush:
+        suit = flush.bit_length() // 4 - 1
+        return FLUSH_TABLE[(key >> (_FLUSH_SHIFT + 16 * suit)) & 0x1FFF]
+    return RANK_TABLE[key & _RANK_MASK]
+
+
+def hand_key(ids):
+    """Return the additive key of a list of card ids."""
+    key = 0
+    for cid in ids:
+        key += CARD_KEYS[cid]
+    return key
+
+
+def evaluate(ids):
+    """Return the strength (1-7462, higher is better) of a 5, 6 or 7 card hand of ids."""
+    if not 5 <= len(ids) <= 7:
+        raise ValueError("Need 5 to 7 cards to evaluate a poker hand.")
+    return strength_from_key(hand_key(ids))
+
+
+def strength_category(strength):
+    """Return the category (0 = high card ... 8 = straight flush) of a strength."""
+    category = len(CATEGORY_FLOOR) - 1
+    while strength < CATEGORY_FLOOR[category]:
+        category -= 1
+    return category
+
+
+def strength_type(strength):
+    """Return the hand type name of a strength, e.g. 'full_house'."""
+    return HAND_TYPES[strength_category(strength)]
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Equity atlas of every starting hand on the 1,755 strategically distinct flops.
+
+Flops that only differ by a relabelling of suits play the same, which leaves
+1,755 of the 22,100 possible flops. For each of them the atlas stores the
+exact heads-up win and tie chances of all 1326 hole card combos against a
+random hand, with the cards written in the flop's canonical suits. A lookup
+canonicalizes the flop, applies the same suit relabelling to the hole cards
+and reads one entry.
+
+The atlas is built by running this module:
+
+    python poker_flops.py --workers 8
+
+The file holds a header, one completion flag per flop, the canonical flops
+(three card ids each, so lookups don't have to enumerate them) and two little-endian
+uint16 values (win and tie, scaled to 0-65534; 65535 marks combos that
+clash with the flop) per flop and combo. Flops are computed in parallel on
+the shared process pool and written as they finish, so an interrupted build
+picks up where it stopped when run again.
+"""
+
+import argparse
+import itertools
+import math
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import as_completed
+
+import poker_equity
+from poker_evaluator import card_ids
+
+NUM_FLOPS = 1755
+NUM_COMBOS = 1326
+ATLAS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flop_atlas.bin')
+
+_MAGIC = b'FLAT'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHH')  # magic, version, flops, combos
+_FLAGS_OFFSET = _HEADER.size
+_FLOPS_OFFSET = _FLAGS_OFFSET + NUM_FLOPS
+_DATA_OFFSET = 8192  # header, flags and flops, padded
+_ROW_SIZE = NUM_COMBOS * 2 * 2
+_SCALE = 65534
+_BLOCKED = 65535
+
+# Runouts enumerated per heads-up flop spot
+FLOP_RUNOUTS = math.comb(47, 2) * math.comb(45, 2)
+
+_PERMUTATIONS = list(itertools.permutations(range(4)))
+
+_flops = None
+_flop_index = None
+_atlas = None
+
+
+def _permute(cid, perm):
+    return (cid & ~3) | perm[cid & 3]
+
+
+def _canonical(cards):
+    """Return (canonical sorted tuple, suit permutation mapping cards onto it)."""
+    best = best_perm = None
+    for perm in _PERMUTATIONS:
+        image = tuple(sorted(_permute(c, perm) for c in cards))
+        if best is None or image < best:
+            best, best_perm = image, perm
+    return best, best_perm
+
+
+def _set_flops(flops):
+    global _flops, _flop_index
+    _flops = flops
+    _flop_index = {flop: index for index, flop in enumerate(flops)}
+
+
+def canonical_flops():
+    """Return the sorted list of the 1,755 canonical flops as tuples of card ids."""
+    if _flops is None:
+        atlas = load_atlas()
+        if atlas is not None:
+            data = atlas[_FLOPS_OFFSET:_FLOPS_OFFSET + 3 * NUM_FLOPS]
+            _set_flops([tuple(data[i:i + 3]) for i in range(0, len(data), 3)])
+        else:
+            _set_flops(sorted({_canonical(flop)[0] for flop in itertools.combinations(range(52), 3)}))
+    return _flops
+
+
+def canonical_flop(flop):
+    """Return (flop index, suit permutation) of a flop given as Cards, strings or ids."""
+    flop = card_ids(flop)
+    if len(flop) != 3 or len(set(flop)) != 3:
+        raise ValueError("A flop has 3 different cards.")
+    canonical_flops()
+    canonical, perm = _canonical(flop)
+    return _flop_index[canonical], perm
+
+
+def compute_flop(index):
+    """Return the (win, tie) scaled uint16 lists of every combo on one canonical flop."""
+    import numpy as np
+    import poker_ranges
+
+    flop = list(canonical_flops()[index])
+    weights = poker_ranges.remove_blockers(np.ones(NUM_COMBOS), flop)
+    boards, _ = poker_ranges._boards(flop, [], 0, None)
+    wins, ties, total = poker_ranges.showdown(weights, weights, boards)
+    live = total > 0
+    safe_total = np.where(live, total, 1)
+    win = np.where(live, np.rint(wins / safe_total * _SCALE), _BLOCKED).astype(np.uint16)
+    tie = np.where(live, np.rint(ties / safe_total * _SCALE), _BLOCKED).astype(np.uint16)
+    return index, win.tolist(), tie.tolist()
+
+
+def _create(path):
+    flops = canonical_flops()
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, NUM_FLOPS, NUM_COMBOS))
+        f.write(bytes(NUM_FLOPS))
+        f.write(bytes(c for flop in flops for c in flop))
+        f.truncate(_DATA_OFFSET + NUM_FLOPS * _ROW_SIZE)
+
+
+def _open(path, access):
+    """Memory-map an atlas file and check its header."""
+    with open(path, 'r+b' if access == mmap.ACCESS_WRITE else 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=access)
+    magic, version, flops, combos = _HEADER.unpack_from(mapped)
+    if (magic != _MAGIC or version != _VERSION or flops != NUM_FLOPS or combos != NUM_COMBOS
+            or len(mapped) != _DATA_OFFSET + NUM_FLOPS * _ROW_SIZE):
+        raise ValueError(f"Flop atlas {path} has an unsupported format.")
+    return mapped
+
+
+def build_atlas(path=ATLAS_FILE, workers=None, limit=None, progress=None):
+    """Compute the flops missing from the atlas file, creating it if needed.
+
+    Stops after ``limit`` flops when given. Returns the number of flops
+    computed by this call.
+    """
+    if not os.path.exists(path):
+        _create(path)
+    mapped = _open(path, mmap.ACCESS_WRITE)
+    pending = [i for i in range(NUM_FLOPS) if not mapped[_FLAGS_OFFSET + i]]
+    if limit is not None:
+        pending = pending[:limit]
+
+    if workers == 1:
+        results = map(compute_flop, pending)
+    else:
+        pool = poker_equity.get_pool(workers)
+        results = (future.result() for future in
+                   as_completed([pool.submit(compute_flop, i) for i in pending]))
+    done = 0
+    try:
+        for index, win, tie in results:
+            offset = _DATA_OFFSET + index * _ROW_SIZE
+            mapped[offset:offset + _ROW_SIZE] = struct.pack(f'<{2 * NUM_COMBOS}H', *win, *tie)
+            mapped.flush()
+            mapped[_FLAGS_OFFSET + index] = 1
+            done += 1
+            if progress:
+                progress(done, len(pending))
+    finally:
+        mapped.flush()
+        mapped.close()
+        unload_atlas()
+    return done
+
+
+def load_atlas(path=ATLAS_FILE):
+    """Memory-map the atlas file read-only, or return None when it doesn't exist."""
+    global _atlas
+    if _atlas is None and os.path.exists(path):
+        _atlas = _open(path, mmap.ACCESS_READ)
+    return _atlas
+
+
+def unload_atlas():
+    """Drop the mapped atlas so the next lookup reloads it from disk."""
+    global _atlas
+    _atlas = None
+
+
+def flop_result(hole, flop):
+    """Return the exact heads-up equity dict of hole cards on a flop, or None if not in the atlas.
+
+    The dict has the keys of poker_equity.equity results.
+    """
+    atlas = load_atlas()
+    if atlas is None:
+        return None
+    index, perm = canonical_flop(flop)
+    if not atlas[_FLAGS_OFFSET + index]:
+        return None
+    a, b = sorted(_permute(c, perm) for c in card_ids(hole))
+    if a == b or a in canonical_flops()[index] or b in canonical_flops()[index]:
+        raise ValueError("Cards must not repeat.")
+    combo = a * 51 - a * (a + 1) // 2 + b - 1  # index in poker_vectorized.COMBOS
+    offset = _DATA_OFFSET + index * _ROW_SIZE + combo * 2
+    win, = struct.unpack_from('<H', atlas, offset)
+    tie, = struct.unpack_from('<H', atlas, offset + NUM_COMBOS * 2)
+    win, tie = win / _SCALE, tie / _SCALE
+    return {'win': win, 'tie': tie, 'loss': 1.0 - win - tie, 'equity': win + tie / 2,
+            'std_error': 0.0, 'trials': FLOP_RUNOUTS, 'exact': True}
+
+
+def flop_equity(hole, flop):
+    """Return the heads-up equity of hole cards on a flop from the atlas, or None."""
+    result = flop_result(hole, flop)
+    return None if result is None else result['equity']
+
+
+def class_flop_equity(hand_class, flop):
+    """Return the mean equity of a 169-class's combos that don't clash with a flop, or None."""
+    import poker_preflop
+
+    flop = card_ids(flop)
+    ranks = divmod(hand_class, 13)
+    cards = [c for c in range(52) if c >> 2 in ranks and c not in flop]
+    equities = []
+    for a, b in itertools.combinations(cards, 2):
+        if poker_preflop.hand_class(a, b) != hand_class:
+            continue
+        equity = flop_equity([a, b], flop)
+        if equity is None:
+            return None
+        equities.append(equity)
+    if not equities:
+        raise ValueError(f"Every {poker_preflop.class_name(hand_class)} combo clashes with the flop.")
+    return sum(equities) / len(equities)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the canonical flop equity atlas.")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--limit', type=int, default=None, help="compute at most this many flops")
+    parser.add_argument('--output', default=ATLAS_FILE)
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        if done % 50 == 0 or done == total:
+            print(f"{done}/{total} flops", file=sys.stderr)
+
+    done = build_atlas(args.output, args.workers, args.limit, progress)
+    print(f"Computed {done} flops into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
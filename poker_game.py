@@ -1,7 +1,29 @@
 #!/usr/bin/env python3
 
+import argparse
+import json
+import sys
+
+import poker_cache
+import poker_equity
+import poker_evaluator
+import poker_flops
+import poker_icm
+import poker_metrics
+import poker_outs
+import poker_preflop
 from poker_assistant import Card, Deck, HandEvaluator, PokerSimulator
 
+# Time budget and target confidence interval width of postflop equities in batch mode
+BATCH_DEADLINE_MS = 50
+BATCH_TARGET_WIDTH = 0.01
+
+# Suit-independent analyses kept by a SpotAnalyzer before it starts over
+SPOT_CACHE_SIZE = 100000
+
+# Effective stack in big blinds at or below which blind-vs-blind spots use push/fold charts
+PUSH_FOLD_MAX_BB = 15
+
 def get_valid_card_input(prompt):
     """Get valid card input from the user."""
     while True:
@@ -90,52 +112,61 @@ def get_position_name(total_players, player_position):
         return positions.get(player_position, "unknown")
     return "unknown"
 
-def get_betting_recommendation(hand_type, hand_strength, pot_odds, position, is_blind=False):
-    """Get betting recommendation based on hand strength and other factors."""
+@poker_metrics.timed('recommendation')
+def get_betting_recommendation(hand_type, hand_strength, pot_odds, position, is_blind=False, equity=None):
+    """Get betting recommendation based on hand strength and other factors.
+    
+    ``hand_strength`` is the preflop percentile of the hand (the share of
+    starting hands it out-performs), so a threshold picks the top share of
+    hands: 0.95 is about the top 5%, 0.8 the top 20% and 0.47 about half.
+    ``equity`` is the hand's all-in equity against the opponents
+    (poker_preflop.class_equity); marginal blind hands fold when the pot
+    odds ask for more. Without it the pot odds aren't weighed.
+    """
     if position == "small_blind":
-        if hand_strength >= 0.8:  # Very strong hand
+        if hand_strength >= 0.95:  # Very strong hand
             return "Raise", "You have a very strong hand in the small blind. Consider raising 4-5x the big blind."
-        elif hand_strength >= 0.6:  # Strong hand
+        elif hand_strength >= 0.79:  # Strong hand
             return "Call/Raise", "You have a strong hand. Consider completing the blind or raising 3x the big blind."
-        elif hand_strength >= 0.4:  # Medium hand
-            if pot_odds > hand_strength:
+        elif hand_strength >= 0.47:  # Medium hand
+            if equity is not None and pot_odds > equity:
                 return "Fold", "Your hand is marginal and the pot odds aren't favorable. Consider folding to a raise."
             return "Call", "Your hand has potential. Consider completing the blind if no raises."
         else:  # Weak hand
             return "Fold", "Your hand is weak. It's best to fold unless you can see a free flop."
     
     elif position == "big_blind":
-        if hand_strength >= 0.8:  # Very strong hand
+        if hand_strength >= 0.95:  # Very strong hand
             return "Raise", "You have a very strong hand in the big blind. Consider raising 3-4x if there's action."
-        elif hand_strength >= 0.6:  # Strong hand
+        elif hand_strength >= 0.79:  # Strong hand
             return "Call/Raise", "You have a strong hand. Consider raising if there's one limper, call if raised."
-        elif hand_strength >= 0.4:  # Medium hand
-            if pot_odds > hand_strength:
+        elif hand_strength >= 0.47:  # Medium hand
+            if equity is not None and pot_odds > equity:
                 return "Check/Fold", "Your hand is marginal. Check if no raise, fold to significant action."
             return "Check/Call", "Your hand has potential. Check if possible, call small raises."
         else:  # Weak hand
             return "Check/Fold", "Your hand is weak. Check if possible, fold to any raise."
     
-    elif position == "under_the_gun":
-        if hand_strength >= 0.8:  # Very strong hand
+    elif position == "under_the_gun" or position.startswith("under_the_gun_plus"):
+        if hand_strength >= 0.95:  # Very strong hand
             return "Raise", "You have a very strong hand in early position. Open with 3x the big blind."
-        elif hand_strength >= 0.65:  # Strong hand
+        elif hand_strength >= 0.8:  # Strong hand
             return "Raise", "You have a strong hand. Consider opening with 2.5x the big blind."
         else:  # Medium or weak hand
             return "Fold", "Your hand isn't strong enough to open from under the gun."
     
-    elif position in ["middle_position", "cutoff"]:
-        if hand_strength >= 0.8:  # Very strong hand
+    elif position in ["middle_position", "middle_position_1", "hijack", "cutoff"]:
+        if hand_strength >= 0.95:  # Very strong hand
             return "Raise", "You have a very strong hand. Open with 2.5-3x the big blind."
-        elif hand_strength >= 0.5:  # Strong to medium hand
+        elif hand_strength >= 0.68:  # Strong to medium hand
             return "Raise", "You have a playable hand in middle/cutoff. Consider raising 2.5x the big blind."
         else:  # Weak hand
             return "Fold", "Your hand is too weak for this position. Wait for a better spot."
     
     elif position == "button":
-        if hand_strength >= 0.8:  # Very strong hand
+        if hand_strength >= 0.95:  # Very strong hand
             return "Raise", "You have a very strong hand on the button. Raise 2.5-3x the big blind."
-        elif hand_strength >= 0.4:  # Medium to strong hand
+        elif hand_strength >= 0.47:  # Medium to strong hand
             return "Raise", "You have a playable hand on the button. Consider stealing with 2-2.5x the big blind."
         else:  # Weak hand
             if pot_odds < 0.2:  # If it's cheap to see a flop
@@ -143,14 +174,324 @@ def get_betting_recommendation(hand_type, hand_strength, pot_odds, position, is_
             return "Fold", "Your hand is weak. It's best to wait for a better opportunity."
     
     else:  # Unknown position
-        if hand_strength >= 0.8:
+        if hand_strength >= 0.95:
             return "Raise", "You have a very strong hand. Consider raising 3x the big blind."
-        elif hand_strength >= 0.6:
+        elif hand_strength >= 0.79:
             return "Call", "You have a strong hand. Consider calling or raising if there's minimal action."
         else:
             return "Fold", "Your hand isn't strong enough to play out of position."
 
-def main():
+@poker_metrics.timed('recommendation')
+def get_postflop_recommendation(ehs, ppot, pot_odds):
+    """Get a flop, turn or river recommendation from effective hand strength and positive potential."""
+    if ehs >= 0.85:
+        return "Raise", "You very likely have the best hand. Bet or raise for value."
+    elif ehs >= 0.6:
+        return "Bet/Call", "You are probably ahead. Bet, or call a reasonable bet."
+    elif pot_odds > 0 and ppot >= pot_odds:
+        return "Call", f"Your hand is probably not best yet, but it improves to the best hand {ppot:.0%} of the time, enough for the price."
+    elif ehs >= 0.4 and pot_odds == 0:
+        return "Check", "Your hand is marginal. Check and see the next card for free."
+    else:
+        return "Check/Fold", "Your hand is unlikely to win. Check if possible, fold to a bet."
+
+def get_icm_adjustment(stacks, payouts, player_position, opponent_bets, pot_size):
+    """Work out the tournament risk premium of getting all in, by ICM.
+    
+    ``stacks`` are the chips behind of every seat (seat 1 first) and
+    ``opponent_bets`` the bets of the other seats in the order poker_game
+    asks for them, starting after the player. The opponent considered is the
+    biggest bettor, or the biggest other stack when nobody has bet. Returns
+    the poker_icm.required_equity dict with that opponent's 'villain_seat'.
+    """
+    total_players = len(stacks)
+    bets = [0.0] * total_players
+    for i, bet in enumerate(opponent_bets, 1):
+        bets[(player_position - 1 + i) % total_players] = bet
+    hero = player_position - 1
+    others = [s for s in range(total_players) if s != hero and stacks[s] + bets[s] > 0]
+    if not others:
+        raise ValueError("Need an opponent with chips for ICM.")
+    villain = max(others, key=lambda s: (bets[s], stacks[s] + bets[s]))
+    # The villain's bet is part of what they risk; the rest is dead money
+    chips = list(stacks)
+    chips[villain] += bets[villain]
+    dead = pot_size + sum(bets) - bets[villain]
+    icm = poker_icm.required_equity(chips, payouts, hero, villain, dead)
+    icm['villain_seat'] = villain + 1
+    return icm
+
+def get_narrowed_potential(hole, board, opponent_bets, pot_size, num_opponents=None, positions=None,
+                           simulator=None):
+    """Work out the hand potential of a flop or turn against opponent ranges narrowed by their bets.
+    
+    ``opponent_bets`` are the bets of the other seats in the order poker_game
+    asks for them, into a pot of ``pot_size`` before them, and ``positions``
+    their position names when known. ``num_opponents`` defaults to one per
+    bet. Reuses ``simulator`` when given, resetting its game. See
+    poker_potential.hand_potential for the returned dict.
+    """
+    if simulator is None:
+        simulator = PokerSimulator()
+    simulator.reset_game()
+    simulator.num_opponents = len(opponent_bets) if num_opponents is None else num_opponents
+    simulator.pot_size = pot_size
+    simulator.set_hole_cards([Card.from_id(c) for c in poker_evaluator.card_ids(hole)])
+    simulator.set_community_cards([Card.from_id(c) for c in poker_evaluator.card_ids(board)])
+    for i, bet in enumerate(opponent_bets):
+        simulator.record_opponent_bet(bet, positions[i] if positions else None)
+    return simulator.calculate_hand_potential()
+
+def get_pushfold_spot(total_players, player_position, opponent_bets, stack, big_blind, stacks=None):
+    """Return (effective stack in big blinds, facing a push) for a short-stacked blind-vs-blind spot, or None.
+
+    Only blind-vs-blind spots qualify, where every seat but the two blinds
+    bet nothing. The small blind decides to push or fold when the big blind
+    has no more than the big blind in; the big blind decides to call or fold
+    when the small blind is all in: its bet leaves it nothing behind in
+    ``stacks`` (the chips behind of every seat, as in get_icm_adjustment) or
+    covers ``stack``. A smaller raise isn't a push. Known ``stacks`` cap the
+    effective stack at the other blind's. Other spots and stacks outside 1
+    to PUSH_FOLD_MAX_BB big blinds get None.
+    """
+    if big_blind <= 0 or player_position not in (1, 2):
+        return None
+    bets = [0.0] * total_players
+    for i, bet in enumerate(opponent_bets, 1):
+        bets[(player_position - 1 + i) % total_players] = bet
+    if any(bets[2:]):
+        return None
+    villain = 1 if player_position == 1 else 0
+    if player_position == 1:
+        if bets[villain] > big_blind:
+            return None
+        facing_push = False
+    else:
+        all_in = bets[villain] >= stack or (stacks is not None and stacks[villain] <= 0)
+        if bets[villain] <= big_blind or not all_in:
+            return None
+        facing_push = True
+    effective = stack
+    if stacks is not None:
+        effective = min(effective, stacks[villain] + bets[villain])
+    if facing_push:
+        effective = min(effective, bets[villain])
+    stack_bb = effective / big_blind
+    if not 1 <= stack_bb <= PUSH_FOLD_MAX_BB:
+        return None
+    return stack_bb, facing_push
+
+@poker_metrics.timed('recommendation')
+def get_pushfold_recommendation(hole, stack_bb, facing_push=False):
+    """Get a push/fold (or call/fold facing a push) recommendation from the heads-up equilibrium."""
+    import poker_pushfold  # needs numpy
+    hand = poker_preflop.hand_class(*poker_evaluator.card_ids(hole))
+    name = poker_preflop.class_name(hand)
+    solution = poker_pushfold.solve(stack_bb)
+    if facing_push:
+        frequency = solution['call'][hand]
+        if frequency >= 0.5:
+            return "Call", f"At {stack_bb:.1f} big blinds the equilibrium calls a shove with {name} {frequency:.0%} of the time."
+        return "Fold", f"At {stack_bb:.1f} big blinds the equilibrium folds {name} to a shove {1 - frequency:.0%} of the time."
+    frequency = solution['push'][hand]
+    if frequency >= 0.5:
+        return "Push", f"At {stack_bb:.1f} big blinds the equilibrium goes all in with {name} {frequency:.0%} of the time."
+    return "Fold", f"At {stack_bb:.1f} big blinds the equilibrium folds {name} {1 - frequency:.0%} of the time instead of going all in."
+
+class SpotAnalyzer:
+    """Analyze situations given as dicts, keeping the simulator and lookup tables warm.
+    
+    A spot has 'players' (3-9), 'position' (seat 1 to players, 1=small
+    blind), 'hole' and 'board' cards ('AhKh', 'Ah Kh' or a list), 'pot',
+    'stack' and 'opponent_bets'; with 'stacks' of every seat and tournament
+    'payouts' the pot odds include the ICM risk premium, and with a
+    'big_blind' short-stacked blind-vs-blind spots preflop follow the
+    heads-up push/fold equilibrium. Analyses only
+    depend on the cards up to a relabelling of suits, the number of players
+    and the position, so they are cached on that; pot odds, ICM, outs and the
+    hand potential against ranges narrowed by the opponent bets are worked
+    out per spot.
+    """
+    def __init__(self, deadline_ms=BATCH_DEADLINE_MS, target_width=BATCH_TARGET_WIDTH, disk_cache=None):
+        self.simulator = PokerSimulator()
+        self.deadline_ms = deadline_ms
+        self.target_width = target_width
+        self.disk_cache = disk_cache  # optional poker_cache.DiskCache kept across runs
+        self._cache = {}
+    
+    def warm_up(self):
+        """Load the preflop table, its percentiles and the flop atlas ahead of the first spot."""
+        for opponents in range(1, poker_preflop.MAX_OPPONENTS + 1):
+            poker_preflop.class_percentile(0, opponents)
+        if poker_flops.load_atlas() is not None:
+            poker_flops.canonical_flops()
+    
+    @staticmethod
+    def _cards(value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = value.replace(' ', '').replace(',', '')
+            value = [value[i:i + 2] for i in range(0, len(value), 2)]
+        return poker_evaluator.card_ids(value)
+    
+    def _analysis(self, hole, board, players, position):
+        simulator = self.simulator
+        simulator.reset_game()
+        simulator.position = position
+        simulator.num_opponents = players - 1
+        simulator.set_hole_cards([Card.from_id(c) for c in hole])
+        if not board:
+            hand_type, strength = simulator.calculate_preflop_strength()
+            return {'stage': 'preflop', 'hand_type': hand_type, 'hand_strength': strength}
+        
+        simulator.set_community_cards([Card.from_id(c) for c in board])
+        equity = simulator.calculate_equity_within(self.deadline_ms, self.target_width)
+        potential = simulator.calculate_hand_potential() if len(board) < 5 else None
+        return {'stage': simulator.stage, 'hand_type': simulator.current_hand_type(),
+                'hand_strength': equity['equity'] ** (1.0 / simulator.num_opponents),
+                'equity': equity, 'potential': potential}
+    
+    def analyze(self, spot):
+        """Return the recommendation and hand analysis of one spot as a dict."""
+        if not isinstance(spot, dict):
+            raise ValueError("Expected a JSON object.")
+        if 'players' not in spot or 'position' not in spot:
+            raise ValueError("A spot needs 'players' and 'position'.")
+        players, seat = int(spot['players']), int(spot['position'])
+        if not 3 <= players <= 9:
+            raise ValueError("Total number of players must be between 3 and 9.")
+        if not 1 <= seat <= players:
+            raise ValueError(f"Position must be between 1 and {players}.")
+        hole, board = self._cards(spot.get('hole')), self._cards(spot.get('board'))
+        if len(hole) != 2:
+            raise ValueError("Need exactly 2 hole cards.")
+        if len(board) not in (0, 3, 4, 5):
+            raise ValueError("The board must have 0, 3, 4 or 5 cards.")
+        if len(set(hole + board)) != len(hole) + len(board):
+            raise ValueError("Cards must not repeat.")
+        pot = float(spot.get('pot', 0))
+        stack = float(spot.get('stack', 0))
+        opponent_bets = [float(bet) for bet in spot.get('opponent_bets', [])]
+        if pot < 0 or stack < 0 or any(bet < 0 for bet in opponent_bets):
+            raise ValueError("Pot, stack and bets must not be negative.")
+        
+        position = get_position_name(players, seat)
+        key = (poker_equity.canonical_situation(hole, board), players, position)
+        analysis = self._cache.get(key)
+        poker_metrics.cache_lookup('spot', analysis is not None)
+        if analysis is None:
+            if len(self._cache) >= SPOT_CACHE_SIZE:
+                self._cache.clear()
+            # float() so that 50 and 50.0 from --deadline-ms share a key
+            disk_key = ('spot',) + key + (float(self.deadline_ms), float(self.target_width))
+            if self.disk_cache is not None:
+                analysis = self.disk_cache.get(disk_key)
+            if analysis is None:
+                analysis = self._analysis(hole, board, players, position)
+                if self.disk_cache is not None:
+                    self.disk_cache.put(disk_key, analysis)
+            self._cache[key] = analysis
+        
+        total_bets = sum(opponent_bets)
+        pot_odds = total_bets / (pot + total_bets) if total_bets > 0 else 0
+        potential = analysis.get('potential')
+        if potential is not None and opponent_bets:
+            # The bets narrow the opponents' ranges, so this spot's potential is its own
+            positions = [get_position_name(players, (seat + i - 1) % players + 1)
+                         for i in range(1, len(opponent_bets) + 1)]
+            potential = get_narrowed_potential(hole, board, opponent_bets, pot, players - 1, positions,
+                                               self.simulator)
+        stacks = None
+        if spot.get('stacks') is not None:
+            stacks = [float(s) for s in spot['stacks']]
+            if len(stacks) != players:
+                raise ValueError(f"Need {players} stacks, one per seat.")
+        icm = None
+        if stacks is not None and spot.get('payouts') is not None:
+            icm = get_icm_adjustment(stacks, [float(p) for p in spot['payouts']], seat, opponent_bets, pot)
+            # Chips lost hurt more than chips won help, so getting all in needs more equity
+            pot_odds = min(max(pot_odds + icm['risk_premium'], 0.0), 1.0)
+        pushfold = None
+        if analysis['stage'] == 'preflop' and spot.get('big_blind') is not None:
+            pushfold = get_pushfold_spot(players, seat, opponent_bets, stack, float(spot['big_blind']), stacks)
+        if pushfold is not None:
+            action, reason = get_pushfold_recommendation(hole, *pushfold)
+        elif analysis['stage'] == 'preflop':
+            is_blind = position in ["small_blind", "big_blind"]
+            equity = poker_preflop.preflop_equity(hole[0], hole[1], min(players - 1, poker_preflop.MAX_OPPONENTS))
+            action, reason = get_betting_recommendation(
+                analysis['hand_type'], analysis['hand_strength'], pot_odds, position, is_blind, equity)
+        elif potential:
+            action, reason = get_postflop_recommendation(potential['ehs'], potential['ppot'], pot_odds)
+        else:
+            action, reason = get_postflop_recommendation(analysis['hand_strength'], 0.0, pot_odds)
+        
+        result = {'position': position, 'pot_odds': pot_odds, 'action': action, 'reason': reason}
+        result.update(analysis)
+        if potential is not None:
+            result['potential'] = potential
+        if icm is not None:
+            result['icm'] = icm
+        if pushfold is not None:
+            result['push_fold'] = {'stack_bb': pushfold[0], 'facing_push': pushfold[1]}
+        if len(board) in (3, 4):
+            result['outs'] = poker_outs.outs(hole, board)
+        if 'id' in spot:
+            result['id'] = spot['id']
+        return result
+
+def run_batch(lines, output, analyzer, flush=False):
+    """Analyze JSON lines and write one JSON result line per input line.
+    
+    Blank lines are skipped. A line that can't be analyzed gets
+    {'line': n, 'error': message} instead. With flush the output is flushed
+    after every line, for a caller waiting on each answer. Returns the number
+    of spots analyzed.
+    """
+    done = 0
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            result = analyzer.analyze(json.loads(line))
+            done += 1
+        except (ValueError, KeyError, TypeError) as e:
+            result = {'line': number, 'error': str(e)}
+        output.write(json.dumps(result) + '\n')
+        if flush:
+            output.flush()
+    return done
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Texas Hold'em poker assistant.")
+    parser.add_argument('--batch', nargs='*', metavar='FILE',
+                        help="analyze JSON lines from the files (or stdin) and write JSON lines")
+    parser.add_argument('--worker', action='store_true',
+                        help="stay up reading JSON lines from stdin, answering each one at once")
+    parser.add_argument('--deadline-ms', type=float, default=BATCH_DEADLINE_MS,
+                        help="time budget of each postflop equity in batch mode")
+    parser.add_argument('--cache', metavar='PATH', nargs='?', const=poker_cache.CACHE_FILE,
+                        help="keep batch analyses in a sqlite file across runs")
+    args = parser.parse_args(argv)
+    
+    if args.batch is not None or args.worker:
+        disk_cache = poker_cache.DiskCache(args.cache) if args.cache else None
+        analyzer = SpotAnalyzer(args.deadline_ms, disk_cache=disk_cache)
+        analyzer.warm_up()
+        if args.worker:
+            run_batch(sys.stdin, sys.stdout, analyzer, flush=True)
+        elif not args.batch:
+            run_batch(sys.stdin, sys.stdout, analyzer)
+        else:
+            for path in args.batch:
+                if path == '-':
+                    run_batch(sys.stdin, sys.stdout, analyzer)
+                    continue
+                with open(path) as f:
+                    run_batch(f, sys.stdout, analyzer)
+        return
+    
     print("Welcome to Texas Hold'em Poker Assistant!")
     print("This program will help you make decisions during your poker game.")
     print("\nAt any point, enter 'q' to quit.")
@@ -200,22 +541,28 @@ def main():
         simulator.num_opponents = total_players - 1
         simulator.pot_size = get_valid_number_input("Current pot size: ", 0)
         simulator.player_stack = get_valid_number_input("Your stack size: ", 0)
+        big_blind = get_valid_number_input("Big blind size (0 to skip): ", 0)
         
         # Calculate preflop hand strength
         hand_type, hand_strength = simulator.calculate_preflop_strength()
         print(f"\nHand Analysis:")
         print(f"Hand Type: {hand_type}")
-        print(f"Hand Strength: {hand_strength:.2%}")
+        print(f"Hand Percentile: better than {hand_strength:.2%} of starting hands")
+        preflop_equity = simulator.calculate_preflop_equity()
+        print(f"Equity vs {simulator.num_opponents} random hand(s): {preflop_equity:.2%}")
         
         # Get opponent actions
         total_bets = 0
+        opponent_bets = []
         for i in range(1, total_players):
             relative_pos = (player_position + i) % total_players
             if relative_pos == 0:
                 relative_pos = total_players
-            pos_name = get_position_name(total_players, relative_pos).replace('_', ' ').title()
+            opponent_position = get_position_name(total_players, relative_pos)
+            pos_name = opponent_position.replace('_', ' ').title()
             bet = get_valid_number_input(f"{pos_name} bet amount (0 for check/fold): ", 0)
-            simulator.opponent_bets.append(bet)
+            simulator.record_opponent_bet(bet, opponent_position)
+            opponent_bets.append(bet)
             total_bets += bet
         
         # Calculate pot odds if there are bets
@@ -223,9 +570,15 @@ def main():
         if total_bets > 0:
             pot_odds = total_bets / (simulator.pot_size + total_bets)
         
-        # Get betting recommendation
-        is_blind = position in ["small_blind", "big_blind"]
-        action, reason = get_betting_recommendation(hand_type, hand_strength, pot_odds, position, is_blind)
+        # Get betting recommendation, from the push/fold charts when short-stacked in the blinds
+        pushfold = get_pushfold_spot(total_players, player_position, opponent_bets,
+                                     simulator.player_stack, big_blind)
+        if pushfold is not None:
+            action, reason = get_pushfold_recommendation([card1, card2], *pushfold)
+        else:
+            is_blind = position in ["small_blind", "big_blind"]
+            action, reason = get_betting_recommendation(hand_type, hand_strength, pot_odds, position, is_blind,
+                                                        preflop_equity)
         print(f"\nRecommended Action: {action}")
         print(f"Reason: {reason}")
         
@@ -252,6 +605,35 @@ def main():
             current_hand = simulator.evaluator.evaluate_hand(simulator.hole_cards + simulator.community_cards)
             print(f"\nYour current hand: {current_hand['type']}")
             print("Cards: " + " ".join(str(card) for card in current_hand['cards']))
+            
+            equity = simulator.calculate_equity()
+            print(f"Equity vs {simulator.num_opponents} opponent(s): {equity['equity']:.2%} "
+                  f"(win {equity['win']:.2%}, tie {equity['tie']:.2%})")
+            if any(simulator.opponent_bets):
+                narrowed = simulator.calculate_equity_vs_ranges()
+                print(f"Equity vs their likely hands given the bets: {narrowed['equity']:.2%}")
+            
+            potential = simulator.calculate_hand_potential()
+            print(f"Hand strength: {potential['hand_strength']:.2%}, "
+                  f"positive potential: {potential['ppot']:.2%}, "
+                  f"negative potential: {potential['npot']:.2%}")
+            print(f"Effective hand strength: {potential['ehs']:.2%}")
+            
+            outs = simulator.calculate_outs()
+            draw_names = [name.replace('_', ' ') for name, present in outs['draws'].items() if present]
+            print(f"Outs: {len(outs['outs'])} ({outs['clean_outs']} clean)"
+                  + (f" - {', '.join(draw_names)}" if draw_names else ""))
+            for out in outs['outs']:
+                print(f"  {out['card']}: {out['hand_type'].replace('_', ' ')}"
+                      + ("" if out['clean'] else " (may help opponents more)"))
+            print(f"Chance to improve on the turn: {outs['next_card']:.2%}, "
+                  f"by the river: {outs['by_river']:.2%}")
+            
+            bet = get_valid_number_input("Bet to call on the flop (0 if none): ", 0)
+            flop_pot_odds = bet / (simulator.pot_size + total_bets + bet) if bet > 0 else 0
+            action, reason = get_postflop_recommendation(potential['ehs'], potential['ppot'], flop_pot_odds)
+            print(f"\nRecommended Action: {action}")
+            print(f"Reason: {reason}")
         
         print("\nWould you like to play another hand? (y/n)")
         if input().lower() != 'y':
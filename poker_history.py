@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Streaming analysis of logged hand histories.
+
+Each line of a history file describes one hand from the logging player's
+point of view, either as JSON:
+
+    {"id": "h1", "players": 6, "seat": 3, "hole": "AhKh", "board": "2c7dTsJh3s", "net": 12.5}
+
+or as pipe-separated plain text with the same fields in the same order:
+
+    h1|6|3|AhKh|2c7dTsJh3s|12.5
+
+``seat`` is the position number used by poker_game (1 = small blind), the
+board may hold 0-5 cards and ``net`` is the amount won or lost. Blank lines
+and lines starting with '#' are ignored. Gzip-compressed files are detected
+and decompressed on the fly. Files are streamed line by line, so memory use does not depend on their
+size, and several files can be analyzed in parallel. Malformed lines,
+including ones that aren't valid UTF-8, are counted as skipped; corrupt
+compressed data counts as one skipped line and ends that file.
+
+Hands are evaluated in batches: classes and preflop equities with NumPy
+indexing, final hands with HandEvaluator.evaluate_batch.
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import zlib
+
+import numpy as np
+
+import poker_equity
+import poker_evaluator
+import poker_preflop
+from poker_assistant import HandEvaluator
+from poker_game import get_position_name
+
+# Hands evaluated per batch
+BATCH_SIZE = 1024
+
+_class_names = None
+_class_equities = None
+
+
+def _split_cards(value):
+    """Accept 'AhKh', 'Ah Kh' or ['Ah', 'Kh'] and return a list of card strings."""
+    if isinstance(value, str):
+        value = value.replace(' ', '').replace(',', '')
+        return [value[i:i + 2] for i in range(0, len(value), 2)]
+    return list(value)
+
+
+def parse_line(line):
+    """Parse one history line (text or UTF-8 bytes) into a hand dict, or return None for blank and comment lines."""
+    if isinstance(line, bytes):
+        line = line.decode('utf-8')
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        record = json.loads(line)
+        hand_id, players, seat = record.get('id'), record['players'], record['seat']
+        hole, board, net = record['hole'], record.get('board', ''), record.get('net', 0)
+    else:
+        fields = line.split('|')
+        if len(fields) != 6:
+            raise ValueError(f"Expected 6 fields, got {len(fields)}")
+        hand_id, players, seat, hole, board, net = fields
+
+    hole = poker_evaluator.card_ids(_split_cards(hole))
+    board = poker_evaluator.card_ids(_split_cards(board))
+    if len(hole) != 2:
+        raise ValueError("Need exactly 2 hole cards.")
+    if len(board) > 5:
+        raise ValueError("There can be at most 5 community cards.")
+    if len(set(hole + board)) != len(hole) + len(board):
+        raise ValueError("Cards must not repeat.")
+    players, seat = int(players), int(seat)
+    if not 2 <= players <= poker_preflop.MAX_OPPONENTS + 1 or not 1 <= seat <= players:
+        raise ValueError(f"Invalid players/seat: {players}/{seat}")
+    return {'id': hand_id, 'players': players, 'seat': seat,
+            'hole': hole, 'board': board, 'net': float(net)}
+
+
+def open_history(path):
+    """Open a history file for reading lines of bytes, through gzip if it is compressed.
+
+    Lines are decoded one at a time by parse_line, so a badly encoded line
+    only spoils itself.
+    """
+    if path == '-':
+        return sys.stdin.buffer
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    if compressed:
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_hands(lines, on_error=None):
+    """Yield parsed hands from an iterable of lines.
+
+    Malformed lines are skipped; if given, on_error is called with the line
+    number and the error message. Corrupt compressed data can't be read past,
+    so it is reported as an error on the line being read and ends the hands.
+    """
+    lines = iter(lines)
+    number = 0
+    while True:
+        number += 1
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        except (OSError, EOFError, zlib.error) as e:
+            if on_error is not None:
+                on_error(number, str(e))
+            return
+        try:
+            hand = parse_line(line)
+        except (ValueError, KeyError, TypeError) as e:
+            if on_error is not None:
+                on_error(number, str(e))
+            continue
+        if hand is not None:
+            yield hand
+
+
+def batched(hands, size=BATCH_SIZE):
+    """Group an iterable of hands into lists of at most size hands."""
+    batch = []
+    for hand in hands:
+        batch.append(hand)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _class_tables():
+    """Return the class names and the (opponents, class) preflop equity array, built once."""
+    global _class_names, _class_equities
+    if _class_names is None:
+        _class_names = [poker_preflop.class_name(i) for i in range(poker_preflop.NUM_CLASSES)]
+        _class_equities = np.array([[poker_preflop.class_equity(i, opponents)
+                                     for i in range(poker_preflop.NUM_CLASSES)]
+                                    for opponents in range(1, poker_preflop.MAX_OPPONENTS + 1)])
+    return _class_names, _class_equities
+
+
+def evaluate_batch(batch):
+    """Add hand class, preflop equity, position and final hand type to a batch of hands."""
+    if not batch:
+        return batch
+    names, equities = _class_tables()
+    # Hole and board cards padded to 7, with the board size of each hand
+    cards = np.array([hand['hole'] + hand['board'] + [0] * (5 - len(hand['board'])) for hand in batch],
+                     dtype=np.intp)
+    sizes = np.array([len(hand['board']) for hand in batch])
+    high, low = (cards[:, :2] >> 2).max(axis=1), (cards[:, :2] >> 2).min(axis=1)
+    suited = (cards[:, 0] & 3) == (cards[:, 1] & 3)
+    classes = np.where(suited, high * 13 + low, low * 13 + high)
+    players = np.array([hand['players'] for hand in batch], dtype=np.intp)
+    preflop = equities[players - 2, classes]
+
+    # One vectorized evaluation per board size
+    hand_types = [None] * len(batch)
+    for size in (3, 4, 5):
+        rows = np.flatnonzero(sizes == size)
+        if not rows.size:
+            continue
+        _, categories = HandEvaluator.evaluate_batch(cards[rows, :2 + size])
+        for i, category in zip(rows.tolist(), categories.tolist()):
+            hand_types[i] = poker_evaluator.HAND_TYPES[category]
+
+    positions = {}
+    for hand, index, equity, hand_type in zip(batch, classes.tolist(), preflop.tolist(), hand_types):
+        key = (hand['players'], hand['seat'])
+        if key not in positions:
+            positions[key] = get_position_name(*key)
+        hand['class'] = names[index]
+        hand['position'] = positions[key]
+        hand['preflop_equity'] = equity
+        hand['hand_type'] = hand_type
+    return batch
+
+
+class HistoryStats:
+    """Aggregate results per position, per starting-hand class and per final hand type."""
+    def __init__(self):
+        self.hands = 0
+        self.net = 0.0
+        self.skipped = 0
+        self.by_position = {}
+        self.by_class = {}
+        self.by_hand_type = {}
+
+    @staticmethod
+    def _bucket(table, key):
+        bucket = table.get(key)
+        if bucket is None:
+            bucket = table[key] = {'hands': 0, 'net': 0.0, 'won': 0, 'equity_sum': 0.0}
+        return bucket
+
+    def add(self, hand):
+        """Add one evaluated hand."""
+        self.hands += 1
+        self.net += hand['net']
+        for table, key in ((self.by_position, hand['position']),
+                           (self.by_class, hand['class']),
+                           (self.by_hand_type, hand['hand_type'] or 'no_flop')):
+            bucket = self._bucket(table, key)
+            bucket['hands'] += 1
+            bucket['net'] += hand['net']
+            bucket['won'] += hand['net'] > 0
+            bucket['equity_sum'] += hand['preflop_equity']
+
+    def merge(self, other):
+        """Add the totals of another HistoryStats to this one."""
+        self.hands += other.hands
+        self.net += other.net
+        self.skipped += other.skipped
+        for mine, theirs in ((self.by_position, other.by_position),
+                             (self.by_class, other.by_class),
+                             (self.by_hand_type, other.by_hand_type)):
+            for key, bucket in theirs.items():
+                target = self._bucket(mine, key)
+                for field, value in bucket.items():
+                    target[field] += value
+        return self
+
+    @staticmethod
+    def _summary(table):
+        summary = {}
+        for key in sorted(table):
+            bucket = table[key]
+            summary[key] = {
+                'hands': bucket['hands'],
+                'net': bucket['net'],
+                'net_per_hand': bucket['net'] / bucket['hands'],
+                'win_rate': bucket['won'] / bucket['hands'],
+                'mean_preflop_equity': bucket['equity_sum'] / bucket['hands'],
+            }
+        return summary
+
+    def to_dict(self):
+        """Return the aggregated statistics as a JSON-serializable dict."""
+        return {
+            'hands': self.hands,
+            'skipped': self.skipped,
+            'net': self.net,
+            'by_position': self._summary(self.by_position),
+            'by_class': self._summary(self.by_class),
+            'by_hand_type': self._summary(self.by_hand_type),
+        }
+
+
+def analyze_lines(lines, batch_size=BATCH_SIZE):
+    """Analyze an iterable of history lines and return a HistoryStats."""
+    stats = HistoryStats()
+
+    def skip(number, message):
+        stats.skipped += 1
+
+    for batch in batched(read_hands(lines, skip), batch_size):
+        for hand in evaluate_batch(batch):
+            stats.add(hand)
+    return stats
+
+
+def analyze_file(path, batch_size=BATCH_SIZE):
+    """Analyze one history file (plain or gzip) and return a HistoryStats."""
+    f = open_history(path)
+    try:
+        return analyze_lines(f, batch_size)
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+
+
+def analyze_files(paths, workers=None, batch_size=BATCH_SIZE):
+    """Analyze several history files, in parallel over the shared process pool when workers != 1."""
+    total = HistoryStats()
+    if workers == 1 or len(paths) <= 1 or '-' in paths:
+        results = (analyze_file(path, batch_size) for path in paths)
+    else:
+        pool = poker_equity.get_pool(workers)
+        results = pool.map(analyze_file, paths, [batch_size] * len(paths))
+    for stats in results:
+        total.merge(stats)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate statistics over hand history files.")
+    parser.add_argument('paths', nargs='+', help="history files (.jsonl, .txt, optionally .gz), '-' for stdin")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    stats = analyze_files(args.paths, args.workers, args.batch_size)
+    json.dump(stats.to_dict(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
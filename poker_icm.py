@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Tournament equity by the Independent Chip Model (Malmuth-Harville).
+
+A player finishes first with probability stack / total chips; given the
+players already placed, the next place goes to each remaining player in
+proportion to their stack. Summing that over every finishing order is
+factorial in the number of players, but the chance that a given set of
+players takes the top places only depends on the set, so the places are
+filled by dynamic programming over subsets: 2**n * n steps, about a
+millisecond for a 9-handed final table paying every place. Results are
+memoized on the stacks and payouts.
+
+    python poker_icm.py --stacks 5000 3000 2000 --payouts 50 30 20
+"""
+
+import argparse
+import functools
+import json
+import sys
+
+# Distinct (stacks, payouts) results kept by icm_equities
+ICM_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=ICM_CACHE_SIZE)
+def _equities(stacks, payouts):
+    n = len(stacks)
+    total = sum(stacks)
+    places = min(len(payouts), n)
+    equities = [0.0] * n
+    # Chance that the players in each mask take the top popcount(mask) places
+    reach = {0: 1.0}
+    for place in range(places):
+        payout = payouts[place]
+        next_reach = {}
+        for mask, probability in reach.items():
+            left = total
+            for i in range(n):
+                if mask >> i & 1:
+                    left -= stacks[i]
+            for i in range(n):
+                if mask >> i & 1 or not stacks[i]:
+                    continue
+                p = probability * stacks[i] / left
+                equities[i] += p * payout
+                bit = mask | 1 << i
+                next_reach[bit] = next_reach.get(bit, 0.0) + p
+        reach = next_reach
+    return tuple(equities)
+
+
+def icm_equities(stacks, payouts):
+    """Return the prize equity of every player from their stacks and the payouts (first place first).
+
+    Players with no chips left finish below everyone else and share the
+    payouts of the places they cover evenly.
+    """
+    stacks = tuple(float(s) for s in stacks)
+    payouts = tuple(float(p) for p in payouts)
+    if any(s < 0 for s in stacks):
+        raise ValueError("Stacks must not be negative.")
+    if any(p < 0 for p in payouts):
+        raise ValueError("Payouts must not be negative.")
+    if not any(stacks):
+        raise ValueError("Need at least one player with chips.")
+    alive = [i for i, s in enumerate(stacks) if s > 0]
+    equities = [0.0] * len(stacks)
+    for i, equity in zip(alive, _equities(tuple(stacks[i] for i in alive), payouts)):
+        equities[i] = equity
+    busted = len(stacks) - len(alive)
+    if busted:
+        bottom = list(payouts[len(alive):len(stacks)])
+        share = sum(bottom) / busted
+        for i, s in enumerate(stacks):
+            if not s:
+                equities[i] = share
+    return equities
+
+
+def _all_in_stacks(stacks, hero, villain, pot, hero_wins):
+    risk = min(stacks[hero], stacks[villain])
+    after = list(stacks)
+    winner, loser = (hero, villain) if hero_wins else (villain, hero)
+    after[winner] += risk + pot
+    after[loser] -= risk
+    return after
+
+
+def all_in_ev(stacks, payouts, hero, villain, equity, pot=0):
+    """Return hero's prize equity when getting all in against villain with the given equity.
+
+    ``stacks`` are the chips every player has behind, ``pot`` the chips
+    already in the middle that the winner takes on top. Both players put in
+    the smaller of their two stacks.
+    """
+    win = icm_equities(_all_in_stacks(stacks, hero, villain, pot, True), payouts)[hero]
+    lose = icm_equities(_all_in_stacks(stacks, hero, villain, pot, False), payouts)[hero]
+    return equity * win + (1 - equity) * lose
+
+
+def fold_ev(stacks, payouts, hero, villain, pot=0):
+    """Return hero's prize equity when folding and villain takes the pot."""
+    after = list(stacks)
+    after[villain] += pot
+    return icm_equities(after, payouts)[hero]
+
+
+def required_equity(stacks, payouts, hero, villain, pot=0):
+    """Return the equity hero needs against villain for getting all in to beat folding.
+
+    Returns a dict with the ICM 'required_equity', the 'chip_required_equity'
+    that would be needed if chips were worth the same as prize money, and the
+    difference between the two as the 'risk_premium'.
+    """
+    if hero == villain:
+        raise ValueError("Hero and villain must be different players.")
+    if not stacks[hero] or not stacks[villain]:
+        raise ValueError("Hero and villain both need chips to get all in.")
+    risk = min(stacks[hero], stacks[villain])
+    win = icm_equities(_all_in_stacks(stacks, hero, villain, pot, True), payouts)[hero]
+    lose = icm_equities(_all_in_stacks(stacks, hero, villain, pot, False), payouts)[hero]
+    fold = fold_ev(stacks, payouts, hero, villain, pot)
+    needed = (fold - lose) / (win - lose) if win > lose else 1.0
+    needed = min(max(needed, 0.0), 1.0)
+    chip_needed = risk / (2 * risk + pot)
+    return {'required_equity': needed, 'chip_required_equity': chip_needed,
+            'risk_premium': needed - chip_needed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tournament prize equity of stacks by ICM.")
+    parser.add_argument('--stacks', type=float, nargs='+', required=True)
+    parser.add_argument('--payouts', type=float, nargs='+', required=True, help="first place first")
+    args = parser.parse_args(argv)
+    json.dump(icm_equities(args.stacks, args.payouts), sys.stdout)
+    print()
+
+
+if __name__ == '__main__':
+    main()
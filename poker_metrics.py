@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Optional instrumentation of the evaluator, simulator and recommendation hot paths.
+
+Metrics are off by default. While off, every instrumented call only checks
+the module-level ``enabled`` flag. Switch them at runtime with enable() and
+disable(), then read them with snapshot() (a dict) or prometheus_text()
+(Prometheus text exposition format).
+
+Three kinds of metrics are recorded, each optionally with labels:
+
+    counters     event counts, e.g. evaluations
+    histograms   latencies in seconds over fixed buckets
+    caches       hits and misses, reported with their hit rate
+"""
+
+import functools
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.1, 1.0, 10.0)
+
+enabled = False
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}  # (name, labels) -> [count per bucket + overflow, count, sum]
+_caches = {}  # (name, labels) -> [hits, misses]
+
+
+def enable():
+    """Start recording metrics."""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """Stop recording metrics; the values recorded so far are kept."""
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Drop every recorded value."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _caches.clear()
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def count(name, n=1, **labels):
+    """Add n to a counter."""
+    if not enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+def observe(name, seconds, **labels):
+    """Record one latency in a histogram."""
+    if not enabled:
+        return
+    key = (name, _labels(labels))
+    slot = 0
+    while slot < len(BUCKETS) and seconds > BUCKETS[slot]:
+        slot += 1
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0, 0.0]
+        histogram[0][slot] += 1
+        histogram[1] += 1
+        histogram[2] += seconds
+
+
+def cache_lookup(name, hit, **labels):
+    """Record a cache hit (hit=True) or miss."""
+    if not enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        stats = _caches.get(key)
+        if stats is None:
+            stats = _caches[key] = [0, 0]
+        stats[0 if hit else 1] += 1
+
+
+def timed(name, **labels):
+    """Decorator recording the latency of every call in the histogram name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Return all recorded metrics as a JSON-serializable dict."""
+    with _lock:
+        counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(_counters.items())]
+        histograms = []
+        for (name, labels), (buckets, total, seconds) in sorted(_histograms.items()):
+            cumulative, running = {}, 0
+            for bound, n in zip(BUCKETS + ('+Inf',), buckets):
+                running += n
+                cumulative[str(bound)] = running
+            histograms.append({'name': name, 'labels': dict(labels), 'count': total,
+                               'sum': seconds, 'mean': seconds / total if total else 0.0,
+                               'buckets': cumulative})
+        caches = []
+        for (name, labels), (hits, misses) in sorted(_caches.items()):
+            lookups = hits + misses
+            caches.append({'name': name, 'labels': dict(labels), 'hits': hits,
+                           'misses': misses, 'hit_rate': hits / lookups if lookups else 0.0})
+    return {'enabled': enabled, 'counters': counters, 'histograms': histograms, 'caches': caches}
+
+
+def _format_labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+
+def prometheus_text(prefix='poker_'):
+    """Return all recorded metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = []
+    typed = set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for counter in data['counters']:
+        name = f"{prefix}{counter['name']}_total"
+        declare(name, 'counter')
+        lines.append(f"{name}{_format_labels(counter['labels'])} {counter['value']}")
+    for histogram in data['histograms']:
+        name = f"{prefix}{histogram['name']}_seconds"
+        declare(name, 'histogram')
+        labels = histogram['labels']
+        for bound, n in histogram['buckets'].items():
+            lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {n}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']!r}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    for cache in data['caches']:
+        for field in ('hits', 'misses'):
+            name = f"{prefix}{cache['name']}_cache_{field}_total"
+            declare(name, 'counter')
+            lines.append(f"{name}{_format_labels(cache['labels'])} {cache[field]}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Opponent ranges narrowed by Bayes' rule as their bets come in.
+
+Every opponent starts with all 1326 holdings equally likely. Each action
+they take multiplies the weights by the chance of that action with each
+holding (the likelihood), so holdings that would rarely bet that much from
+that position lose weight:
+
+    weights *= P(action | holding, bet size, position)
+
+The likelihood models how strong a holding is: its preflop percentile from
+poker_preflop, or after the flop the share of holdings its made hand beats
+on the board. A bet or raise is likely from holdings above a threshold that
+rises with the bet relative to the pot and falls for loose positions, a
+call from holdings above a lower one, checks and folds from the rest. A
+floor keeps bluffs and slow plays possible. An update is a handful of
+NumPy operations on 1326 weights.
+
+Narrowed ranges feed equity in place of random hands: range_equity samples
+every opponent's holding from their weights, and pooled_range merges them
+into the single opponent range hand potential is worked out against.
+"""
+
+import math
+
+import numpy as np
+
+import poker_preflop
+import poker_vectorized as pv
+from poker_evaluator import card_ids
+from poker_ranges import NUM_COMBOS, remove_blockers
+
+# How much looser than average each position (see poker_game.get_position_name) plays
+POSITION_LOOSENESS = {
+    'under_the_gun': -0.12,
+    'under_the_gun_plus_1': -0.1,
+    'under_the_gun_plus_2': -0.08,
+    'middle_position': -0.04,
+    'middle_position_1': -0.04,
+    'hijack': 0.0,
+    'cutoff': 0.05,
+    'button': 0.1,
+    'small_blind': 0.03,
+    'big_blind': 0.08,
+}
+
+# Strength a holding needs to be more likely than not to raise or call, for a
+# pot-sized bet; every pot of bet size raises it by SIZE_SLOPE (up to MAX_BET_RATIO pots)
+RAISE_THRESHOLD = 0.7
+CALL_THRESHOLD = 0.45
+SIZE_SLOPE = 0.08
+MAX_BET_RATIO = 3.0
+# Spread of the likelihood curves around their thresholds
+STRENGTH_WIDTH = 0.06
+# Lowest likelihood of any action with any holding (bluffs, slow plays, mistakes)
+ACTION_FLOOR = 0.02
+
+ACTIONS = ('check', 'bet', 'raise', 'call', 'fold')
+
+# Samples drawn by range_equity
+RANGE_SAMPLES = 20000
+
+_COMBO_CLASS = np.array([poker_preflop.hand_class(int(a), int(b)) for a, b in pv.COMBOS], dtype=np.intp)
+_preflop_strengths = {}
+
+
+def preflop_strengths(num_opponents=1):
+    """Return the preflop percentile of every combo against num_opponents random hands."""
+    num_opponents = min(max(num_opponents, 1), poker_preflop.MAX_OPPONENTS)
+    strengths = _preflop_strengths.get(num_opponents)
+    if strengths is None:
+        row = [poker_preflop.class_percentile(i, num_opponents) for i in range(poker_preflop.NUM_CLASSES)]
+        strengths = _preflop_strengths[num_opponents] = np.array(row)[_COMBO_CLASS]
+    return strengths
+
+
+def board_percentiles(board):
+    """Return the share of live holdings each combo's made hand beats on a board (ties count half).
+
+    Combos that share a card with the board get 0.
+    """
+    board = card_ids(board)
+    values = pv.board_strengths([board], np.arange(NUM_COMBOS))[0]
+    live = (pv.COMBO_BITS & np.uint64(pv.cards_bits(board))) == 0
+    ranked = np.sort(values[live])
+    below = np.searchsorted(ranked, values, 'left')
+    not_above = np.searchsorted(ranked, values, 'right')
+    return np.where(live, (below + not_above) / (2 * len(ranked)), 0.0)
+
+
+def combo_strengths(board=(), num_opponents=1):
+    """Return the strength in [0, 1] of every combo: preflop percentile, or board percentile after the flop."""
+    board = card_ids(board)
+    if not board:
+        return preflop_strengths(num_opponents)
+    if len(board) not in (3, 4, 5):
+        raise ValueError("The board must have 0, 3, 4 or 5 cards.")
+    return board_percentiles(board)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def action_likelihood(strengths, action, bet_ratio=0.0, position=None):
+    """Return the chance of an action with each holding, given their strengths.
+
+    ``bet_ratio`` is the bet (for 'bet' and 'raise') or the amount to call
+    (for 'call' and 'fold') relative to the pot before it.
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action {action}. Use one of {', '.join(ACTIONS)}.")
+    shift = SIZE_SLOPE * (min(max(bet_ratio, 0.0), MAX_BET_RATIO) - 1) - POSITION_LOOSENESS.get(position, 0.0)
+    raises = _sigmoid((strengths - RAISE_THRESHOLD - shift) / STRENGTH_WIDTH)
+    if action in ('bet', 'raise'):
+        likelihood = raises
+    elif action == 'call':
+        likelihood = _sigmoid((strengths - CALL_THRESHOLD - shift) / STRENGTH_WIDTH)
+    elif action == 'fold':
+        likelihood = 1 - _sigmoid((strengths - CALL_THRESHOLD - shift) / STRENGTH_WIDTH)
+    else:
+        # Strong holdings often bet instead of checking
+        likelihood = 1 - raises / 2
+    return ACTION_FLOOR + (1 - ACTION_FLOOR) * likelihood
+
+
+def action_from_bet(bet, current_bet):
+    """Name the action of a bet amount facing the current bet: check, bet, call, raise or fold."""
+    if bet == 0:
+        return 'check' if current_bet == 0 else 'fold'
+    if bet <= current_bet:
+        return 'call'
+    return 'bet' if current_bet == 0 else 'raise'
+
+
+class OpponentRange:
+    """The weighted range of one opponent over the 1326 combos."""
+    def __init__(self, position=None, num_opponents=1, dead=()):
+        self.position = position
+        self.num_opponents = num_opponents
+        self.weights = remove_blockers(np.ones(NUM_COMBOS), dead)
+        self.folded = False
+        self.actions = []
+
+    def remove_cards(self, cards):
+        """Drop the combos holding any of the cards, e.g. the board once it is dealt."""
+        self.weights = remove_blockers(self.weights, cards)
+
+    def observe(self, action, amount=0.0, pot=0.0, board=()):
+        """Update the range with an action: bet or raise ``amount``, or call ``amount``, into ``pot``.
+
+        Returns the new weights.
+        """
+        bet_ratio = amount / pot if pot > 0 else (1.0 if amount else 0.0)
+        strengths = combo_strengths(board, self.num_opponents)
+        self.weights = self.weights * action_likelihood(strengths, action, bet_ratio, self.position)
+        if board:
+            self.remove_cards(board)
+        if action == 'fold':
+            self.folded = True
+        self.actions.append(action)
+        return self.weights
+
+    def size(self):
+        """Return the weighted number of combos, relative to a full range of 1326."""
+        return float(self.weights.sum())
+
+    def normalized(self):
+        """Return the weights as probabilities summing to 1."""
+        total = self.weights.sum()
+        if total <= 0:
+            raise ValueError("The range has no holdings left.")
+        return self.weights / total
+
+
+def pooled_range(ranges, dead=()):
+    """Pool the ranges of several opponents (None for a random hand) into one range.
+
+    Every opponent weighs the same: the weights, without the combos holding
+    a dead card, are normalized per opponent before they are added. Returns
+    weights summing to 1.
+    """
+    total = np.zeros(NUM_COMBOS)
+    for weights in ranges:
+        weights = remove_blockers(np.ones(NUM_COMBOS) if weights is None else weights, dead)
+        size = weights.sum()
+        if size > 0:
+            total += weights / size
+    if not total.any():
+        raise ValueError("The ranges have no holdings left.")
+    return total / total.sum()
+
+
+def range_equity(hole, ranges, board=(), dead=(), samples=RANGE_SAMPLES, seed=None):
+    """Estimate the equity of hole cards against opponents holding hands from weighted ranges.
+
+    ``ranges`` is a list of weight arrays (or OpponentRange objects, or None
+    for a random hand), one per opponent. Every sample draws each opponent's holding from their weights,
+    redrawing holdings that clash with cards already out, and completes the
+    board from the remaining cards. Returns the equity result dict of
+    poker_equity.equity.
+    """
+    hole, board, dead = card_ids(hole), card_ids(board), card_ids(dead)
+    if len(hole) != 2:
+        raise ValueError("Need exactly 2 hole cards to calculate equity.")
+    if len(board) > 5:
+        raise ValueError("There can be at most 5 community cards.")
+    known = hole + board + list(dead)
+    if len(set(known)) != len(known):
+        raise ValueError("Cards must not repeat.")
+    if not ranges:
+        raise ValueError("Need at least 1 opponent range.")
+    if samples < 1:
+        raise ValueError("Need at least 1 sample to calculate equity.")
+
+    rng = np.random.default_rng(seed)
+    known_bits = np.uint64(pv.cards_bits(known))
+    used = np.full(samples, known_bits, dtype=np.uint64)
+    villains = []
+    for weights in ranges:
+        weights = getattr(weights, 'weights', weights)
+        if weights is None:
+            weights = np.ones(NUM_COMBOS)
+        weights = np.where((pv.COMBO_BITS & known_bits) == 0, weights, 0.0)
+        total = weights.sum()
+        if total <= 0:
+            raise ValueError("An opponent range has no holdings left.")
+        cumulative = np.cumsum(weights / total)
+        combos = np.empty(samples, dtype=np.intp)
+        pending = np.arange(samples)
+        for _ in range(100):
+            draws = np.minimum(np.searchsorted(cumulative, rng.random(len(pending)), 'right'), NUM_COMBOS - 1)
+            clash = (pv.COMBO_BITS[draws] & used[pending]) != 0
+            combos[pending[~clash]] = draws[~clash]
+            pending = pending[clash]
+            if not pending.size:
+                break
+        else:
+            raise ValueError("The opponent ranges can't be dealt without clashing.")
+        used |= pv.COMBO_BITS[combos]
+        villains.append(combos)
+
+    # Complete every board with the lowest random keys among the cards still out
+    missing = 5 - len(board)
+    low = np.full(samples, pv.hand_low(board), dtype=np.int64)
+    masks = np.full(samples, pv.hand_masks(board), dtype=np.int64)
+    if missing:
+        keys = rng.random((samples, 52))
+        keys[(used[:, None] & pv.CARD_BITS[None, :]) != 0] = 2.0
+        runouts = np.argpartition(keys, missing - 1, axis=1)[:, :missing]
+        low += pv.CARD_LOW[runouts].sum(axis=1)
+        masks += pv.CARD_MASKS[runouts].sum(axis=1)
+
+    hero = pv.strengths(low + pv.hand_low(hole), masks + pv.hand_masks(hole))
+    best = np.zeros(samples, dtype=hero.dtype)
+    tied = np.ones(samples)
+    for combos in villains:
+        villain = pv.strengths(low + pv.COMBO_LOW[combos], masks + pv.COMBO_MASKS[combos])
+        tied += villain == hero
+        best = np.maximum(best, villain)
+    won = hero > best
+    split = hero == best
+    share = np.where(won, 1.0, np.where(split, 1.0 / tied, 0.0))
+    equity = float(share.mean())
+    return {
+        'win': float(won.mean()),
+        'tie': float(split.mean()),
+        'loss': float(1.0 - won.mean() - split.mean()),
+        'equity': equity,
+        'std_error': math.sqrt(max(float((share * share).mean()) - equity * equity, 0.0) / samples),
+        'trials': samples,
+        'exact': False,
+    }
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Hand strength, hand potential and effective hand strength on the flop and turn.
+
+For a hand and board this computes, against every opponent holding:
+
+    hand_strength   share of holdings the hand is ahead of now (ties count half)
+    ppot            chance of ending ahead when behind now (positive potential)
+    npot            chance of ending behind when ahead now (negative potential)
+    ehs             hand_strength ** n * (1 - npot) + (1 - hand_strength ** n) * ppot
+
+following Billings et al., "The challenge of poker". The look-ahead covers
+every opponent holding and every turn and river card. Without a flush a
+holding's final strength only depends on its rank pair, so rather than
+evaluating all 1,081 x 1,081 (runout, holding) showdowns of a flop the
+outcomes are counted per runout and rank pair, then corrected for the
+holdings that share a card with the runout and those that make a flush.
+A flop takes about 10 ms, a turn about 2 ms.
+"""
+
+import itertools
+
+import numpy as np
+
+import poker_vectorized as pv
+from poker_evaluator import card_ids, evaluate
+from poker_ranges import NUM_COMBOS, to_range
+
+AHEAD, TIED, BEHIND = 0, 1, 2
+
+
+def _compare(hero, villains):
+    """Return AHEAD (0), TIED (1) or BEHIND (2) per villain strength."""
+    return (villains > hero).astype(np.int8) + (villains >= hero)
+
+
+def potential_matrix(hole, board, villain=None, dead=()):
+    """Return the 3x3 matrix of weighted (now, final) outcomes and the weight of holdings per outcome now.
+
+    Rows and columns are AHEAD, TIED and BEHIND. ``villain`` is an optional
+    range (anything poker_ranges.to_range accepts) weighting the opponent
+    holdings; by default every holding counts the same.
+    """
+    hole, board, dead = card_ids(hole), card_ids(board), card_ids(dead)
+    if len(hole) != 2:
+        raise ValueError("Need exactly 2 hole cards.")
+    if len(board) not in (3, 4):
+        raise ValueError("Hand potential needs a flop or a turn on the board.")
+    used = hole + board + list(dead)
+    if len(set(used)) != len(used):
+        raise ValueError("Cards must not repeat.")
+
+    weights = np.ones(NUM_COMBOS) if villain is None else to_range(villain).astype(np.float64)
+    used_bits = np.uint64(pv.cards_bits(used))
+    combos = np.nonzero((weights > 0) & ((pv.COMBO_BITS & used_bits) == 0))[0]
+    if not combos.size:
+        raise ValueError("The opponent range has no holdings left.")
+    weights = weights[combos]
+
+    now = _compare(evaluate(hole + board), pv.board_strengths([board], combos)[0]).astype(np.intp)
+    now_weight = np.bincount(now, weights, minlength=3)
+
+    live = [c for c in range(52) if c not in used]
+    runouts = np.array(list(itertools.combinations(live, 5 - len(board))), dtype=np.intp)
+    boards = np.hstack([np.tile(np.array(board, dtype=np.intp), (len(runouts), 1)), runouts])
+    board_low = pv.CARD_LOW[boards].sum(axis=1)
+    board_masks = pv.CARD_MASKS[boards].sum(axis=1)
+    hero_final = pv.strengths(board_low + pv.hand_low(hole), board_masks + pv.hand_masks(hole))
+
+    # Without a flush a holding's final strength only depends on its rank
+    # pair and the ranks of the runout, so strengths are looked up once per
+    # distinct rank runout, and outcomes are counted from the weight of the
+    # holdings with each rank pair and outcome now...
+    used_pairs, pairs = np.unique(pv.COMBO_RANK_PAIR[combos], return_inverse=True)
+    rank_runouts = np.sort(runouts >> 2, axis=1) @ (13 ** np.arange(runouts.shape[1]))
+    _, first, inverse = np.unique(rank_runouts, return_index=True, return_inverse=True)
+    final = _compare(hero_final[:, None], pv.rank_pair_strengths(boards[first])[:, used_pairs][inverse])
+    final_onehot = (final[:, :, None] == np.arange(3)).reshape(len(runouts), -1).astype(np.float32)
+    grouped = np.zeros((len(used_pairs), 3))
+    np.add.at(grouped, (pairs, now), weights)
+    counts = grouped.T @ final_onehot.sum(axis=0).reshape(-1, 3)
+
+    # ...less the holdings sharing a card with the runout, counted per card
+    # over the runouts holding it...
+    holding_cards = pv.COMBOS[combos]
+    by_card = np.zeros((52, len(used_pairs), 3))
+    np.add.at(by_card, (holding_cards[:, 0], pairs, now), weights)
+    np.add.at(by_card, (holding_cards[:, 1], pairs, now), weights)
+    incidence = np.zeros((52, len(runouts)), dtype=np.float32)
+    for column in runouts.T:
+        incidence[column, np.arange(len(runouts))] = 1
+    by_card_final = (incidence @ final_onehot).reshape(52, -1, 3)
+    counts -= np.einsum('cpn,cpf->nf', by_card, by_card_final)
+
+    # ...plus, on the flop, the holding made of both runout cards, which was
+    # taken out twice
+    if runouts.shape[1] == 2:
+        all_weights = np.zeros(NUM_COMBOS)
+        all_weights[combos] = weights
+        all_now = np.zeros(NUM_COMBOS, dtype=np.intp)
+        all_now[combos] = now
+        all_pairs = np.zeros(NUM_COMBOS, dtype=np.intp)
+        all_pairs[combos] = pairs
+        both = pv.COMBO_INDEX[runouts[:, 0], runouts[:, 1]]
+        outcome = all_now[both] * 3 + final[np.arange(len(runouts)), all_pairs[both]]
+        counts += np.bincount(outcome, all_weights[both], minlength=9).reshape(3, 3)
+
+    # Then the holdings that make a flush, with at least 5 of a suit between
+    # them and the board, move from their rank pair outcome to their real one
+    board_suits = (board_low >> 32)[:, None] >> (4 * np.arange(4))[None, :] & 0xF
+    holding_suits = (pv.COMBO_LOW[combos] >> 32)[:, None] >> (4 * np.arange(4))[None, :] & 0xF
+    runout_bits = np.bitwise_or.reduce(pv.CARD_BITS[runouts], axis=1)
+    for suit in range(4):
+        for on_board in (3, 4, 5):
+            rows = np.flatnonzero(board_suits[:, suit] == on_board)
+            cols = np.flatnonzero(holding_suits[:, suit] >= 5 - on_board)
+            if not rows.size or not cols.size:
+                continue
+            masks = pv.COMBO_MASKS[combos[cols]][None, :] + board_masks[rows][:, None]
+            flushes = pv.FLUSH_VALUES[(masks >> (13 * suit)) & 0x1FFF]
+            live_weights = np.where((runout_bits[rows][:, None] & pv.COMBO_BITS[combos[cols]][None, :]) == 0,
+                                    weights[cols][None, :], 0.0).ravel()
+            before = (now[cols] * 3 + final[rows][:, pairs[cols]]).ravel()
+            after = (now[cols] * 3 + _compare(hero_final[rows][:, None], flushes)).ravel()
+            counts += (np.bincount(after, live_weights, minlength=9)
+                       - np.bincount(before, live_weights, minlength=9)).reshape(3, 3)
+    return counts, now_weight
+
+
+def hand_potential(hole, board, num_opponents=1, villain=None, dead=()):
+    """Return hand_strength, ppot, npot and ehs of hole cards on a flop or turn.
+
+    With several opponents the hand strength is raised to the power of their
+    number before it is combined with the potentials.
+    """
+    if num_opponents < 1:
+        raise ValueError("Need at least 1 opponent.")
+    matrix, now_weight = potential_matrix(hole, board, villain, dead)
+    total = now_weight.sum()
+    strength = (now_weight[AHEAD] + now_weight[TIED] / 2) / total
+
+    runout_totals = matrix.sum(axis=1)
+    behind = runout_totals[BEHIND] + runout_totals[TIED] / 2
+    ahead = runout_totals[AHEAD] + runout_totals[TIED] / 2
+    ppot = (matrix[BEHIND, AHEAD] + matrix[BEHIND, TIED] / 2 + matrix[TIED, AHEAD] / 2) / behind \
+        if behind else 0.0
+    npot = (matrix[AHEAD, BEHIND] + matrix[AHEAD, TIED] / 2 + matrix[TIED, BEHIND] / 2) / ahead \
+        if ahead else 0.0
+
+    multiway = strength ** num_opponents
+    return {
+        'hand_strength': float(strength),
+        'ppot': float(ppot),
+        'npot': float(npot),
+        'ehs': float(multiway * (1 - npot) + (1 - multiway) * ppot),
+    }
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Precomputed preflop all-in equity for the 169 starting-hand classes.
+
+Classes are laid out on the usual 13x13 grid of rank indices ('2' = 0 ...
+'A' = 12): pairs on the diagonal, suited hands at ``high * 13 + low`` and
+offsuit hands at ``low * 13 + high``.
+
+The table lives in a small binary file built by running this module:
+
+    python poker_preflop.py --trials 50000
+
+It holds a header followed by one little-endian uint16 equity (scaled to
+0-65535) per class and opponent count, and is memory-mapped on first use.
+"""
+
+import argparse
+import array
+import mmap
+import os
+import struct
+import sys
+
+import poker_equity
+from poker_evaluator import RANK_CHARS, card_id
+
+NUM_CLASSES = 169
+MAX_OPPONENTS = 8
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.bin')
+
+_MAGIC = b'PFEQ'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHHI')  # magic, version, classes, max opponents, trials per entry
+_SCALE = 65535
+
+_table = None
+
+
+def hand_class(card1, card2):
+    """Return the class index (0-168) of two hole cards given as Cards, strings or ids."""
+    id1, id2 = card_id(card1), card_id(card2)
+    high, low = max(id1 >> 2, id2 >> 2), min(id1 >> 2, id2 >> 2)
+    if (id1 & 3) == (id2 & 3):
+        return high * 13 + low
+    return low * 13 + high
+
+
+def class_name(index):
+    """Return the short name of a class, e.g. 'AKs', 'T9o' or '77'."""
+    row, col = divmod(index, 13)
+    if row == col:
+        return RANK_CHARS[row] * 2
+    if row > col:
+        return RANK_CHARS[row] + RANK_CHARS[col] + 's'
+    return RANK_CHARS[col] + RANK_CHARS[row] + 'o'
+
+
+def class_combos(index):
+    """Return the number of hole card combinations in a class (6, 4 or 12)."""
+    row, col = divmod(index, 13)
+    if row == col:
+        return 6
+    return 4 if row > col else 12
+
+
+def class_representative(index):
+    """Return one pair of card ids belonging to a class."""
+    row, col = divmod(index, 13)
+    if row > col:
+        return [row * 4, col * 4]
+    return [row * 4, col * 4 + 1]
+
+
+def build_table(trials=50000, workers=None, seed=0, path=TABLE_FILE, progress=None):
+    """Compute the equity of every class against 1-8 random opponents and write the table file."""
+    values = []
+    for opponents in range(1, MAX_OPPONENTS + 1):
+        for index in range(NUM_CLASSES):
+            hole = class_representative(index)
+            deck = [c for c in range(52) if c not in hole]
+            result = poker_equity.sharded_monte_carlo_equity(
+                hole, [], deck, opponents, trials, f"{seed}:{opponents}:{index}", workers)
+            values.append(round(result['equity'] * _SCALE))
+            if progress:
+                progress(opponents, index)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, NUM_CLASSES, MAX_OPPONENTS, trials))
+        f.write(struct.pack(f'<{len(values)}H', *values))
+    os.replace(tmp_path, path)
+    unload_table()
+
+
+def load_table(path=TABLE_FILE):
+    """Memory-map the table file and return it as a flat uint16 memoryview."""
+    global _table
+    if _table is None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Preflop equity table {path} not found. Build it with 'python poker_preflop.py'.")
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, classes, max_opponents, _ = _HEADER.unpack_from(mapped)
+        if magic != _MAGIC or version != _VERSION or classes != NUM_CLASSES or max_opponents != MAX_OPPONENTS:
+            raise ValueError(f"Preflop equity table {path} has an unsupported format.")
+        if sys.byteorder == 'little':
+            _table = memoryview(mapped)[_HEADER.size:].cast('H')
+        else:
+            _table = array.array('H', mapped[_HEADER.size:])
+            _table.byteswap()
+    return _table
+
+
+_percentiles = {}
+
+
+def unload_table():
+    """Drop the mapped table so the next lookup reloads it from disk."""
+    global _table
+    _table = None
+    _percentiles.clear()
+
+
+def _opponent_row(num_opponents):
+    if not 1 <= num_opponents <= MAX_OPPONENTS:
+        raise ValueError(f"Number of opponents must be between 1 and {MAX_OPPONENTS}.")
+    return (num_opponents - 1) * NUM_CLASSES
+
+
+def class_equity(index, num_opponents=1):
+    """Return the all-in equity of a class against random opponent hands."""
+    return load_table()[_opponent_row(num_opponents) + index] / _SCALE
+
+
+def preflop_equity(card1, card2, num_opponents=1):
+    """Return the all-in equity of two hole cards against random opponent hands."""
+    return class_equity(hand_class(card1, card2), num_opponents)
+
+
+def class_percentile(index, num_opponents=1):
+    """Return the share of all 1326 starting hands that a class out-performs (ties count half)."""
+    row = _percentiles.get(num_opponents)
+    if row is None:
+        equities = [class_equity(i, num_opponents) for i in range(NUM_CLASSES)]
+        row = []
+        for equity in equities:
+            below = sum(class_combos(i) for i, e in enumerate(equities) if e < equity)
+            tied = sum(class_combos(i) for i, e in enumerate(equities) if e == equity)
+            row.append((below + tied / 2) / 1326)
+        _percentiles[num_opponents] = row
+    return row[index]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the preflop equity table.")
+    parser.add_argument('--trials', type=int, default=50000, help="Monte Carlo trials per entry")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=TABLE_FILE)
+    args = parser.parse_args(argv)
+
+    def progress(opponents, index):
+        if index == NUM_CLASSES - 1:
+            print(f"Finished {opponents} opponent(s)", file=sys.stderr)
+
+    build_table(args.trials, args.workers, args.seed, args.output, progress)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
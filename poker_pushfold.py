@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Heads-up push/fold equilibrium charts for short stacks.
+
+The small blind either goes all in or folds; facing the shove, the big
+blind calls or folds. Both start with the same effective stack in big
+blinds. Hands are the 169 preflop classes, and the chance of each class
+matchup counts the combos that don't share a card.
+
+Showdown equities come from a 169x169 all-in equity matrix in a small
+binary file, built once by running this module:
+
+    python poker_pushfold.py --build
+
+It holds a header and one little-endian uint16 equity (scaled to 0-65535)
+of the row class against the column class per entry. The build samples
+random boards, evaluates all 1326 combos on each at once and compares
+every pair of them, sharding the boards over the shared process pool.
+
+solve() finds the equilibrium by fictitious play: each iteration computes
+the best response of both players to the other's average strategy with a
+few 169x169 matrix-vector products. A stack depth solves in well under a
+second, and solutions are cached per depth (rounded to STACK_STEP big blinds).
+
+    python poker_pushfold.py --stack 10
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+
+import numpy as np
+
+import poker_equity
+import poker_preflop
+import poker_vectorized as pv
+
+NUM_CLASSES = poker_preflop.NUM_CLASSES
+MATRIX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'headsup_equity.bin')
+
+_MAGIC = b'HUEQ'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHI')  # magic, version, classes, boards sampled
+_SCALE = 65535
+
+# Boards per shard of a matrix build
+BUILD_SHARD_BOARDS = 250
+
+# Fictitious play iterations per solve, and the stack depth resolution of the cache
+SOLVER_ITERATIONS = 2000
+STACK_STEP = 0.1
+
+SMALL_BLIND = 0.5
+BIG_BLIND = 1.0
+
+_COMBO_CLASS = np.array([poker_preflop.hand_class(int(a), int(b)) for a, b in pv.COMBOS], dtype=np.intp)
+# Class of every combo as a one-hot (1326, 169) matrix
+_CLASS_MATRIX = np.zeros((len(pv.COMBOS), NUM_CLASSES))
+_CLASS_MATRIX[np.arange(len(pv.COMBOS)), _COMBO_CLASS] = 1.0
+
+_matrix = None
+_pair_counts = None
+_solutions = {}
+
+
+def pair_counts():
+    """Return the number of card-disjoint combo pairs of every two classes, shape (169, 169)."""
+    global _pair_counts
+    if _pair_counts is None:
+        disjoint = ((pv.COMBO_BITS[:, None] & pv.COMBO_BITS[None, :]) == 0).astype(np.float64)
+        _pair_counts = _CLASS_MATRIX.T @ disjoint @ _CLASS_MATRIX
+    return _pair_counts
+
+
+def _build_shard(args):
+    """Return (summed shares, pair-board counts) of class matchups over a shard of random boards."""
+    boards, seed = args
+    rng = random.Random(seed)
+    deck = list(range(52))
+    boards = np.array([rng.sample(deck, 5) for _ in range(boards)], dtype=np.intp)
+    values = pv.board_strengths(boards, np.arange(len(pv.COMBOS)))
+    board_bits = np.bitwise_or.reduce(pv.CARD_BITS[boards], axis=1)
+    live = ((pv.COMBO_BITS[None, :] & board_bits[:, None]) == 0).astype(np.float64)
+    values[live == 0] = 0  # below every real strength
+
+    # +1 / 0 / -1 per combo pair and board, summed over the boards
+    signs = np.zeros((len(pv.COMBOS), len(pv.COMBOS)), dtype=np.int32)
+    for row in values:
+        signs += row[:, None] > row[None, :]
+        signs -= row[:, None] < row[None, :]
+    # Take out the pairs with a combo clashing with the board: a dead villain
+    # combo scored +1 for every live hero combo, a dead hero combo -1
+    dead = 1.0 - live
+    signs = signs - live.T @ dead + dead.T @ live
+    both_live = live.T @ live
+    shares = (signs + both_live) / 2
+
+    disjoint = (pv.COMBO_BITS[:, None] & pv.COMBO_BITS[None, :]) == 0
+    shares = np.where(disjoint, shares, 0.0)
+    both_live = np.where(disjoint, both_live, 0.0)
+    return _CLASS_MATRIX.T @ shares @ _CLASS_MATRIX, _CLASS_MATRIX.T @ both_live @ _CLASS_MATRIX
+
+
+def build_matrix(boards=10000, workers=None, seed=0, path=MATRIX_FILE):
+    """Estimate the all-in equity of every class against every class and write the matrix file."""
+    shards = []
+    for index, start in enumerate(range(0, boards, BUILD_SHARD_BOARDS)):
+        shards.append((min(BUILD_SHARD_BOARDS, boards - start), poker_equity.shard_seed(seed, index)))
+    if workers == 1 or len(shards) == 1:
+        results = map(_build_shard, shards)
+    else:
+        results = poker_equity.get_pool(workers).map(_build_shard, shards)
+
+    shares = np.zeros((NUM_CLASSES, NUM_CLASSES))
+    counts = np.zeros((NUM_CLASSES, NUM_CLASSES))
+    for s, n in results:
+        shares += s
+        counts += n
+    equity = np.where(counts > 0, shares / np.maximum(counts, 1), 0.5)
+    values = np.rint(equity * _SCALE).astype('<u2')
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, NUM_CLASSES, boards))
+        f.write(values.tobytes())
+    os.replace(tmp_path, path)
+    unload_matrix()
+
+
+def load_matrix(path=MATRIX_FILE):
+    """Return the (169, 169) equity matrix of row class against column class."""
+    global _matrix
+    if _matrix is None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Heads-up equity matrix {path} not found. Build it with 'python poker_pushfold.py --build'.")
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, classes, _ = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION or classes != NUM_CLASSES:
+            raise ValueError(f"Heads-up equity matrix {path} has an unsupported format.")
+        values = np.frombuffer(data, dtype='<u2', offset=_HEADER.size, count=NUM_CLASSES * NUM_CLASSES)
+        _matrix = values.reshape(NUM_CLASSES, NUM_CLASSES) / _SCALE
+    return _matrix
+
+
+def unload_matrix():
+    """Drop the loaded matrix and every cached solution."""
+    global _matrix
+    _matrix = None
+    _solutions.clear()
+
+
+def _values(called, weights, row_weights, push, call):
+    """Return the small blind's EV per class of pushing, and the big blind's per class of calling and folding.
+
+    ``called`` is the pair-weighted result of the small blind when called.
+    """
+    push_ev = (called @ call + (weights @ (1 - call)) * BIG_BLIND) / row_weights
+    call_ev = -(push @ called)
+    fold_ev = -(push @ weights) * BIG_BLIND
+    return push_ev, call_ev, fold_ev
+
+
+def solve(stack_bb, iterations=SOLVER_ITERATIONS):
+    """Solve heads-up push/fold at an effective stack in big blinds.
+
+    Returns a dict with the 'push' and 'call' frequencies of the 169 classes
+    (indexed like poker_preflop), the small blind's 'value' in big blinds
+    per hand and the 'exploitability' of the solution (what the best
+    responses gain over it, in big blinds).
+    """
+    if stack_bb < BIG_BLIND:
+        raise ValueError("The effective stack must be at least 1 big blind.")
+    stack = round(stack_bb / STACK_STEP) * STACK_STEP
+    key = (round(stack, 6), iterations)
+    solution = _solutions.get(key)
+    if solution is not None:
+        return solution
+
+    equity = load_matrix()
+    weights = pair_counts()
+    row_weights = weights.sum(axis=1)
+    called = weights * (equity * (2 * stack) - stack)
+    push = np.ones(NUM_CLASSES)
+    call = np.ones(NUM_CLASSES)
+    for t in range(1, iterations + 1):
+        push_ev, call_ev, fold_ev = _values(called, weights, row_weights, push, call)
+        push += ((push_ev > -SMALL_BLIND) - push) / (t + 1)
+        call += ((call_ev > fold_ev) - call) / (t + 1)
+
+    push_ev, call_ev, fold_ev = _values(called, weights, row_weights, push, call)
+    priors = row_weights / weights.sum()
+    value = float(priors @ (push * push_ev + (1 - push) * -SMALL_BLIND))
+    best_push = float(priors @ np.maximum(push_ev, -SMALL_BLIND))
+    # The big blind's EVs are weighted by class matchups; dividing by the total weight gives per-hand values
+    total = weights.sum()
+    best_call = float((np.maximum(call_ev, fold_ev) - (call * call_ev + (1 - call) * fold_ev)).sum()) / total
+    solution = _solutions[key] = {
+        'stack_bb': stack,
+        'push': push,
+        'call': call,
+        'value': value,
+        'exploitability': (best_push - value) + best_call,
+    }
+    return solution
+
+
+def push_range(stack_bb):
+    """Return the names of the classes the small blind pushes more often than not."""
+    push = solve(stack_bb)['push']
+    return [poker_preflop.class_name(i) for i in range(NUM_CLASSES) if push[i] >= 0.5]
+
+
+def call_range(stack_bb):
+    """Return the names of the classes the big blind calls a shove with more often than not."""
+    call = solve(stack_bb)['call']
+    return [poker_preflop.class_name(i) for i in range(NUM_CLASSES) if call[i] >= 0.5]
+
+
+def chart(frequencies):
+    """Return a 13x13 text grid of frequencies (A first, suited above the diagonal)."""
+    lines = []
+    for high in range(12, -1, -1):
+        cells = []
+        for low in range(12, -1, -1):
+            index = high * 13 + low
+            cells.append(f"{poker_preflop.class_name(index):>4}{frequencies[index]:4.0%}"[:8])
+        lines.append(' '.join(cells))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Heads-up push/fold equilibrium charts.")
+    parser.add_argument('--build', action='store_true', help="build the heads-up equity matrix first")
+    parser.add_argument('--boards', type=int, default=10000, help="boards sampled by the build")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stack', type=float, default=None, help="effective stack in big blinds")
+    args = parser.parse_args(argv)
+
+    if args.build:
+        build_matrix(args.boards, args.workers, args.seed)
+        print(f"Wrote {MATRIX_FILE}", file=sys.stderr)
+    if args.stack is not None:
+        solution = solve(args.stack)
+        print(f"Small blind pushes at {solution['stack_bb']:g} bb:")
+        print(chart(solution['push']))
+        print("\nBig blind calls:")
+        print(chart(solution['call']))
+        print(f"\nSmall blind value: {solution['value']:+.3f} bb/hand, "
+              f"exploitability: {solution['exploitability']:.4f} bb")
+
+
+if __name__ == '__main__':
+    main()
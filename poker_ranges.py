@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Hand ranges over the 1326 two-card combos and range-vs-range equity.
+
+A range is a float array of 1326 weights indexed like
+``poker_vectorized.COMBOS``. Range strings use the usual shorthand:
+
+    QQ+         pairs from QQ up to AA
+    22-55       pairs from 22 to 55
+    AKs, KQo    suited / offsuit combos, 'AK' means both
+    A9s+        kicker ranges up to one below the high card (A9s ... AKs)
+    76s-54s     runs of hands with the same gap (76s, 65s, 54s)
+    A2s-A5s     kicker runs with the same high card
+    AhKh        one specific combo
+    random      all 1326 combos
+
+Any item may carry a weight, e.g. 'AKo:0.5'. Card conflicts are resolved
+with 64-bit card masks, and equity is computed one board at a time over all
+combos at once.
+"""
+
+import itertools
+import random
+
+import numpy as np
+
+import poker_vectorized as pv
+from poker_evaluator import RANK_CHARS, card_id, card_ids
+
+NUM_COMBOS = 1326
+
+# Preflop spots are sampled, since there are 1.7 million possible boards
+PREFLOP_BOARDS = 2000
+
+
+def _rank(char):
+    rank = RANK_CHARS.find(char.upper())
+    if rank < 0:
+        raise ValueError(f"Invalid rank: {char}. Valid ranks are: {', '.join(RANK_CHARS)}")
+    return rank
+
+
+def _class_combos(high, low, suitedness):
+    """Return the combo indices of a hand class; suitedness is 's', 'o' or '' for both."""
+    combos = []
+    for s1 in range(4):
+        for s2 in range(4):
+            a, b = high * 4 + s1, low * 4 + s2
+            if a == b or (high == low and a > b):
+                continue
+            if suitedness == 's' and s1 != s2 or suitedness == 'o' and s1 == s2:
+                continue
+            combos.append(int(pv.COMBO_INDEX[a, b]))
+    return combos
+
+
+def _parse_class(text):
+    """Parse 'AK', 'AKs', 'AKo' or 'QQ' into (high, low, suitedness)."""
+    if len(text) not in (2, 3):
+        raise ValueError(f"Invalid hand class: {text}")
+    high, low = _rank(text[0]), _rank(text[1])
+    suitedness = text[2].lower() if len(text) == 3 else ''
+    if suitedness not in ('', 's', 'o'):
+        raise ValueError(f"Invalid hand class: {text}. Use 's' for suited or 'o' for offsuit.")
+    if high < low:
+        high, low = low, high
+    if high == low and suitedness:
+        raise ValueError(f"Invalid hand class: {text}. Pairs can't be suited or offsuit.")
+    return high, low, suitedness
+
+
+def _expand(item):
+    """Return the combo indices described by one range item (without weight)."""
+    if item.lower() in ('random', 'any'):
+        return list(range(NUM_COMBOS))
+
+    if len(item) == 4 and item[1].lower() in 'hdcs' and item[3].lower() in 'hdcs':
+        a, b = card_id(item[:2]), card_id(item[2:])
+        if a == b:
+            raise ValueError(f"Invalid combo: {item}. The two cards must differ.")
+        return [int(pv.COMBO_INDEX[a, b])]
+
+    if '-' in item:
+        start, end = (_parse_class(part) for part in item.split('-', 1))
+        if start[2] != end[2]:
+            raise ValueError(f"Invalid range: {item}. Both ends must be the same kind of hand.")
+        if start[0] == start[1] and end[0] == end[1]:
+            lo, hi = sorted((start[0], end[0]))
+            classes = [(r, r, '') for r in range(lo, hi + 1)]
+        elif start[0] == end[0]:
+            lo, hi = sorted((start[1], end[1]))
+            classes = [(start[0], k, start[2]) for k in range(lo, hi + 1)]
+        elif start[0] - start[1] == end[0] - end[1]:
+            gap = start[0] - start[1]
+            lo, hi = sorted((start[0], end[0]))
+            classes = [(h, h - gap, start[2]) for h in range(lo, hi + 1)]
+        else:
+            raise ValueError(f"Invalid range: {item}. Ends must share the high card or the gap.")
+        return [i for cls in classes for i in _class_combos(*cls)]
+
+    plus = item.endswith('+')
+    high, low, suitedness = _parse_class(item[:-1] if plus else item)
+    if not plus:
+        return _class_combos(high, low, suitedness)
+    if high == low:
+        return [i for r in range(high, 13) for i in _class_combos(r, r, '')]
+    return [i for k in range(low, high) for i in _class_combos(high, k, suitedness)]
+
+
+def parse_range(text):
+    """Parse a range string like 'QQ+, AKs, KQo, 76s-54s' into 1326 combo weights."""
+    weights = np.zeros(NUM_COMBOS)
+    items = [item for item in text.replace(',', ' ').split() if item]
+    if not items:
+        raise ValueError("Range is empty.")
+    for item in items:
+        weight = 1.0
+        if ':' in item:
+            item, weight_text = item.split(':', 1)
+            try:
+                weight = float(weight_text)
+            except ValueError:
+                raise ValueError(f"Invalid weight: {weight_text}") from None
+            if not 0 <= weight <= 1:
+                raise ValueError(f"Invalid weight: {weight_text}. Weights must be between 0 and 1.")
+        weights[_expand(item)] = weight
+    return weights
+
+
+def hand_range(cards):
+    """Return a range holding just one hand given as two Cards, strings or ids."""
+    a, b = card_ids(cards)
+    weights = np.zeros(NUM_COMBOS)
+    weights[pv.COMBO_INDEX[a, b]] = 1.0
+    return weights
+
+
+def to_range(value):
+    """Accept a range string, a two-card hand or a weight array and return weights."""
+    if isinstance(value, str):
+        return parse_range(value)
+    if isinstance(value, np.ndarray) and value.shape == (NUM_COMBOS,):
+        return value.astype(float)
+    return hand_range(value)
+
+
+def range_size(weights):
+    """Return the weighted number of combos in a range."""
+    return float(np.sum(weights))
+
+
+def remove_blockers(weights, dead):
+    """Return a copy of a range with every combo using a dead card removed."""
+    blocked = (pv.COMBO_BITS & np.uint64(pv.cards_bits(card_ids(dead)))) != 0
+    result = np.array(weights, dtype=float)
+    result[blocked] = 0.0
+    return result
+
+
+# Combo indices holding each card, shape (52, 51). Row c lists the combos
+# (c, x) by increasing x, so combo (a, b) with a < b sits in slot b - 1 of
+# row a and in slot a of row b.
+CARD_COMBOS = np.array([[pv.COMBO_INDEX[c, x] for x in range(52) if x != c] for c in range(52)],
+                       dtype=np.intp)
+
+# Boards compared at once by showdown
+SHOWDOWN_BATCH = 64
+
+
+def _ranked_prefix(values, weights):
+    """Rank each row of values and return the weight strictly below and up to each entry.
+
+    ``values`` and ``weights`` are (rows, n) arrays. Returns two (rows, n)
+    arrays in the original order: the total weight of the row's entries with
+    a smaller value, and with a smaller or equal value.
+    """
+    rows, n = values.shape
+    order = np.argsort(values, axis=1)
+    flat_order = (order + np.arange(rows)[:, None] * n).ravel()
+    sorted_values = values.ravel()[flat_order].reshape(rows, n)
+    prefix = np.cumsum(weights.ravel()[flat_order].reshape(rows, n), axis=1)
+
+    # Weight up to the start and the end of each run of equal values
+    new_run = np.empty((rows, n), dtype=bool)
+    new_run[:, 0] = True
+    np.not_equal(sorted_values[:, 1:], sorted_values[:, :-1], out=new_run[:, 1:])
+    slots = np.arange(n)
+    run_start = np.maximum.accumulate(np.where(new_run, slots, 0), axis=1)
+    run_end = np.empty((rows, n), dtype=np.intp)
+    run_end[:, :-1] = np.where(new_run[:, 1:], slots[:-1], n - 1)
+    run_end[:, -1] = n - 1
+    run_end = np.minimum.accumulate(run_end[:, ::-1], axis=1)[:, ::-1]
+
+    padded = np.zeros((rows, n + 1))
+    padded[:, 1:] = prefix
+    row_index = np.arange(rows)[:, None]
+    below = np.empty((rows, n))
+    up_to = np.empty((rows, n))
+    below.ravel()[flat_order] = padded[row_index, run_start].ravel()
+    up_to.ravel()[flat_order] = padded[row_index, run_end + 1].ravel()
+    return below, up_to
+
+
+def _showdown_batch(hero_combos, villain, boards):
+    """Return (wins, ties, total) for the hero combos summed over a batch of boards."""
+    count = len(boards)
+    board_bits = np.bitwise_or.reduce(pv.CARD_BITS[boards], axis=1)
+    live = (pv.COMBO_BITS[None, :] & board_bits[:, None]) == 0
+
+    # Combos that clash with a board get a meaningless strength, but they
+    # carry no weight and their results are masked out
+    strength = pv.board_strengths(boards, np.arange(NUM_COMBOS))
+    weights = np.where(live, villain, 0.0)
+    below, up_to = _ranked_prefix(strength, weights)
+
+    # The same per card: rows of the 51 combos holding each card
+    card_below, card_up_to = _ranked_prefix(strength[:, CARD_COMBOS].reshape(count * 52, 51),
+                                            weights[:, CARD_COMBOS].reshape(count * 52, 51))
+    card_below = card_below.reshape(count, 52, 51)
+    card_up_to = card_up_to.reshape(count, 52, 51)
+    card_total = weights[:, CARD_COMBOS].sum(axis=2)
+
+    # Inclusion-exclusion on the hero's two cards. The only villain combo
+    # holding both is the hero combo itself, which is counted in the tie band
+    # of both cards and has to be added back once
+    a, b = pv.COMBOS[hero_combos, 0].astype(np.intp), pv.COMBOS[hero_combos, 1].astype(np.intp)
+    same = weights[:, hero_combos]
+    hero_live = live[:, hero_combos]
+    wins = below[:, hero_combos] - card_below[:, a, b - 1] - card_below[:, b, a]
+    not_losing = up_to[:, hero_combos] - card_up_to[:, a, b - 1] - card_up_to[:, b, a] + same
+    faced = weights.sum(axis=1)[:, None] - card_total[:, a] - card_total[:, b] + same
+    return ((wins * hero_live).sum(axis=0),
+            ((not_losing - wins) * hero_live).sum(axis=0),
+            (faced * hero_live).sum(axis=0))
+
+
+def showdown(hero, villain, boards):
+    """Compare every hero combo against a villain range on a list of complete boards.
+
+    Returns arrays (wins, ties, total) over the 1326 hero combos, summed over
+    the boards: the villain weight each combo beats, ties and faces after
+    removing villain combos that share a card with it or the board. A combo
+    gets nothing from a board it clashes with.
+    """
+    wins = np.zeros(NUM_COMBOS)
+    ties = np.zeros(NUM_COMBOS)
+    total = np.zeros(NUM_COMBOS)
+    hero_combos = np.nonzero(hero > 0)[0]
+    boards = np.asarray(boards, dtype=np.intp)
+    villain = np.asarray(villain, dtype=float)
+    for start in range(0, len(boards), SHOWDOWN_BATCH):
+        w, t, n = _showdown_batch(hero_combos, villain, boards[start:start + SHOWDOWN_BATCH])
+        wins[hero_combos] += w
+        ties[hero_combos] += t
+        total[hero_combos] += n
+    return wins, ties, total
+
+
+def _boards(board, dead, samples, seed):
+    """Return the complete boards to evaluate and whether they are an exhaustive list."""
+    known = set(board) | set(dead)
+    deck = [c for c in range(52) if c not in known]
+    missing = 5 - len(board)
+    if missing <= 2:
+        return [list(board) + list(extra) for extra in itertools.combinations(deck, missing)], True
+    rng = random.Random(seed)
+    return [list(board) + rng.sample(deck, missing) for _ in range(samples)], False
+
+
+def range_equity(hero, villain, board=(), dead=(), samples=PREFLOP_BOARDS, seed=None):
+    """Calculate the equity of a hand or range against a villain range.
+
+    ``hero`` and ``villain`` may be range strings, two-card hands or weight
+    arrays. Flop, turn and river spots are enumerated exactly; preflop spots
+    sample ``samples`` boards. Returns a dict with 'equity', 'win', 'tie',
+    'loss', per-combo 'hand_equity' for the hero range, the number of
+    'boards' and whether the result is 'exact'.
+    """
+    board = card_ids(board)
+    dead = card_ids(dead)
+    if len(board) > 5:
+        raise ValueError("There can be at most 5 community cards.")
+    if len(set(board) | set(dead)) != len(board) + len(dead):
+        raise ValueError("Board and dead cards must not repeat.")
+    hero = remove_blockers(to_range(hero), board + dead)
+    villain = remove_blockers(to_range(villain), board + dead)
+    if not hero.any() or not villain.any():
+        raise ValueError("Range is empty after removing blocked combos.")
+
+    # Cards held by every combo of a range (e.g. a single hand) can't come on
+    # the board, so leave them out of the runouts
+    fixed = 0
+    for weights in (hero, villain):
+        fixed |= int(np.bitwise_and.reduce(pv.COMBO_BITS[weights > 0]))
+    fixed_cards = [c for c in range(52) if fixed >> c & 1]
+
+    boards, exact = _boards(board, dead + fixed_cards, samples, seed)
+    wins, ties, total = showdown(hero, villain, boards)
+
+    matchups = float(hero @ total)
+    if matchups == 0:
+        raise ValueError("The ranges have no compatible combos.")
+    win = float(hero @ wins) / matchups
+    tie = float(hero @ ties) / matchups
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hand_equity = np.where(total > 0, (wins + ties / 2) / total, np.nan)
+    return {
+        'equity': win + tie / 2,
+        'win': win,
+        'tie': tie,
+        'loss': 1.0 - win - tie,
+        'hand_equity': hand_equity,
+        'boards': len(boards),
+        'exact': exact,
+    }
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Headless self-play to measure how betting policies perform.
+
+Every hand is dealt at a full table of 3-9 players with seats named by
+poker_game.get_position_name (seat 1 = small blind). Blinds are 0.5 and 1
+big blind and stacks are unlimited. There is one preflop betting round:
+raises go to three times the current bet and the number of raises is capped.
+Players still in after it go to showdown on a random board, and the pot is
+split among the best hands.
+
+A policy is any callable taking a decision dict:
+
+    position, seat, players   where the player sits
+    hole, hand_class          hole card ids and the 169-class index
+    to_call, pot, raises      the price, the pot and raises so far
+
+and returning 'fold', 'call' or 'raise'. By default every seat plays
+RecommendationPolicy, which follows get_betting_recommendation.
+
+    python poker_selfplay.py --players 6 --hands 10000000
+
+Hands are split into shards with their own seeds and run on the shared
+process pool. Each worker aggregates its shard, so a run only moves small
+result dicts between processes, and the totals for a seed do not depend on
+the number of workers.
+"""
+
+import argparse
+import importlib
+import json
+import random
+import sys
+
+import poker_equity
+import poker_preflop
+from poker_assistant import PokerSimulator
+from poker_evaluator import CARD_KEYS, card_str, strength_from_key
+from poker_game import get_betting_recommendation, get_position_name
+
+SMALL_BLIND = 0.5
+BIG_BLIND = 1.0
+RAISE_FACTOR = 3
+MAX_RAISES = 3
+
+# Hands per shard; shard seeds only depend on the run seed and shard index
+SHARD_HANDS = 200000
+
+# 169-class index of every ordered pair of card ids
+CLASS_OF = [poker_preflop.hand_class(a, b) if a != b else -1 for a in range(52) for b in range(52)]
+
+
+class RecommendationPolicy:
+    """Play what get_betting_recommendation recommends.
+
+    Hand type and strength come from PokerSimulator.calculate_preflop_strength
+    against the other players at the table. 'Raise' and 'Call/Raise' raise;
+    any call calls; fold and check/fold check when that is free and fold
+    otherwise. Decisions only depend on a handful of values, so they are
+    memoized.
+    """
+    def __init__(self):
+        self._strengths = {}
+        self._decisions = {}
+
+    def _strength(self, hand_class, players):
+        key = (hand_class, players)
+        strength = self._strengths.get(key)
+        if strength is None:
+            simulator = PokerSimulator()
+            simulator.num_opponents = players - 1
+            hole = [card_str(c) for c in poker_preflop.class_representative(hand_class)]
+            strength = self._strengths[key] = simulator.calculate_preflop_strength(hole)
+        return strength
+
+    def __call__(self, decision):
+        key = (decision['hand_class'], decision['players'], decision['position'],
+               decision['to_call'], decision['pot'])
+        action = self._decisions.get(key)
+        if action is None:
+            action = self._decisions[key] = self._decide(decision)
+        return action
+
+    def _decide(self, decision):
+        hand_type, strength = self._strength(decision['hand_class'], decision['players'])
+        to_call, position = decision['to_call'], decision['position']
+        pot_odds = to_call / (decision['pot'] + to_call) if to_call else 0
+        is_blind = position in ["small_blind", "big_blind"]
+        equity = poker_preflop.class_equity(decision['hand_class'],
+                                            min(decision['players'] - 1, poker_preflop.MAX_OPPONENTS))
+        action, _ = get_betting_recommendation(hand_type, strength, pot_odds, position, is_blind, equity)
+        if action in ("Raise", "Call/Raise"):
+            return 'raise'
+        if action in ("Call", "Check/Call"):
+            return 'call'
+        return 'call' if to_call == 0 else 'fold'
+
+
+def load_policy(spec):
+    """Return a policy from a 'module:attribute' spec, instantiating classes; None means the default."""
+    if spec is None:
+        return RecommendationPolicy()
+    module, _, name = spec.partition(':')
+    if not name:
+        raise ValueError(f"Invalid policy {spec}. Use 'module:attribute'.")
+    policy = getattr(importlib.import_module(module), name)
+    return policy() if isinstance(policy, type) else policy
+
+
+class SelfPlayStats:
+    """Aggregate net big blinds per position and per starting-hand class."""
+    def __init__(self):
+        self.hands = 0
+        self.by_position = {}
+        self.by_class = {}
+
+    def add(self, position, hand_class, net, played):
+        """Add the result of one seat in one hand."""
+        for table, key in ((self.by_position, position), (self.by_class, hand_class)):
+            bucket = table.get(key)
+            if bucket is None:
+                bucket = table[key] = [0, 0.0, 0]
+            bucket[0] += 1
+            bucket[1] += net
+            bucket[2] += played
+
+    def merge(self, other):
+        """Add the totals of another SelfPlayStats (or its to_raw() form) to this one."""
+        if isinstance(other, dict):
+            hands, by_position, by_class = other['hands'], other['by_position'], other['by_class']
+        else:
+            hands, by_position, by_class = other.hands, other.by_position, other.by_class
+        self.hands += hands
+        for mine, theirs in ((self.by_position, by_position), (self.by_class, by_class)):
+            for key, (count, net, played) in theirs.items():
+                bucket = mine.setdefault(key, [0, 0.0, 0])
+                bucket[0] += count
+                bucket[1] += net
+                bucket[2] += played
+        return self
+
+    def to_raw(self):
+        """Return the totals as plain containers for passing between processes."""
+        return {'hands': self.hands, 'by_position': self.by_position, 'by_class': self.by_class}
+
+    @staticmethod
+    def _summary(table, name=str):
+        summary = {}
+        for key in sorted(table):
+            count, net, played = table[key]
+            summary[name(key)] = {
+                'hands': count,
+                'net_bb': net,
+                'bb_per_100': 100 * net / count,
+                'played': played / count,
+            }
+        return summary
+
+    def to_dict(self):
+        """Return the results as a JSON-serializable dict with bb/100 per bucket."""
+        return {
+            'hands': self.hands,
+            'by_position': self._summary(self.by_position),
+            'by_class': self._summary(self.by_class, poker_preflop.class_name),
+        }
+
+
+def play_hand(players, policies, rng, stats=None, positions=None):
+    """Deal and play one hand and return the net big blinds of every seat (seat 1 first)."""
+    # Partial Fisher-Yates draw of the hole cards and the board
+    deck = list(range(52))
+    needed = 2 * players + 5
+    rand = rng.random
+    for i in range(51, 51 - needed, -1):
+        j = int(rand() * (i + 1))
+        deck[i], deck[j] = deck[j], deck[i]
+    dealt = deck[52 - needed:]
+    holes = [(dealt[2 * s], dealt[2 * s + 1]) for s in range(players)]
+    board = dealt[2 * players:]
+
+    if positions is None:
+        positions = [get_position_name(players, s + 1) for s in range(players)]
+    classes = [CLASS_OF[a * 52 + b] for a, b in holes]
+    bets = [0.0] * players
+    bets[0], bets[1] = SMALL_BLIND, BIG_BLIND
+    active = [True] * players
+    in_hand = players
+    current = BIG_BLIND
+    raises = 0
+    pending = players  # players who still have to act on the current bet
+    seat = 2 % players  # first to act preflop sits after the big blind
+    while pending and in_hand > 1:
+        if active[seat]:
+            to_call = current - bets[seat]
+            action = policies[seat]({
+                'position': positions[seat], 'seat': seat + 1, 'players': players,
+                'hole': holes[seat], 'hand_class': classes[seat],
+                'to_call': to_call, 'pot': sum(bets), 'raises': raises,
+            })
+            if action == 'raise' and raises < MAX_RAISES:
+                current *= RAISE_FACTOR
+                raises += 1
+                bets[seat] = current
+                pending = in_hand
+            elif action == 'fold' and to_call > 0:
+                active[seat] = False
+                in_hand -= 1
+            else:
+                bets[seat] = current
+            pending -= 1
+        seat = (seat + 1) % players
+
+    pot = sum(bets)
+    if in_hand == 1:
+        winners = [active.index(True)]
+    else:
+        board_key = 0
+        for c in board:
+            board_key += CARD_KEYS[c]
+        best, winners = -1, []
+        for s in range(players):
+            if active[s]:
+                a, b = holes[s]
+                strength = strength_from_key(board_key + CARD_KEYS[a] + CARD_KEYS[b])
+                if strength > best:
+                    best, winners = strength, [s]
+                elif strength == best:
+                    winners.append(s)
+    share = pot / len(winners)
+    net = [-bet for bet in bets]
+    for s in winners:
+        net[s] += share
+
+    if stats is not None:
+        stats.hands += 1
+        for s in range(players):
+            # Posting a blind and checking isn't voluntary
+            played = active[s] and bets[s] > (BIG_BLIND if s == 1 else 0)
+            stats.add(positions[s], classes[s], net[s], played)
+    return net
+
+
+def simulate(players, hands, seed=None, policies=None):
+    """Play hands in this process and return a SelfPlayStats.
+
+    ``policies`` is one policy for every seat or a list with one per seat.
+    """
+    if not 3 <= players <= 9:
+        raise ValueError("Self-play needs 3 to 9 players.")
+    if policies is None:
+        policies = RecommendationPolicy()
+    if not isinstance(policies, (list, tuple)):
+        policies = [policies] * players
+    if len(policies) != players:
+        raise ValueError(f"Need {players} policies, got {len(policies)}.")
+
+    rng = random.Random(seed)
+    stats = SelfPlayStats()
+    positions = [get_position_name(players, s + 1) for s in range(players)]
+    for _ in range(hands):
+        play_hand(players, policies, rng, stats, positions)
+    return stats
+
+
+def _run_shard(args):
+    players, hands, seed, policy_specs = args
+    policies = [load_policy(spec) for spec in policy_specs]
+    return simulate(players, hands, seed, policies).to_raw()
+
+
+def parallel_simulate(players, hands, seed=0, policy_specs=None, workers=None):
+    """Play hands in shards over the shared process pool and return the merged SelfPlayStats.
+
+    Policies are given as 'module:attribute' specs (see load_policy), one for
+    every seat or a list with one per seat, so that workers can load them.
+    """
+    if not isinstance(policy_specs, (list, tuple)):
+        policy_specs = [policy_specs] * players
+    shards = []
+    for index, start in enumerate(range(0, hands, SHARD_HANDS)):
+        shards.append((players, min(SHARD_HANDS, hands - start),
+                       poker_equity.shard_seed(seed, index), list(policy_specs)))
+    if workers == 1 or len(shards) == 1:
+        results = map(_run_shard, shards)
+    else:
+        results = poker_equity.get_pool(workers).map(_run_shard, shards)
+
+    total = SelfPlayStats()
+    for raw in results:
+        total.merge(raw)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure betting policies by self-play.")
+    parser.add_argument('--players', type=int, default=6, help="players at the table (3-9)")
+    parser.add_argument('--hands', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--policy', default=None,
+                        help="'module:attribute' policy for every seat (default: the recommendation policy)")
+    parser.add_argument('--seat-policy', action='append', default=[], metavar='SEAT=SPEC',
+                        help="policy for one seat, e.g. 3=my_bots:TightPolicy")
+    args = parser.parse_args(argv)
+
+    specs = [args.policy] * args.players
+    for item in args.seat_policy:
+        seat, _, spec = item.partition('=')
+        if not seat.isdigit() or not 1 <= int(seat) <= args.players:
+            parser.error(f"Invalid seat policy: {item}")
+        specs[int(seat) - 1] = spec
+    stats = parallel_simulate(args.players, args.hands, args.seed, specs, args.workers)
+    json.dump(stats.to_dict(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
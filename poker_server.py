@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""HTTP service exposing the Python analysis engine to the browser UI.
+
+Run with ``python poker_server.py`` and open http://localhost:5000/.
+
+Analysis results are kept in a bounded LRU cache keyed by the
+suit-canonicalized situation (hole cards, board, opponents, position), so
+repeated queries and queries that only differ by suits are answered without
+recomputation. Pot odds only feed the cheap recommendation step and are
+applied per request. With ``--disk-cache`` analyses are also kept in a
+sqlite file (see poker_cache), so a restarted server doesn't start cold.
+
+``POST /api/batch`` takes a list of situations and streams one NDJSON line
+per situation as soon as it is done, computing the uncached ones on the
+shared worker pool of poker_equity.
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import as_completed
+
+from flask import Flask, Response, jsonify, request, send_from_directory
+
+import poker_cache
+import poker_equity
+import poker_evaluator
+import poker_metrics
+import poker_outs
+import poker_preflop
+from poker_assistant import PokerSimulator
+from poker_game import (get_betting_recommendation, get_narrowed_potential, get_position_name,
+                        get_postflop_recommendation, get_pushfold_recommendation, get_pushfold_spot)
+
+STATIC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cached situations and Monte Carlo trials per postflop equity
+CACHE_SIZE = 10000
+EQUITY_ITERATIONS = 20000
+# Most situations accepted by one batch request
+BATCH_LIMIT = 5000
+# Worker processes for batches (None = all cores, 1 = compute in the server process)
+batch_workers = None
+# Persistent poker_cache.DiskCache behind the memory cache, set by --disk-cache
+disk_cache = None
+
+
+class LRUCache:
+    """A thread-safe least-recently-used cache with a fixed number of entries."""
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Return size and hit statistics as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+cache = LRUCache()
+
+
+def _cards(value):
+    """Accept 'AhKh', 'Ah Kh' or ['Ah', 'Kh'] and return card ids."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.replace(' ', '').replace(',', '')
+        value = [value[i:i + 2] for i in range(0, len(value), 2)]
+    return poker_evaluator.card_ids(value)
+
+
+def parse_situation(data):
+    """Validate a situation dict from a request and return it normalized.
+
+    Accepts 'hole', 'board', 'num_opponents', 'position' (or 'players' and
+    'seat' as in poker_game), 'pot_size' and 'opponent_bets', and for the
+    push/fold charts preflop 'big_blind' with the player's 'stack' or the
+    'stacks' of every seat (seat 1 first). With 'players' and 'seat' the
+    bets are in the order poker_game asks for them, starting after the
+    player; with 'position' they are the bets of the players who acted
+    before, from the small blind, as the UI asks for them. 'bets_by_seat'
+    puts them at their seats when the seat is known.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object.")
+    hole = _cards(data.get('hole'))
+    board = _cards(data.get('board'))
+    if len(hole) != 2:
+        raise ValueError("Need exactly 2 hole cards.")
+    if len(board) not in (0, 3, 4, 5):
+        raise ValueError("The board must have 0, 3, 4 or 5 cards.")
+    if len(set(hole + board)) != len(hole) + len(board):
+        raise ValueError("Cards must not repeat.")
+
+    opponent_bets = [float(bet) for bet in data.get('opponent_bets', [])]
+    if 'position' in data:
+        position = str(data['position'])
+        num_opponents = int(data.get('num_opponents', 1))
+        players = num_opponents + 1
+        seats = [s for s in range(1, players + 1) if get_position_name(players, s) == position]
+        seat = seats[0] if seats else None
+        bets_by_seat = None
+        if seat is not None and len(opponent_bets) < seat:
+            bets_by_seat = opponent_bets + [0.0] * (players - len(opponent_bets))
+    else:
+        players, seat = int(data['players']), int(data['seat'])
+        position = get_position_name(players, seat)
+        num_opponents = int(data.get('num_opponents', players - 1))
+        bets_by_seat = [0.0] * players
+        for i, bet in enumerate(opponent_bets[:players - 1], 1):
+            bets_by_seat[(seat - 1 + i) % players] = bet
+    if not 1 <= num_opponents <= poker_preflop.MAX_OPPONENTS:
+        raise ValueError(f"Number of opponents must be between 1 and {poker_preflop.MAX_OPPONENTS}.")
+
+    pot_size = float(data.get('pot_size', 0))
+    if pot_size < 0 or any(bet < 0 for bet in opponent_bets):
+        raise ValueError("Pot size and bets must not be negative.")
+    big_blind = float(data.get('big_blind', 0))
+    stacks = None
+    if data.get('stacks') is not None:
+        stacks = [float(s) for s in data['stacks']]
+        if len(stacks) != players:
+            raise ValueError(f"Need {players} stacks, one per seat.")
+    stack = float(data['stack']) if data.get('stack') is not None else \
+        stacks[seat - 1] if stacks is not None and seat is not None else 0.0
+    if big_blind < 0 or stack < 0 or stacks is not None and any(s < 0 for s in stacks):
+        raise ValueError("Blinds and stacks must not be negative.")
+    return {'hole': hole, 'board': board, 'num_opponents': num_opponents,
+            'position': position, 'pot_size': pot_size, 'opponent_bets': opponent_bets,
+            'players': players, 'seat': seat, 'bets_by_seat': bets_by_seat,
+            'big_blind': big_blind, 'stack': stack, 'stacks': stacks}
+
+
+def situation_key(situation):
+    """Return the cache key of a parsed situation."""
+    return (poker_equity.canonical_situation(situation['hole'], situation['board']),
+            situation['num_opponents'], situation['position'])
+
+
+def compute_analysis(hole, board, num_opponents, position):
+    """Run the engine on one situation and return the suit-independent analysis."""
+    simulator = PokerSimulator()
+    simulator.position = position
+    simulator.num_opponents = num_opponents
+    simulator.set_hole_cards([poker_evaluator.card_str(c) for c in hole])
+    if not board:
+        hand_type, strength = simulator.calculate_preflop_strength()
+        return {'stage': 'preflop', 'hand_type': hand_type, 'hand_strength': strength,
+                'equity': {'equity': simulator.calculate_preflop_equity(), 'exact': False},
+                'made_hand': None}
+
+    simulator.set_community_cards([poker_evaluator.card_str(c) for c in board])
+    made_hand = poker_evaluator.strength_type(poker_evaluator.evaluate(hole + board))
+    equity = simulator.calculate_equity(iterations=EQUITY_ITERATIONS, seed=0)
+    # Winning against n opponents takes roughly beating each of them, so
+    # equity ** (1 / n) puts multiway spots on the same scale as heads-up
+    strength = equity['equity'] ** (1.0 / num_opponents)
+    potential = simulator.calculate_hand_potential() if len(board) < 5 else None
+    return {'stage': simulator.stage, 'hand_type': made_hand, 'hand_strength': strength,
+            'equity': equity, 'made_hand': made_hand, 'potential': potential}
+
+
+def _disk_key(key):
+    (hole, board), num_opponents, position = key
+    return ('analysis', hole, board, num_opponents, position, EQUITY_ITERATIONS)
+
+
+def cached_analysis(key):
+    """Return the analysis of a situation key from the memory or the disk cache, or None."""
+    analysis = cache.get(key)
+    poker_metrics.cache_lookup('analysis', analysis is not None)
+    if analysis is None and disk_cache is not None:
+        analysis = disk_cache.get(_disk_key(key))
+        poker_metrics.cache_lookup('analysis_disk', analysis is not None)
+        if analysis is not None:
+            cache.put(key, analysis)
+    return analysis
+
+
+def store_analysis(key, analysis):
+    """Put a computed analysis into the memory cache and the disk cache."""
+    cache.put(key, analysis)
+    if disk_cache is not None:
+        disk_cache.put(_disk_key(key), analysis)
+
+
+def get_analysis(situation):
+    """Return (analysis, cached) for a parsed situation, going through the caches."""
+    key = situation_key(situation)
+    analysis = cached_analysis(key)
+    if analysis is not None:
+        return analysis, True
+    (hole, board), num_opponents, position = key
+    analysis = compute_analysis(list(hole), list(board), num_opponents, position)
+    store_analysis(key, analysis)
+    return analysis, False
+
+
+def respond(situation, analysis, cached):
+    """Combine a situation and its analysis into a response dict with a recommendation."""
+    total_bets = sum(situation['opponent_bets'])
+    pot_odds = 0
+    if total_bets > 0:
+        pot_odds = total_bets / (situation['pot_size'] + total_bets)
+    position = situation['position']
+    is_blind = position in ["small_blind", "big_blind"]
+    potential = analysis.get('potential')
+    if potential is not None and situation['opponent_bets']:
+        # The bets narrow the opponents' ranges, so the potential behind the
+        # recommendation is worked out per situation and not cached
+        potential = get_narrowed_potential(situation['hole'], situation['board'], situation['opponent_bets'],
+                                           situation['pot_size'], situation['num_opponents'])
+    pushfold = None
+    if analysis['stage'] == 'preflop' and situation['bets_by_seat'] is not None:
+        players, seat, by_seat = situation['players'], situation['seat'], situation['bets_by_seat']
+        bets = [by_seat[(seat - 1 + i) % players] for i in range(1, players)]
+        pushfold = get_pushfold_spot(players, seat, bets, situation['stack'], situation['big_blind'],
+                                     situation['stacks'])
+    if pushfold is not None:
+        action, reason = get_pushfold_recommendation(situation['hole'], *pushfold)
+    elif analysis['stage'] == 'preflop':
+        action, reason = get_betting_recommendation(
+            analysis['hand_type'], analysis['hand_strength'], pot_odds, position, is_blind,
+            analysis['equity']['equity'])
+    elif potential:
+        action, reason = get_postflop_recommendation(potential['ehs'], potential['ppot'], pot_odds)
+    else:
+        action, reason = get_postflop_recommendation(analysis['hand_strength'], 0.0, pot_odds)
+
+    result = dict(analysis)
+    result.update({'position': position, 'pot_odds': pot_odds, 'cached': cached,
+                   'recommendation': {'action': action, 'reason': reason}})
+    if potential is not None:
+        result['potential'] = potential
+    if pushfold is not None:
+        result['push_fold'] = {'stack_bb': pushfold[0], 'facing_push': pushfold[1]}
+    # Outs name actual cards, so they come from the situation and not the shared analysis
+    if len(situation['board']) in (3, 4):
+        result['outs'] = poker_outs.outs(situation['hole'], situation['board'])
+    return result
+
+
+def analyze(data):
+    """Analyze one situation dict and return the response dict with a recommendation."""
+    situation = parse_situation(data)
+    analysis, cached = get_analysis(situation)
+    return respond(situation, analysis, cached)
+
+
+def analyze_batch(items, workers=None):
+    """Analyze a list of situation dicts, yielding response dicts in completion order.
+
+    Every result carries the 'index' of its situation in ``items``. Invalid
+    situations yield {'index': i, 'error': message}. Cached situations come
+    first; the rest are computed on the shared process pool, once per
+    distinct cache key, and yielded as each one finishes.
+    """
+    if not isinstance(items, list):
+        raise ValueError("Expected a list of situations.")
+    if len(items) > BATCH_LIMIT:
+        raise ValueError(f"At most {BATCH_LIMIT} situations per batch.")
+
+    pending = {}
+    for index, data in enumerate(items):
+        try:
+            situation = parse_situation(data)
+        except (ValueError, KeyError, TypeError) as e:
+            yield {'index': index, 'error': str(e)}
+            continue
+        key = situation_key(situation)
+        analysis = cached_analysis(key)
+        if analysis is not None:
+            yield dict(respond(situation, analysis, True), index=index)
+        else:
+            pending.setdefault(key, []).append((index, situation))
+
+    def finish(key, analysis):
+        store_analysis(key, analysis)
+        for index, situation in pending[key]:
+            yield dict(respond(situation, analysis, False), index=index)
+
+    if workers == 1 or len(pending) <= 1:
+        for key in pending:
+            (hole, board), num_opponents, position = key
+            yield from finish(key, compute_analysis(list(hole), list(board), num_opponents, position))
+        return
+
+    pool = poker_equity.get_pool(workers)
+    futures = {}
+    for key in pending:
+        (hole, board), num_opponents, position = key
+        futures[pool.submit(compute_analysis, list(hole), list(board), num_opponents, position)] = key
+    for future in as_completed(futures):
+        key = futures[future]
+        try:
+            analysis = future.result()
+        except Exception as e:
+            for index, _ in pending[key]:
+                yield {'index': index, 'error': str(e)}
+            continue
+        yield from finish(key, analysis)
+
+
+app = Flask(__name__)
+
+
+@app.errorhandler(ValueError)
+@app.errorhandler(KeyError)
+@app.errorhandler(TypeError)
+def bad_request(error):
+    return jsonify({'error': str(error)}), 400
+
+
+@app.route('/')
+def index():
+    return send_from_directory(STATIC_DIR, 'index.html')
+
+
+@app.route('/poker_ui.js')
+def ui_script():
+    return send_from_directory(STATIC_DIR, 'poker_ui.js')
+
+
+@app.route('/api/analyze', methods=['POST'])
+def api_analyze():
+    return jsonify(analyze(request.get_json(force=True)))
+
+
+def budgeted_equity(situation, deadline_ms=None, target_width=None, confidence=0.95):
+    """Calculate the equity of a situation within a time budget, bypassing the analysis cache."""
+    simulator = PokerSimulator()
+    simulator.num_opponents = situation['num_opponents']
+    simulator.set_hole_cards([poker_evaluator.card_str(c) for c in situation['hole']])
+    simulator.set_community_cards([poker_evaluator.card_str(c) for c in situation['board']])
+    return simulator.calculate_equity_within(deadline_ms, target_width, confidence)
+
+
+@app.route('/api/equity', methods=['POST'])
+def api_equity():
+    """Return the equity of a situation; 'deadline_ms' or 'target_width' bound the time spent."""
+    data = request.get_json(force=True)
+    situation = parse_situation(data)
+    if isinstance(data, dict) and (data.get('deadline_ms') is not None or data.get('target_width') is not None):
+        deadline_ms, target_width = data.get('deadline_ms'), data.get('target_width')
+        equity = budgeted_equity(situation,
+                                 None if deadline_ms is None else float(deadline_ms),
+                                 None if target_width is None else float(target_width),
+                                 float(data.get('confidence', 0.95)))
+        return jsonify({'equity': equity, 'cached': False})
+    analysis, cached = get_analysis(situation)
+    return jsonify({'equity': analysis['equity'], 'cached': cached})
+
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """Stream the analyses of {'situations': [...]} (or a bare list) as NDJSON."""
+    data = request.get_json(force=True)
+    items = data.get('situations') if isinstance(data, dict) else data
+    results = analyze_batch(items, batch_workers)
+    first = next(results, None)  # raises bad requests before the stream starts
+
+    def stream():
+        if first is not None:
+            yield json.dumps(first) + '\n'
+        for result in results:
+            yield json.dumps(result) + '\n'
+
+    return Response(stream(), mimetype='application/x-ndjson')
+
+
+@app.route('/api/cache')
+def api_cache():
+    info = cache.info()
+    if disk_cache is not None:
+        info['disk'] = disk_cache.info()
+    return jsonify(info)
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(poker_metrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/metrics', methods=['GET', 'POST'])
+def api_metrics():
+    """Return the metrics snapshot; POST {'enabled': bool} and/or {'reset': true} to control recording."""
+    if request.method == 'POST':
+        data = request.get_json(force=True)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object.")
+        if data.get('reset'):
+            poker_metrics.reset()
+        if 'enabled' in data:
+            if data['enabled']:
+                poker_metrics.enable()
+            else:
+                poker_metrics.disable()
+    return jsonify(poker_metrics.snapshot())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the poker analysis service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for batch requests (default: all cores)")
+    parser.add_argument('--metrics', action='store_true', help="record metrics from the start")
+    parser.add_argument('--disk-cache', metavar='PATH', nargs='?', const=poker_cache.CACHE_FILE,
+                        help="keep analyses in a sqlite file across restarts")
+    parser.add_argument('--disk-cache-size', type=int, default=poker_cache.DISK_CACHE_SIZE)
+    parser.add_argument('--prewarm', metavar='FILE', action='append', default=[],
+                        help="load the disk cache from a JSON lines export first")
+    args = parser.parse_args(argv)
+
+    global batch_workers, disk_cache
+    batch_workers = args.workers
+    cache.maxsize = args.cache_size
+    if args.disk_cache or args.prewarm:
+        disk_cache = poker_cache.DiskCache(args.disk_cache or poker_cache.CACHE_FILE, args.disk_cache_size)
+        for path in args.prewarm:
+            disk_cache.prewarm(path)
+    if args.metrics:
+        poker_metrics.enable()
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
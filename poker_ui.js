@@ -16,6 +16,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const numOpponents = document.getElementById('num-opponents');
     const potSize = document.getElementById('pot-size');
     const playerStack = document.getElementById('player-stack');
+    const bigBlind = document.getElementById('big-blind');
     const position = document.getElementById('position');
     
     // Button elements
@@ -47,6 +48,259 @@ document.addEventListener('DOMContentLoaded', function() {
         'T': '10', 'J': 'J', 'Q': 'Q', 'K': 'K', 'A': 'A'
     };
     
+    // Preflop percentile (the share of starting hands out-performed in all-in
+    // equity, in thousandths) of the 169 hand classes against 1-8 random
+    // opponents, from preflop_equity.bin. Rows and columns are rank indices
+    // ('2' = 0 ... 'A' = 12): pairs on the diagonal, suited hands at
+    // high * 13 + low, offsuit hands at low * 13 + high.
+    const preflopPercentiles = [
+        [ // 1 opponent
+             518,    5,   14,   32,   23,   41,   92,  149,  234,  318,  415,  525,  683,
+              65,  637,   50,   80,   59,   71,  101,  186,  267,  351,  454,  555,  719,
+              86,  143,  741,  116,  125,  137,  158,  195,  297,  379,  481,  606,  748,
+             110,  170,  228,  863,  176,  204,  220,  246,  309,  403,  511,  627,  799,
+             107,  164,  220,  276,  928,  258,  282,  327,  388,  430,  546,  662,  769,
+             131,  167,  240,  291,  357,  960,  342,  370,  439,  499,  588,  695,  821,
+             210,  213,  273,  333,  394,  448,  971,  463,  490,  573,  653,  729,  845,
+             252,  288,  303,  363,  424,  475,  540,  975,  564,  615,  704,  787,  879,
+             336,  360,  397,  409,  469,  534,  594,  647,  980,  674,  757,  857,  906,
+             421,  445,  472,  505,  537,  597,  641,  710,  793,  984,  811,  870,  922,
+             531,  579,  582,  600,  633,  668,  735,  775,  830,  839,  989,  891,  938,
+             621,  644,  689,  713,  738,  778,  805,  836,  897,  913,  932,  993,  950,
+             763,  781,  827,  851,  833,  885,  900,  916,  944,  956,  964,  967,  998
+        ],
+        [ // 2 opponents
+             419,    5,   14,   41,   32,   23,   50,   95,  164,  216,  333,  462,  623,
+             110,  574,   68,  104,   86,   77,   59,  116,  195,  273,  379,  495,  671,
+             173,  243,  714,  179,  155,  134,  125,  146,  261,  306,  403,  525,  707,
+             186,  288,  360,  797,  249,  237,  207,  225,  282,  354,  452,  584,  745,
+             170,  255,  348,  422,  877,  324,  315,  342,  370,  388,  516,  611,  736,
+             140,  231,  300,  415,  480,  930,  443,  428,  474,  504,  549,  662,  775,
+             189,  201,  297,  409,  489,  570,  968,  537,  564,  596,  647,  695,  822,
+             267,  291,  294,  397,  483,  578,  656,  975,  638,  683,  727,  766,  849,
+             363,  394,  412,  468,  543,  602,  689,  754,  980,  787,  804,  858,  899,
+             437,  434,  486,  531,  555,  629,  721,  793,  864,  984,  834,  884,  923,
+             510,  558,  590,  617,  653,  701,  760,  828,  870,  893,  989,  908,  940,
+             605,  632,  677,  718,  751,  781,  813,  867,  917,  934,  949,  993,  955,
+             757,  810,  816,  843,  840,  873,  890,  914,  946,  961,  964,  971,  998
+        ],
+        [ // 3 opponents
+             422,    5,   32,   59,   23,   14,   41,   68,  113,  170,  291,  403,  596,
+             164,  526,   95,  140,   86,   77,   50,  104,  149,  249,  309,  443,  635,
+             216,  300,  642,  210,  183,  158,  131,  122,  192,  282,  388,  486,  670,
+             243,  324,  428,  755,  273,  261,  237,  201,  228,  330,  415,  538,  724,
+             219,  303,  394,  532,  838,  367,  354,  318,  345,  379,  477,  569,  679,
+             176,  267,  397,  462,  563,  900,  468,  434,  498,  507,  519,  626,  745,
+             222,  255,  373,  492,  548,  655,  949,  587,  557,  605,  617,  694,  786,
+             297,  336,  360,  449,  544,  649,  751,  972,  703,  715,  736,  771,  831,
+             339,  409,  452,  459,  551,  661,  765,  807,  980,  801,  819,  854,  893,
+             425,  456,  529,  578,  581,  688,  759,  825,  878,  984,  866,  884,  928,
+             513,  575,  611,  652,  664,  709,  780,  848,  903,  919,  989,  913,  940,
+             646,  658,  685,  730,  762,  792,  810,  872,  922,  934,  953,  993,  962,
+             777,  795,  813,  845,  842,  860,  875,  906,  946,  956,  968,  976,  998
+        ],
+        [ // 4 opponents
+             443,   14,   41,   68,   23,    5,   32,   59,  113,  176,  246,  385,  557,
+             240,  526,  104,  140,   95,   77,   50,   86,  158,  204,  290,  412,  611,
+             276,  354,  633,  213,  195,  149,  131,  122,  167,  234,  339,  483,  658,
+             321,  406,  513,  707,  303,  270,  255,  222,  186,  290,  397,  519,  694,
+             261,  391,  492,  544,  805,  376,  363,  348,  327,  315,  436,  538,  670,
+             228,  309,  474,  532,  626,  873,  468,  459,  449,  427,  501,  602,  719,
+             264,  279,  418,  529,  593,  682,  928,  569,  620,  587,  640,  649,  768,
+             333,  357,  370,  507,  581,  688,  777,  969,  738,  729,  750,  759,  798,
+             403,  421,  477,  495,  578,  703,  780,  830,  980,  821,  836,  848,  879,
+             489,  510,  548,  563,  575,  700,  783,  854,  913,  984,  866,  891,  906,
+             551,  596,  629,  664,  685,  710,  789,  857,  916,  935,  989,  922,  941,
+             676,  679,  713,  744,  774,  792,  811,  885,  932,  947,  965,  993,  956,
+             786,  808,  827,  842,  814,  860,  897,  900,  950,  962,  973,  976,  998
+        ],
+        [ // 5 opponents
+             502,    5,   50,   86,   32,   14,   23,   59,  131,  167,  240,  348,  516,
+             285,  544,  104,  158,   95,   68,   41,   77,  140,  204,  279,  421,  612,
+             342,  415,  603,  270,  190,  176,  122,  113,  149,  213,  303,  445,  646,
+             385,  496,  560,  704,  324,  249,  231,  190,  222,  258,  370,  475,  682,
+             318,  430,  525,  626,  775,  379,  357,  333,  312,  294,  397,  537,  637,
+             264,  388,  502,  618,  661,  848,  484,  466,  457,  409,  436,  584,  694,
+             288,  339,  427,  528,  667,  732,  904,  596,  575,  551,  566,  655,  738,
+             363,  391,  403,  510,  606,  750,  802,  951,  710,  719,  756,  765,  784,
+             451,  493,  490,  522,  670,  747,  793,  858,  977,  821,  842,  833,  882,
+             507,  531,  557,  590,  626,  744,  790,  864,  917,  984,  870,  894,  911,
+             621,  630,  664,  673,  688,  729,  805,  861,  920,  944,  989,  926,  938,
+             676,  700,  725,  771,  778,  796,  811,  876,  932,  955,  970,  993,  961,
+             799,  808,  827,  855,  814,  852,  888,  900,  947,  967,  973,  980,  998
+        ],
+        [ // 6 opponents
+             536,   32,   68,   95,   41,    5,   23,   50,  104,  158,  231,  332,  517,
+             373,  601,  140,  186,  113,   59,   14,   77,  122,  172,  249,  379,  608,
+             391,  490,  654,  294,  222,  172,  131,   86,  149,  213,  267,  415,  638,
+             445,  523,  626,  740,  357,  276,  258,  195,  204,  240,  348,  451,  661,
+             342,  481,  573,  644,  787,  397,  332,  315,  303,  285,  367,  496,  617,
+             309,  433,  511,  629,  691,  833,  472,  463,  439,  406,  427,  529,  682,
+             321,  385,  478,  597,  676,  768,  892,  552,  579,  543,  564,  591,  721,
+             388,  421,  457,  558,  670,  756,  793,  933,  733,  712,  697,  747,  780,
+             484,  487,  508,  505,  647,  765,  799,  882,  974,  827,  814,  846,  861,
+             502,  570,  585,  632,  650,  762,  790,  876,  926,  984,  870,  899,  908,
+             623,  673,  667,  688,  727,  753,  802,  879,  929,  949,  989,  920,  943,
+             703,  706,  759,  771,  774,  796,  808,  885,  937,  955,  970,  993,  961,
+             805,  821,  840,  852,  837,  855,  888,  914,  952,  967,  977,  980,  998
+        ],
+        [ // 7 opponents
+             642,   50,   77,  122,   23,    5,   32,   14,   95,  140,  231,  312,  499,
+             421,  670,  158,  222,  149,   68,   41,   59,  104,  204,  249,  348,  590,
+             457,  544,  711,  339,  258,  167,  113,   86,  131,  186,  267,  370,  617,
+             487,  566,  664,  749,  379,  285,  240,  195,  176,  213,  303,  439,  649,
+             424,  475,  608,  707,  784,  406,  357,  330,  294,  276,  321,  463,  572,
+             363,  469,  548,  661,  742,  803,  481,  451,  430,  394,  415,  508,  626,
+             385,  388,  490,  611,  724,  780,  880,  538,  602,  529,  517,  581,  686,
+             400,  445,  472,  554,  658,  759,  793,  927,  730,  677,  718,  698,  768,
+             493,  523,  551,  560,  667,  777,  799,  896,  968,  825,  813,  837,  852,
+             557,  563,  596,  632,  638,  739,  807,  884,  940,  981,  864,  890,  902,
+             635,  655,  692,  704,  756,  745,  796,  870,  943,  949,  989,  917,  934,
+             736,  762,  753,  774,  787,  790,  831,  911,  946,  955,  974,  993,  961,
+             819,  843,  858,  876,  846,  873,  908,  923,  952,  971,  977,  985,  998
+        ],
+        [ // 8 opponents
+             687,   50,   95,  122,   32,    5,   14,   41,   68,  149,  195,  285,  493,
+             460,  713,  213,  240,  140,   77,   23,   59,  113,  167,  258,  339,  569,
+             487,  581,  717,  388,  267,  176,  131,   86,  104,  204,  276,  367,  587,
+             551,  644,  701,  773,  397,  321,  231,  186,  158,  222,  303,  406,  620,
+             442,  523,  638,  742,  787,  427,  348,  312,  249,  294,  330,  436,  544,
+             382,  502,  578,  671,  760,  818,  468,  454,  415,  376,  357,  478,  605,
+             421,  445,  526,  641,  745,  780,  889,  557,  596,  517,  508,  535,  650,
+             448,  468,  484,  611,  709,  766,  802,  927,  733,  694,  665,  677,  724,
+             499,  529,  563,  614,  683,  754,  849,  899,  968,  796,  811,  828,  843,
+             575,  626,  629,  632,  659,  757,  834,  896,  943,  981,  858,  867,  905,
+             635,  656,  701,  706,  739,  748,  822,  882,  940,  961,  989,  917,  934,
+             751,  763,  769,  777,  783,  790,  852,  911,  946,  964,  974,  993,  955,
+             805,  837,  873,  879,  876,  885,  893,  923,  949,  971,  977,  985,  998
+        ]
+    ];
+    
+    // All-in equity (in thousandths) of the 169 hand classes against 1-8 random
+    // opponents, from preflop_equity.bin, laid out like preflopPercentiles.
+    const preflopEquities = [
+        [ // 1 opponent
+             503,  326,  332,  344,  338,  345,  371,  394,  416,  442,  472,  505,  548,
+             361,  538,  354,  367,  358,  366,  375,  403,  426,  454,  484,  512,  560,
+             370,  387,  569,  381,  383,  385,  395,  405,  438,  461,  494,  524,  571,
+             378,  398,  414,  605,  402,  406,  413,  422,  441,  470,  502,  533,  578,
+             376,  396,  413,  430,  633,  426,  435,  443,  462,  474,  510,  545,  575,
+             384,  396,  419,  438,  455,  661,  452,  461,  480,  496,  518,  551,  587,
+             409,  411,  426,  446,  465,  483,  691,  485,  494,  515,  540,  563,  600,
+             425,  437,  439,  460,  474,  493,  509,  720,  513,  532,  553,  578,  607,
+             449,  456,  465,  471,  490,  507,  521,  539,  747,  548,  573,  602,  623,
+             473,  483,  490,  500,  509,  522,  539,  555,  578,  774,  581,  607,  631,
+             505,  516,  518,  524,  536,  545,  564,  576,  596,  600,  797,  618,  644,
+             533,  539,  551,  556,  565,  576,  579,  599,  619,  626,  637,  824,  652,
+             573,  578,  592,  600,  598,  609,  622,  628,  648,  654,  662,  671,  854
+        ],
+        [ // 2 opponents
+             304,  196,  205,  215,  206,  206,  220,  229,  248,  264,  286,  312,  352,
+             238,  335,  225,  235,  228,  226,  222,  241,  259,  270,  295,  322,  362,
+             249,  266,  371,  254,  247,  244,  241,  246,  268,  283,  301,  327,  370,
+             255,  274,  290,  399,  268,  266,  264,  264,  273,  288,  312,  337,  385,
+             248,  268,  287,  305,  431,  286,  284,  286,  294,  295,  324,  348,  383,
+             245,  264,  282,  303,  318,  460,  309,  307,  315,  323,  330,  361,  391,
+             257,  261,  282,  302,  321,  335,  497,  328,  334,  341,  356,  368,  405,
+             270,  275,  281,  300,  319,  336,  360,  536,  355,  364,  375,  391,  418,
+             290,  295,  302,  312,  329,  348,  368,  386,  578,  392,  400,  419,  443,
+             308,  308,  320,  327,  333,  352,  375,  393,  420,  616,  411,  434,  457,
+             324,  334,  339,  349,  358,  368,  389,  408,  425,  441,  649,  445,  467,
+             348,  354,  363,  373,  385,  392,  402,  424,  449,  462,  473,  685,  483,
+             387,  401,  403,  414,  414,  427,  438,  446,  467,  483,  491,  505,  734
+        ],
+        [ // 3 opponents
+             222,  140,  148,  156,  147,  146,  154,  159,  172,  184,  202,  218,  254,
+             182,  240,  165,  174,  164,  161,  155,  166,  178,  195,  208,  230,  264,
+             188,  206,  265,  188,  186,  179,  173,  173,  187,  201,  216,  234,  272,
+             194,  209,  229,  289,  199,  198,  193,  187,  193,  210,  221,  243,  280,
+             189,  206,  217,  241,  315,  214,  213,  208,  213,  215,  234,  251,  273,
+             185,  199,  218,  234,  251,  342,  234,  229,  236,  236,  240,  262,  286,
+             192,  197,  215,  234,  248,  269,  376,  253,  250,  255,  260,  273,  297,
+             203,  212,  214,  230,  247,  265,  288,  413,  275,  278,  285,  294,  313,
+             212,  219,  230,  233,  250,  270,  293,  307,  450,  306,  310,  325,  339,
+             224,  232,  240,  252,  252,  273,  291,  311,  337,  494,  326,  339,  355,
+             239,  251,  257,  265,  271,  276,  297,  321,  343,  354,  535,  352,  370,
+             265,  269,  273,  284,  292,  297,  308,  332,  354,  366,  380,  582,  388,
+             296,  305,  309,  317,  316,  326,  334,  345,  371,  383,  401,  417,  639
+        ],
+        [ // 4 opponents
+             181,  108,  117,  122,  114,  105,  114,  119,  133,  143,  152,  172,  200,
+             151,  190,  130,  136,  129,  127,  119,  127,  139,  147,  159,  177,  205,
+             159,  168,  206,  149,  146,  139,  135,  133,  143,  150,  166,  185,  212,
+             164,  175,  189,  224,  161,  158,  152,  149,  146,  159,  174,  190,  221,
+             156,  172,  186,  196,  247,  171,  169,  167,  165,  163,  181,  194,  214,
+             150,  163,  183,  194,  205,  268,  183,  183,  182,  179,  188,  204,  226,
+             157,  159,  177,  193,  204,  218,  297,  201,  205,  204,  208,  210,  234,
+             166,  169,  169,  188,  204,  220,  236,  329,  229,  228,  230,  233,  245,
+             174,  179,  185,  187,  204,  222,  238,  255,  361,  253,  256,  262,  274,
+             185,  188,  196,  200,  203,  222,  239,  262,  289,  406,  266,  277,  288,
+             198,  204,  206,  212,  220,  225,  241,  263,  291,  304,  449,  293,  305,
+             215,  217,  226,  229,  234,  244,  251,  275,  298,  312,  326,  497,  323,
+             241,  250,  255,  260,  253,  266,  277,  280,  313,  324,  340,  354,  555
+        ],
+        [ // 5 opponents
+             155,   88,   96,  102,   91,   89,   91,   98,  108,  115,  126,  139,  160,
+             130,  162,  106,  114,  105,   98,   94,  102,  108,  119,  130,  148,  169,
+             137,  146,  169,  128,  118,  115,  107,  106,  113,  120,  134,  149,  175,
+             142,  154,  166,  187,  135,  126,  123,  118,  121,  128,  142,  153,  181,
+             135,  148,  160,  171,  200,  142,  140,  135,  134,  131,  145,  161,  174,
+             128,  143,  155,  169,  176,  220,  154,  151,  151,  146,  149,  167,  183,
+             131,  136,  148,  161,  177,  191,  240,  168,  167,  164,  167,  175,  191,
+             141,  144,  146,  160,  169,  191,  208,  268,  187,  188,  192,  194,  203,
+             149,  154,  154,  160,  177,  191,  205,  223,  300,  217,  220,  220,  229,
+             156,  161,  165,  168,  171,  191,  205,  225,  248,  337,  228,  235,  247,
+             170,  172,  177,  180,  182,  190,  209,  223,  249,  263,  382,  251,  260,
+             180,  184,  189,  196,  202,  207,  212,  229,  255,  271,  287,  432,  280,
+             207,  211,  218,  223,  213,  222,  230,  237,  265,  280,  289,  312,  490
+        ],
+        [ // 6 opponents
+             139,   78,   82,   86,   78,   72,   77,   81,   88,   96,  104,  115,  138,
+             118,  145,   94,   98,   90,   82,   76,   85,   91,   98,  104,  119,  146,
+             122,  132,  152,  111,  103,   98,   92,   86,   95,  102,  109,  124,  149,
+             127,  138,  147,  163,  118,  109,  105,   99,  100,  104,  117,  127,  153,
+             116,  131,  142,  151,  173,  122,  115,  114,  111,  109,  118,  133,  146,
+             112,  125,  137,  148,  158,  186,  130,  128,  126,  123,  125,  139,  155,
+             114,  120,  131,  145,  155,  168,  204,  140,  143,  140,  142,  144,  162,
+             121,  124,  127,  141,  153,  165,  179,  225,  163,  162,  159,  164,  173,
+             131,  132,  137,  137,  151,  166,  181,  199,  252,  186,  184,  193,  198,
+             135,  142,  143,  149,  151,  166,  178,  199,  222,  286,  198,  205,  208,
+             146,  154,  153,  156,  163,  165,  181,  199,  223,  230,  325,  218,  228,
+             159,  162,  166,  171,  172,  181,  183,  201,  227,  238,  252,  374,  243,
+             181,  186,  190,  194,  189,  197,  204,  210,  236,  245,  261,  278,  433
+        ],
+        [ // 7 opponents
+             131,   68,   74,   78,   67,   62,   67,   66,   76,   80,   90,   98,  119,
+             107,  137,   83,   89,   80,   73,   67,   71,   77,   87,   91,  102,  126,
+             111,  122,  139,  100,   92,   84,   77,   74,   79,   85,   94,  103,  128,
+             116,  126,  135,  143,  103,   96,   90,   86,   84,   88,   97,  109,  131,
+             108,  115,  127,  139,  155,  107,  102,  100,   97,   94,   99,  111,  126,
+             103,  112,  122,  134,  143,  161,  115,  110,  109,  106,  107,  119,  128,
+             105,  106,  117,  127,  141,  151,  175,  122,  126,  121,  119,  126,  138,
+             106,  109,  112,  124,  133,  147,  159,  194,  141,  137,  140,  138,  148,
+             119,  120,  123,  125,  136,  150,  161,  176,  217,  165,  162,  167,  169,
+             125,  125,  126,  130,  131,  143,  161,  175,  197,  243,  171,  176,  179,
+             131,  132,  138,  138,  147,  143,  160,  173,  200,  210,  284,  188,  195,
+             142,  147,  147,  148,  157,  158,  167,  182,  205,  214,  226,  330,  217,
+             163,  169,  171,  174,  169,  173,  180,  190,  210,  220,  232,  251,  384
+        ],
+        [ // 8 opponents
+             122,   60,   66,   70,   59,   54,   55,   60,   64,   72,   76,   83,  104,
+             100,  126,   76,   79,   72,   64,   56,   63,   69,   73,   81,   89,  110,
+             103,  111,  126,   92,   82,   74,   70,   65,   69,   76,   82,   91,  113,
+             108,  118,  124,  135,   92,   87,   79,   75,   72,   77,   84,   95,  114,
+              97,  106,  118,  129,  141,   96,   89,   86,   81,   84,   88,   96,  108,
+              91,  105,  111,  121,  132,  146,  101,   99,   96,   91,   90,  103,  113,
+              96,   98,  107,  118,  129,  138,  159,  108,  113,  106,  106,  108,  120,
+              98,  101,  103,  113,  125,  135,  144,  172,  128,  122,  120,  121,  127,
+             105,  107,  108,  114,  122,  131,  149,  162,  192,  144,  145,  148,  149,
+             111,  115,  116,  118,  120,  132,  148,  161,  182,  214,  153,  155,  163,
+             118,  120,  124,  125,  128,  129,  147,  159,  180,  191,  250,  170,  175,
+             130,  133,  135,  136,  139,  143,  150,  166,  183,  192,  205,  289,  190,
+             145,  148,  155,  158,  156,  159,  161,  170,  187,  197,  213,  226,  347
+        ]
+    ];
+    
     // Function to update card display
     function updateCardDisplay(cardElement, rank, suit) {
         if (!rank || !suit) {
@@ -68,16 +322,23 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Function to calculate preflop hand strength
-    function calculatePreflopStrength(card1, card2) {
+    function calculatePreflopStrength(card1, card2, opponents) {
+        // Percentile of the hand's class against the number of opponents
+        const high = Math.max(getRankValue(card1.rank), getRankValue(card2.rank)) - 2;
+        const low = Math.min(getRankValue(card1.rank), getRankValue(card2.rank)) - 2;
+        const index = card1.suit === card2.suit ? high * 13 + low : low * 13 + high;
+        const row = preflopPercentiles[Math.min(Math.max(opponents || 1, 1), 8) - 1];
+        const strength = row[index] / 1000;
+        
         // Check for pairs
         if (card1.rank === card2.rank) {
             const rankValue = getRankValue(card1.rank);
             if (rankValue >= 10) { // JJ, QQ, KK, AA
-                return { type: 'premium_pair', strength: 0.85 };
+                return { type: 'premium_pair', strength: strength };
             } else if (rankValue >= 7) { // 77, 88, 99, TT
-                return { type: 'medium_pair', strength: 0.7 };
+                return { type: 'medium_pair', strength: strength };
             } else { // 22, 33, 44, 55, 66
-                return { type: 'small_pair', strength: 0.55 };
+                return { type: 'small_pair', strength: strength };
             }
         }
         
@@ -101,28 +362,36 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Categorize hand
         if (broadway && suited) {
-            return { type: 'suited_broadway', strength: 0.8 };
+            return { type: 'suited_broadway', strength: strength };
         } else if (broadway) {
-            return { type: 'broadway', strength: 0.7 };
+            return { type: 'broadway', strength: strength };
         } else if (suited && connected) {
-            return { type: 'suited_connector', strength: 0.65 };
+            return { type: 'suited_connector', strength: strength };
         } else if (connected && highValue >= 10) {
-            return { type: 'high_connector', strength: 0.6 };
+            return { type: 'high_connector', strength: strength };
         } else if (suited && highCard.rank === 'A') {
-            return { type: 'ace_suited', strength: 0.65 };
+            return { type: 'ace_suited', strength: strength };
         } else if (suited && oneGap) {
-            return { type: 'suited_one_gapper', strength: 0.55 };
+            return { type: 'suited_one_gapper', strength: strength };
         } else if (connected) {
-            return { type: 'connector', strength: 0.5 };
+            return { type: 'connector', strength: strength };
         } else if (suited) {
-            return { type: 'suited', strength: 0.45 };
+            return { type: 'suited', strength: strength };
         } else if (highCard.rank === 'A') {
-            return { type: 'ace_high', strength: 0.4 };
+            return { type: 'ace_high', strength: strength };
         } else {
-            return { type: 'unconnected', strength: 0.3 };
+            return { type: 'unconnected', strength: strength };
         }
     }
     
+    // Function to look up the all-in equity of a hand against random opponents
+    function calculatePreflopEquity(card1, card2, opponents) {
+        const high = Math.max(getRankValue(card1.rank), getRankValue(card2.rank)) - 2;
+        const low = Math.min(getRankValue(card1.rank), getRankValue(card2.rank)) - 2;
+        const index = card1.suit === card2.suit ? high * 13 + low : low * 13 + high;
+        return preflopEquities[Math.min(Math.max(opponents || 1, 1), 8) - 1][index] / 1000;
+    }
+    
     // Function to get rank value
     function getRankValue(rank) {
         const rankValues = {
@@ -133,22 +402,22 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Function to get betting recommendation
-    function getBettingRecommendation(handType, handStrength, potOdds, position) {
+    function getBettingRecommendation(handType, handStrength, potOdds, position, equity) {
         if (position === "small_blind") {
-            if (handStrength >= 0.8) { // Very strong hand
+            if (handStrength >= 0.95) { // Very strong hand
                 return {
                     action: "Raise",
                     reason: "You have a very strong hand in the small blind. Consider raising 4-5x the big blind.",
                     class: "raise"
                 };
-            } else if (handStrength >= 0.6) { // Strong hand
+            } else if (handStrength >= 0.79) { // Strong hand
                 return {
                     action: "Call/Raise",
                     reason: "You have a strong hand. Consider completing the blind or raising 3x the big blind.",
                     class: "raise"
                 };
-            } else if (handStrength >= 0.4) { // Medium hand
-                if (potOdds > handStrength) {
+            } else if (handStrength >= 0.47) { // Medium hand
+                if (potOdds > equity) {
                     return {
                         action: "Fold",
                         reason: "Your hand is marginal and the pot odds aren't favorable. Consider folding to a raise.",
@@ -168,20 +437,20 @@ document.addEventListener('DOMContentLoaded', function() {
                 };
             }
         } else if (position === "big_blind") {
-            if (handStrength >= 0.8) { // Very strong hand
+            if (handStrength >= 0.95) { // Very strong hand
                 return {
                     action: "Raise",
                     reason: "You have a very strong hand in the big blind. Consider raising 3-4x if there's action.",
                     class: "raise"
                 };
-            } else if (handStrength >= 0.6) { // Strong hand
+            } else if (handStrength >= 0.79) { // Strong hand
                 return {
                     action: "Call/Raise",
                     reason: "You have a strong hand. Consider raising if there's one limper, call if raised.",
                     class: "raise"
                 };
-            } else if (handStrength >= 0.4) { // Medium hand
-                if (potOdds > handStrength) {
+            } else if (handStrength >= 0.47) { // Medium hand
+                if (potOdds > equity) {
                     return {
                         action: "Check/Fold",
                         reason: "Your hand is marginal. Check if no raise, fold to significant action.",
@@ -201,13 +470,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 };
             }
         } else if (position === "under_the_gun" || position.startsWith("under_the_gun_plus")) {
-            if (handStrength >= 0.8) { // Very strong hand
+            if (handStrength >= 0.95) { // Very strong hand
                 return {
                     action: "Raise",
                     reason: "You have a very strong hand in early position. Open with 3x the big blind.",
                     class: "raise"
                 };
-            } else if (handStrength >= 0.65) { // Strong hand
+            } else if (handStrength >= 0.8) { // Strong hand
                 return {
                     action: "Raise",
                     reason: "You have a strong hand. Consider opening with 2.5x the big blind.",
@@ -221,13 +490,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 };
             }
         } else if (position === "middle_position" || position === "middle_position_1" || position === "hijack") {
-            if (handStrength >= 0.8) { // Very strong hand
+            if (handStrength >= 0.95) { // Very strong hand
                 return {
                     action: "Raise",
                     reason: "You have a very strong hand. Open with 2.5-3x the big blind.",
                     class: "raise"
                 };
-            } else if (handStrength >= 0.5) { // Strong to medium hand
+            } else if (handStrength >= 0.68) { // Strong to medium hand
                 return {
                     action: "Raise",
                     reason: "You have a playable hand in middle position. Consider raising 2.5x the big blind.",
@@ -241,13 +510,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 };
             }
         } else if (position === "cutoff" || position === "button") {
-            if (handStrength >= 0.8) { // Very strong hand
+            if (handStrength >= 0.95) { // Very strong hand
                 return {
                     action: "Raise",
                     reason: "You have a very strong hand in late position. Raise 2.5-3x the big blind.",
                     class: "raise"
                 };
-            } else if (handStrength >= 0.4) { // Medium to strong hand
+            } else if (handStrength >= 0.47) { // Medium to strong hand
                 return {
                     action: "Raise",
                     reason: "You have a playable hand in late position. Consider stealing with 2-2.5x the big blind.",
@@ -268,13 +537,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 };
             }
         } else { // Unknown position
-            if (handStrength >= 0.8) {
+            if (handStrength >= 0.95) {
                 return {
                     action: "Raise",
                     reason: "You have a very strong hand. Consider raising 3x the big blind.",
                     class: "raise"
                 };
-            } else if (handStrength >= 0.6) {
+            } else if (handStrength >= 0.79) {
                 return {
                     action: "Call",
                     reason: "You have a strong hand. Consider calling or raising if there's minimal action.",
@@ -508,27 +777,78 @@ document.addEventListener('DOMContentLoaded', function() {
         const card1 = { rank: card1Rank.value, suit: card1Suit.value };
         const card2 = { rank: card2Rank.value, suit: card2Suit.value };
         
-        // Calculate hand strength
-        const handResult = calculatePreflopStrength(card1, card2);
-        
-        // Display hand type and strength
-        handTypeElement.textContent = handResult.type.replace('_', ' ');
-        handStrengthElement.textContent = `${Math.round(handResult.strength * 100)}%`;
-        
         // Calculate pot odds
-        const { total: totalBets } = getOpponentBets();
+        const { bets, total: totalBets } = getOpponentBets();
         let potOdds = 0;
         if (totalBets > 0) {
             potOdds = totalBets / (parseFloat(potSize.value) + totalBets);
         }
         
-        // Get recommendation
+        // When served by poker_server.py, let the Python engine do the analysis
+        if (window.location.protocol.startsWith('http')) {
+            fetch('/api/analyze', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    hole: [card1.rank + card1.suit, card2.rank + card2.suit],
+                    num_opponents: parseInt(numOpponents.value),
+                    position: position.value,
+                    pot_size: parseFloat(potSize.value) || 0,
+                    opponent_bets: bets,
+                    stack: parseFloat(playerStack.value) || 0,
+                    big_blind: parseFloat(bigBlind.value) || 0
+                })
+            })
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`Analysis failed with status ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .then(result => showPreflopResults(
+                    result.hand_type,
+                    result.hand_strength,
+                    {
+                        action: result.recommendation.action,
+                        reason: result.recommendation.reason,
+                        class: getRecommendationClass(result.recommendation.action)
+                    }
+                ))
+                .catch(() => analyzeLocally(card1, card2, potOdds));
+            return;
+        }
+        
+        analyzeLocally(card1, card2, potOdds);
+    });
+    
+    // Function to map a recommended action to its display class
+    function getRecommendationClass(action) {
+        if (action.startsWith('Raise') || action === 'Call/Raise' || action === 'Push') {
+            return 'raise';
+        } else if (action.endsWith('Call')) {
+            return 'call';
+        }
+        return 'fold';
+    }
+    
+    // Function to analyze the hand in the browser when the service isn't available
+    function analyzeLocally(card1, card2, potOdds) {
+        const handResult = calculatePreflopStrength(card1, card2, parseInt(numOpponents.value));
         const recommendation = getBettingRecommendation(
             handResult.type,
             handResult.strength,
             potOdds,
-            position.value
+            position.value,
+            calculatePreflopEquity(card1, card2, parseInt(numOpponents.value))
         );
+        showPreflopResults(handResult.type, handResult.strength, recommendation);
+    }
+    
+    // Function to display preflop results
+    function showPreflopResults(handType, handStrength, recommendation) {
+        // Display hand type and strength
+        handTypeElement.textContent = handType.replace('_', ' ');
+        handStrengthElement.textContent = `${Math.round(handStrength * 100)}%`;
         
         // Display recommendation
         recommendationElement.textContent = `Recommended Action: ${recommendation.action}`;
@@ -537,7 +857,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Show results
         preflopResults.classList.remove('hidden');
-    });
+    }
     
     // Event listener for continue to flop button
     continueToFlopButton.addEventListener('click', function() {
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""NumPy versions of the lookup-table evaluator and the 1326 two-card combos.
+
+The 112-bit keys of poker_evaluator don't fit a machine integer, so here a
+hand is described by two additive int64 values:
+
+    low    rank multiset hash (bits 0-31) and per-suit card counters (bits 32-47)
+    masks  one 13-bit rank mask per suit, suit s at bits 13*s .. 13*s+12
+
+Strengths are the same 1..7462 values poker_evaluator returns.
+"""
+
+import numpy as np
+
+from poker_evaluator import CATEGORY_FLOOR, FLUSH_TABLE, RANK_TABLE
+
+CARD_LOW = np.array([5 ** (c >> 2) + (1 << (32 + 4 * (c & 3))) for c in range(52)], dtype=np.int64)
+CARD_MASKS = np.array([1 << (13 * (c & 3) + (c >> 2)) for c in range(52)], dtype=np.int64)
+CARD_BITS = np.array([1 << c for c in range(52)], dtype=np.uint64)
+
+_rank_items = sorted(RANK_TABLE.items())
+RANK_KEYS = np.array([key for key, _ in _rank_items], dtype=np.int64)
+RANK_VALUES = np.array([value for _, value in _rank_items], dtype=np.int16)
+FLUSH_VALUES = np.array(FLUSH_TABLE, dtype=np.int16)
+del _rank_items
+
+# All 1326 two-card combos (a < b) and the combo index of any card pair
+COMBOS = np.array([(a, b) for a in range(52) for b in range(a + 1, 52)], dtype=np.uint8)
+COMBO_INDEX = np.full((52, 52), -1, dtype=np.int16)
+COMBO_INDEX[COMBOS[:, 0], COMBOS[:, 1]] = np.arange(len(COMBOS))
+COMBO_INDEX[COMBOS[:, 1], COMBOS[:, 0]] = np.arange(len(COMBOS))
+COMBO_LOW = CARD_LOW[COMBOS[:, 0]] + CARD_LOW[COMBOS[:, 1]]
+COMBO_MASKS = CARD_MASKS[COMBOS[:, 0]] + CARD_MASKS[COMBOS[:, 1]]
+COMBO_BITS = CARD_BITS[COMBOS[:, 0]] | CARD_BITS[COMBOS[:, 1]]
+# Rank pair of each combo (0-168) and the rank-hash sum of each rank pair
+COMBO_RANK_PAIR = (COMBOS[:, 0] >> 2).astype(np.int64) * 13 + (COMBOS[:, 1] >> 2)
+RANK_PAIR_KEYS = np.array([5 ** (i // 13) + 5 ** (i % 13) for i in range(169)], dtype=np.int64)
+
+# Hands evaluated per chunk by evaluate_cards
+EVALUATE_CHUNK = 1 << 16
+_CATEGORY_FLOOR = np.array(CATEGORY_FLOOR, dtype=np.int32)
+
+
+def cards_bits(ids):
+    """Return the 64-bit card mask of a list of card ids."""
+    bits = 0
+    for cid in ids:
+        bits |= 1 << cid
+    return bits
+
+
+_CARD_LOW_INTS = CARD_LOW.tolist()
+_CARD_MASK_INTS = CARD_MASKS.tolist()
+
+
+def hand_low(ids):
+    """Return the low key of a list of card ids as a Python int."""
+    return sum(_CARD_LOW_INTS[cid] for cid in ids)
+
+
+def hand_masks(ids):
+    """Return the suit rank masks of a list of card ids as a Python int."""
+    return sum(_CARD_MASK_INTS[cid] for cid in ids)
+
+
+def strengths(low, masks):
+    """Return the strengths of hands given their summed low keys and suit masks.
+
+    Every hand must have 5 to 7 cards; the result is an int16 array shaped
+    like ``low``.
+    """
+    low = np.asarray(low, dtype=np.int64)
+    masks = np.asarray(masks, dtype=np.int64)
+    result = RANK_VALUES[np.searchsorted(RANK_KEYS, low & 0xFFFFFFFF)]
+
+    flush = ((low >> 32) + 0x3333) & 0x8888
+    flushed = np.nonzero(flush)
+    if flushed[0].size:
+        bits = flush[flushed]
+        suit = (bits >= 0x80).astype(np.int64) + (bits >= 0x800) + (bits >= 0x8000)
+        result[flushed] = FLUSH_VALUES[(masks[flushed] >> (13 * suit)) & 0x1FFF]
+    return result
+
+
+def rank_pair_strengths(boards):
+    """Return the strengths of every rank pair on a batch of boards when no flush is made, shape (len(boards), 169).
+
+    Rank pairs are indexed like COMBO_RANK_PAIR. Rank pairs that can't
+    occur on a board (five of a kind) get meaningless values.
+    """
+    boards = np.asarray(boards, dtype=np.intp)
+    board_low = CARD_LOW[boards].sum(axis=1)
+    # Impossible rank pairs fall off the end of the table; clip them
+    pair_keys = RANK_PAIR_KEYS[None, :] + (board_low & 0xFFFFFFFF)[:, None]
+    slots = np.minimum(np.searchsorted(RANK_KEYS, pair_keys), len(RANK_KEYS) - 1)
+    return RANK_VALUES[slots]
+
+
+def board_strengths(boards, combos):
+    """Return the strengths of combos on a batch of boards, shape (len(boards), len(combos)).
+
+    ``boards`` is an (n, 3..5) array of card ids. Without a flush the result
+    only depends on the ranks of the two hole cards, so non-flush hands take
+    one table lookup per rank pair and board rather than a search per combo.
+    """
+    boards = np.asarray(boards, dtype=np.intp)
+    combos = np.asarray(combos, dtype=np.intp)
+    board_low = CARD_LOW[boards].sum(axis=1)
+    board_masks = CARD_MASKS[boards].sum(axis=1)
+    result = rank_pair_strengths(boards)[:, COMBO_RANK_PAIR[combos]]
+
+    flush = (((COMBO_LOW[combos][None, :] + board_low[:, None]) >> 32) + 0x3333) & 0x8888
+    rows, cols = np.nonzero(flush)
+    if rows.size:
+        bits = flush[rows, cols]
+        suit = (bits >= 0x80).astype(np.int64) + (bits >= 0x800) + (bits >= 0x8000)
+        masks = COMBO_MASKS[combos[cols]] + board_masks[rows]
+        result[rows, cols] = FLUSH_VALUES[(masks >> (13 * suit)) & 0x1FFF]
+    return result
+
+
+def evaluate_cards(cards, chunk=EVALUATE_CHUNK):
+    """Evaluate an (n, 5|6|7) array of card ids and return (strengths, categories).
+
+    Strengths are an int32 array of 1..7462 values and categories an int8
+    array of 0 (high card) ... 8 (straight flush). The hands are processed
+    ``chunk`` rows at a time, so temporary memory doesn't grow with n.
+    """
+    cards = np.asarray(cards)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(f"Expected an (n, 5..7) array of card ids, got shape {cards.shape}.")
+    if cards.size and (cards.min() < 0 or cards.max() > 51):
+        raise ValueError("Card ids run from 0 to 51.")
+
+    result = np.empty(len(cards), dtype=np.int32)
+    for start in range(0, len(cards), chunk):
+        block = cards[start:start + chunk].astype(np.intp)
+        ordered = np.sort(block, axis=1)
+        if (ordered[:, 1:] == ordered[:, :-1]).any():
+            raise ValueError("Cards must not repeat within a hand.")
+        result[start:start + chunk] = strengths(CARD_LOW[block].sum(axis=1), CARD_MASKS[block].sum(axis=1))
+    categories = (np.searchsorted(_CATEGORY_FLOOR, result, side='right') - 1).astype(np.int8)
+    return result, categories